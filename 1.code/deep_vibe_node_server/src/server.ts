@@ -17,6 +17,7 @@ import { S3UploadService } from "./services/s3-upload.service";
 import ChatSummaryService from "./services/chat-summary";
 import { HtmlUploadService } from "./services/html-upload.service";
 import FileTranscribeService from "./file-transcribe-service";
+import { WorkflowClient } from "./services/workflow-client";
 
 const app = express();
 const server = createServer(app);
@@ -32,6 +33,7 @@ const fileTranscribeService = new FileTranscribeService();
 const s3UploadService = new S3UploadService();
 const chatSummaryService = new ChatSummaryService();
 const htmlUploadService = new HtmlUploadService();
+const workflowClient = new WorkflowClient();
 
 // Multer 설정 (메모리 저장)
 const upload = multer({
@@ -695,32 +697,15 @@ app.post("/api/rooms/:roomId/generate-html-demo", async (req, res) => {
     // 1. 채팅 요약 가져오기
     const summary = await chatSummaryService.summarizeChat(roomId);
 
-    // 2. FastAPI 호출하여 워크플로우 실행 (FastAPI가 파일 업로드까지 처리)
-    const fastApiUrl = process.env.FASTAPI_URL || 'http://localhost:8000';
-    const workflowResponse = await fetch(`${fastApiUrl}/workflow`, {
-      method: 'POST',
-      headers: {
-        'Content-Type': 'application/json',
-      },
-      body: JSON.stringify({
-        conversation_summary: summary.summary,
-        prd_url: prdUrl,
-        image_url: imageUrl,
-        html_url: htmlUrl,
-        room_id: roomId
-      })
+    // 2. FastAPI에 워크플로우 작업을 등록하고 완료까지 폴링 (FastAPI가 파일 업로드까지 처리)
+    const job = await workflowClient.run({
+      conversation_summary: summary.summary,
+      prd_url: prdUrl,
+      image_url: imageUrl,
+      html_url: htmlUrl,
+      room_id: roomId
     });
-
-    if (!workflowResponse.ok) {
-      throw new Error(`FastAPI 호출 실패: ${workflowResponse.status}`);
-    }
-
-    const workflowResult = await workflowResponse.json() as {
-      success: boolean;
-      prd_file: string;
-      html_file: string;
-      message: string;
-    };
+    const workflowResult = job.result!;
 
     res.json({
       success: true,
@@ -958,8 +943,7 @@ io.on("connection", (socket) => {
         message: "PRD 및 HTML 생성 중..." 
       });
 
-      // 2. FastAPI 호출하여 워크플로우 실행
-      const fastApiUrl = process.env.FASTAPI_URL || 'http://localhost:8000';
+      // 2. FastAPI에 워크플로우 작업을 등록하고 완료까지 폴링 (단계가 끝날 때마다 진행 상황 알림)
       const requestPayload = {
         conversation_summary: summary.summary,
         prd_url: prdUrl || null,
@@ -968,30 +952,17 @@ io.on("connection", (socket) => {
         room_id: roomId
       };
 
-      const workflowResponse = await fetch(`${fastApiUrl}/workflow`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(requestPayload)
-      });
-
-      if (!workflowResponse.ok) {
-        const errorText = await workflowResponse.text();
-        throw new Error(`FastAPI 호출 실패: ${workflowResponse.status} - ${errorText}`);
-      }
-
-      const workflowResult = await workflowResponse.json() as {
-        success: boolean;
-        prd_file: string;
-        html_file: string;
-        message: string;
+      const stageMessages: Record<string, { step: string; message: string }> = {
+        prd: { step: "fastapi", message: "PRD 생성 완료, HTML 생성 중..." },
+        html: { step: "upload", message: "파일 업로드 중..." }
       };
-
-      socket.emit("html-demo-progress", { 
-        step: "upload", 
-        message: "파일 업로드 중..." 
+      const job = await workflowClient.run(requestPayload, (stage) => {
+        const progress = stageMessages[stage];
+        if (progress) {
+          socket.emit("html-demo-progress", progress);
+        }
       });
+      const workflowResult = job.result!;
 
       // 완료 알림
       socket.emit("html-demo-complete", {
@@ -0,0 +1,113 @@
+interface WorkflowRequest {
+  conversation_summary: string;
+  prd_url?: string | null;
+  image_url?: string | null;
+  html_url?: string | null;
+  room_id: string;
+}
+
+interface JobSubmitResponse {
+  success: boolean;
+  job_id: string;
+  status: string;
+  status_url: string;
+  message: string;
+}
+
+export interface WorkflowJob {
+  job_id: string;
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  stages: Record<string, { seconds: number; finished_at: number }>;
+  result?: {
+    prd_file: string;
+    html_file: string;
+    message: string;
+    uploaded?: boolean;
+  } | null;
+  error?: string | null;
+  artifacts: Record<string, string>;
+}
+
+/**
+ * FastAPI 워크플로우를 작업으로 등록하고 완료될 때까지 상태를 폴링합니다.
+ * 요청 하나를 워크플로우 전체 시간 동안 열어 두지 않으므로 ALB 유휴 타임아웃에 걸리지 않습니다.
+ */
+export class WorkflowClient {
+  private baseUrl: string;
+  private pollIntervalMs: number;
+  private timeoutMs: number;
+
+  constructor() {
+    this.baseUrl = (process.env.FASTAPI_URL || 'http://localhost:8000').replace(/\/$/, '');
+    this.pollIntervalMs = Number(process.env.WORKFLOW_POLL_INTERVAL_MS || 2000);
+    this.timeoutMs = Number(process.env.WORKFLOW_TIMEOUT_MS || 15 * 60 * 1000);
+  }
+
+  async submit(request: WorkflowRequest): Promise<JobSubmitResponse> {
+    const response = await fetch(`${this.baseUrl}/workflow`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+      },
+      body: JSON.stringify(request)
+    });
+
+    if (!response.ok) {
+      const errorText = await response.text();
+      throw new Error(`FastAPI 호출 실패: ${response.status} - ${errorText}`);
+    }
+    return await response.json() as JobSubmitResponse;
+  }
+
+  async getJob(jobId: string): Promise<WorkflowJob> {
+    const response = await fetch(`${this.baseUrl}/jobs/${jobId}`);
+    if (!response.ok) {
+      throw new Error(`작업 상태 조회 실패: ${response.status}`);
+    }
+    return await response.json() as WorkflowJob;
+  }
+
+  /**
+   * 작업이 끝날 때까지 기다립니다. 새로 끝난 단계(prd, html, upload)마다 onStage를 호출하고,
+   * 작업이 실패하면 오류를 던집니다.
+   */
+  async waitForJob(jobId: string, onStage?: (stage: string) => void): Promise<WorkflowJob> {
+    const deadline = Date.now() + this.timeoutMs;
+    const reported = new Set<string>();
+
+    while (true) {
+      let job: WorkflowJob | null = null;
+      try {
+        job = await this.getJob(jobId);
+      } catch (error: any) {
+        // 일시적인 조회 실패는 다음 폴링에서 다시 시도
+        console.warn(`작업 상태 조회 오류 (${jobId}):`, error.message);
+      }
+
+      if (job) {
+        for (const stage of Object.keys(job.stages || {})) {
+          if (!reported.has(stage)) {
+            reported.add(stage);
+            onStage?.(stage);
+          }
+        }
+        if (job.status === 'succeeded') {
+          return job;
+        }
+        if (job.status === 'failed') {
+          throw new Error(job.error || '워크플로우 작업이 실패했습니다.');
+        }
+      }
+
+      if (Date.now() > deadline) {
+        throw new Error(`워크플로우 작업 대기 시간 초과: ${jobId}`);
+      }
+      await new Promise((resolve) => setTimeout(resolve, this.pollIntervalMs));
+    }
+  }
+
+  async run(request: WorkflowRequest, onStage?: (stage: string) => void): Promise<WorkflowJob> {
+    const submitted = await this.submit(request);
+    return this.waitForJob(submitted.job_id, onStage);
+  }
+}
@@ -0,0 +1,428 @@
+import atexit
+import hashlib
+import json
+import os
+import tempfile
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 산출물 종류별 저장 디렉터리와 확장자
+ARTIFACT_KINDS = {
+    'prd': ('prd_outputs', '.md'),
+    'html': ('html_outputs', '.html'),
+    'prd_ir': ('prd_outputs', '.json'),
+}
+# 작업(또는 방)별로 어떤 산출물을 참조하는지 기록하는 디렉터리
+ARTIFACT_REFS_DIR = os.getenv('ARTIFACT_REFS_DIR', 'artifact_refs')
+# 산출물을 파일로도 저장할지 여부 (읽기 전용/임시 파일시스템에서는 false)
+ARTIFACT_PERSIST = os.getenv('ARTIFACT_PERSIST', 'true').lower() == 'true'
+# 파일 저장을 끈 경우 메모리에 산출물을 보관하는 시간 (초)
+# 참조가 없는 산출물(/generate-prd, /generate-html)과 해제되지 않은 참조(업로드 실패)는 이 시간이 지나면 정리
+ARTIFACT_MEMORY_TTL = float(os.getenv('ARTIFACT_MEMORY_TTL', '3600'))
+
+
+@dataclass
+class Artifact:
+    """저장된 산출물 정보"""
+    kind: str
+    path: str
+    digest: str
+    content: Optional[str] = None
+    # PRD와 함께 만든 구조화 PRD(prd_ir) 산출물 (워크플로우 안에서만 연결)
+    ir: Optional['Artifact'] = None
+    # 스트리밍으로 기록되어 아직 해시 이름으로 옮겨지지 않은 임시 파일
+    staged_path: Optional[str] = None
+
+    @property
+    def filename(self) -> str:
+        return os.path.basename(self.path)
+
+    def read(self) -> str:
+        """산출물 내용을 반환합니다. (메모리에 없는 산출물은 파일에서 읽음)"""
+        if self.content is not None:
+            return self.content
+        if self.staged_path:
+            try:
+                with open(self.staged_path, 'r', encoding='utf-8') as f:
+                    return f.read()
+            except FileNotFoundError:
+                # write-behind 큐가 이미 해시 이름으로 옮긴 경우
+                pass
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.content = f.read()
+        return self.content
+
+
+class ArtifactWriter:
+    """스트리밍으로 생성되는 산출물 조각을 기록했다가, 완료 시 해시 이름의 산출물로 확정합니다.
+
+    파일 저장을 켠 경우 조각을 임시 파일에 바로 이어 써서 메모리 사용량이 문서 크기와
+    무관하게 유지됩니다. 파일 저장을 끈 경우에는 보관할 곳이 메모리뿐이므로 조각을 모읍니다.
+    """
+
+    def __init__(self, store: 'ArtifactStore', kind: str, owner: Optional[str] = None):
+        directory, ext = store.location(kind)
+        self._store = store
+        self.kind = kind
+        self.owner = owner
+        self._hash = hashlib.sha256()
+        self._chunks: List[str] = []
+        self._file = None
+        self.partial_path: Optional[str] = None
+        if store.persistent:
+            fd, self.partial_path = tempfile.mkstemp(prefix='.partial-', suffix=ext, dir=directory)
+            self._file = os.fdopen(fd, 'w', encoding='utf-8')
+
+    def write(self, chunk: str):
+        self._hash.update(chunk.encode('utf-8'))
+        if self._file is not None:
+            self._file.write(chunk)
+            self._file.flush()
+        else:
+            self._chunks.append(chunk)
+
+    def commit(self) -> Artifact:
+        """기록을 마치고 내용 해시 이름의 산출물로 확정합니다."""
+        if self._file is None:
+            content = "".join(self._chunks)
+            self._chunks = []
+            return self._store.put(self.kind, content, owner=self.owner)
+        self._file.close()
+        self._file = None
+        return self._store._commit_staged(self.kind, self.partial_path, self._hash.hexdigest(),
+                                          self.owner)
+
+    def abort(self):
+        """실패한 스트림의 조각과 임시 파일을 정리합니다."""
+        self._chunks = []
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            if os.path.exists(self.partial_path):
+                os.unlink(self.partial_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+
+
+class WriteBehindSink:
+    """산출물 파일 쓰기/삭제를 백그라운드 스레드 하나에서 순서대로 처리합니다.
+
+    워크플로우는 파일 I/O를 기다리지 않고, 같은 경로에 대한 쓰기와 삭제는
+    요청된 순서대로 반영됩니다.
+    """
+
+    def __init__(self):
+        self._queue: 'queue.Queue[Optional[Callable[[], None]]]' = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name='artifact-sink', daemon=True)
+        self._thread.start()
+
+    def submit(self, operation: Callable[[], None]):
+        self._queue.put(operation)
+
+    def flush(self):
+        """지금까지 요청된 작업이 모두 디스크에 반영될 때까지 기다립니다."""
+        self._queue.join()
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            operation = self._queue.get()
+            try:
+                if operation is None:
+                    return
+                operation()
+            except Exception as e:
+                print(f"산출물 저장 실패: {e}")
+            finally:
+                self._queue.task_done()
+
+
+class ArtifactStore:
+    """내용 해시로 이름을 정하는 산출물 저장소.
+
+    같은 내용은 한 번만 저장되고, 작업/방(owner)별 참조를 따로 기록하므로
+    동시에 실행되는 워크플로우가 서로의 파일을 덮어쓰거나 지우지 않습니다.
+    산출물은 메모리에 둔 채 단계 사이에 그대로 넘기고, 파일 저장은 write-behind 큐로
+    뒤에서 처리합니다. persist=False면 파일을 전혀 쓰지 않고 참조가 해제될 때까지
+    메모리에서만 제공합니다.
+    """
+
+    def __init__(self, refs_dir: str = ARTIFACT_REFS_DIR, persist: bool = ARTIFACT_PERSIST,
+                 memory_ttl: float = ARTIFACT_MEMORY_TTL):
+        self.refs_dir = refs_dir
+        self.memory_ttl = memory_ttl
+        self._lock = threading.RLock()
+        self._memory: Dict[str, Artifact] = {}
+        self._refs: Dict[str, Dict[str, str]] = {}
+        # 메모리 전용 모드에서 산출물/참조를 마지막으로 등록한 시각 (TTL 정리용)
+        self._stored_at: Dict[str, float] = {}
+        self._referenced_at: Dict[str, float] = {}
+        self._next_sweep = 0.0
+        self._sink: Optional[WriteBehindSink] = None
+
+        if persist:
+            try:
+                os.makedirs(self.refs_dir, exist_ok=True)
+                for directory, _ in ARTIFACT_KINDS.values():
+                    os.makedirs(directory, exist_ok=True)
+            except OSError as e:
+                # 읽기 전용 파일시스템에서는 메모리에만 보관
+                print(f"산출물 디렉터리를 만들 수 없어 파일 저장을 끕니다: {e}")
+                persist = False
+        if persist:
+            self._load_refs()
+            self._sink = WriteBehindSink()
+
+    @property
+    def persistent(self) -> bool:
+        return self._sink is not None
+
+    def location(self, kind: str):
+        """산출물 종류의 (디렉터리, 확장자)를 반환합니다."""
+        if kind not in ARTIFACT_KINDS:
+            raise ValueError(f"알 수 없는 산출물 종류입니다: {kind}")
+        return ARTIFACT_KINDS[kind]
+
+    def path_for(self, kind: str, digest: str) -> str:
+        directory, ext = self.location(kind)
+        return os.path.join(directory, f"{kind}-{digest[:16]}{ext}")
+
+    def put(self, kind: str, content: str, owner: Optional[str] = None) -> Artifact:
+        """산출물을 메모리에 등록하고 파일 저장을 예약합니다. 같은 내용은 다시 쓰지 않습니다."""
+        digest = hashlib.sha256(content.encode('utf-8')).hexdigest()
+        path = self.path_for(kind, digest)
+
+        # 참조 등록 전에 다른 작업의 release가 산출물을 지우지 않도록 함께 잠금
+        with self._lock:
+            self._sweep_memory()
+            artifact = self._memory.get(path)
+            if artifact is not None:
+                print(f"♻️ 동일한 산출물 재사용: {path}")
+            else:
+                artifact = Artifact(kind=kind, path=path, digest=digest, content=content)
+                self._memory[path] = artifact
+                if self._sink is not None:
+                    self._sink.submit(lambda: self._persist(artifact))
+            if self._sink is None:
+                self._stored_at[path] = time.monotonic()
+
+            if owner:
+                self._add_ref(owner, kind, path)
+        return artifact
+
+    def _commit_staged(self, kind: str, partial_path: str, digest: str,
+                       owner: Optional[str]) -> Artifact:
+        """스트리밍으로 기록한 임시 파일을 해시 이름의 산출물로 등록합니다.
+
+        이름 변경은 write-behind 큐에서 처리하므로 먼저 예약된 같은 경로의 삭제와
+        순서가 뒤바뀌지 않고, 그 전까지는 임시 파일에서 내용을 읽습니다.
+        """
+        path = self.path_for(kind, digest)
+        with self._lock:
+            # 저장소가 이미 닫혔다면 그 자리에서 처리
+            submit = self._sink.submit if self._sink is not None else (lambda operation: operation())
+            artifact = self._memory.get(path)
+            if artifact is not None:
+                print(f"♻️ 동일한 산출물 재사용: {path}")
+                submit(lambda: _remove_file(partial_path))
+            else:
+                artifact = Artifact(kind=kind, path=path, digest=digest, staged_path=partial_path)
+                self._memory[path] = artifact
+                submit(lambda: self._promote(artifact))
+
+            if owner:
+                self._add_ref(owner, kind, path)
+        return artifact
+
+    def open_stream(self, kind: str, owner: Optional[str] = None) -> ArtifactWriter:
+        """조각 단위로 기록할 산출물 작성기를 엽니다."""
+        return ArtifactWriter(self, kind, owner)
+
+    def get(self, kind: str, filename: str) -> Optional[Artifact]:
+        """파일 이름으로 산출물을 찾습니다. 메모리에 없으면 저장된 파일을 찾습니다."""
+        directory, _ = self.location(kind)
+        if os.path.basename(filename) != filename:
+            return None
+        return self.get_by_path(os.path.join(directory, filename), kind)
+
+    def get_by_path(self, path: str, kind: Optional[str] = None) -> Optional[Artifact]:
+        with self._lock:
+            artifact = self._memory.get(os.path.normpath(path))
+        if artifact is not None:
+            return artifact
+        if os.path.exists(path):
+            return Artifact(kind=kind or '', path=path, digest='')
+        return None
+
+    def refs(self, owner: str) -> Dict[str, str]:
+        """owner가 참조하는 산출물 경로를 반환합니다."""
+        with self._lock:
+            return dict(self._refs.get(owner, {}))
+
+    def release(self, owner: str):
+        """owner의 참조를 해제하고, 더 이상 아무도 참조하지 않는 산출물을 정리합니다."""
+        with self._lock:
+            released = self._refs.pop(owner, {})
+            still_used = set()
+            for refs in self._refs.values():
+                still_used.update(refs.values())
+
+            self._referenced_at.pop(owner, None)
+            unused = [path for path in released.values() if path not in still_used]
+            for path in unused:
+                self._memory.pop(path, None)
+                self._stored_at.pop(path, None)
+
+            if self._sink is not None:
+                ref_path = self._ref_path(owner)
+                self._sink.submit(lambda: _remove_files(ref_path, unused))
+
+    def flush(self):
+        """예약된 파일 저장이 모두 끝날 때까지 기다립니다."""
+        if self._sink is not None:
+            self._sink.flush()
+
+    def close(self):
+        if self._sink is not None:
+            self._sink.close()
+            self._sink = None
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "persistent": self.persistent,
+                "in_memory": len(self._memory),
+                "owners": len(self._refs),
+                "pending_writes": self._sink.pending() if self._sink else 0
+            }
+
+    def _sweep_memory(self):
+        """메모리 전용 모드에서 보관 시간이 지난 참조와, 참조가 없는 오래된 산출물을 정리합니다.
+
+        파일 저장을 켠 경우 메모리에는 저장 대기 중인 산출물만 있으므로 정리할 것이 없습니다.
+        """
+        now = time.monotonic()
+        if self._sink is not None or now < self._next_sweep:
+            return
+        self._next_sweep = now + min(self.memory_ttl, 60.0)
+        deadline = now - self.memory_ttl
+        with self._lock:
+            for owner in [owner for owner, at in self._referenced_at.items() if at < deadline]:
+                print(f"오래된 산출물 참조 정리: {owner}")
+                self.release(owner)
+            still_used = set()
+            for refs in self._refs.values():
+                still_used.update(refs.values())
+            for path in [path for path, at in self._stored_at.items() if at < deadline]:
+                if path not in still_used:
+                    self._memory.pop(path, None)
+                    del self._stored_at[path]
+
+    def _persist(self, artifact: Artifact):
+        _persist_artifact(artifact.path, artifact.content)
+        # 파일에 저장된 뒤에는 조회를 파일로 처리 (메모리는 저장 대기 중인 산출물만 보관)
+        with self._lock:
+            if self._memory.get(artifact.path) is artifact:
+                del self._memory[artifact.path]
+
+    def _promote(self, artifact: Artifact):
+        os.replace(artifact.staged_path, artifact.path)
+        print(f"산출물 파일 저장: {artifact.path}")
+        with self._lock:
+            if self._memory.get(artifact.path) is artifact:
+                del self._memory[artifact.path]
+
+    def _ref_path(self, owner: str) -> str:
+        safe_owner = "".join(c if c.isalnum() or c in '-_' else '_' for c in owner)
+        return os.path.join(self.refs_dir, f"{safe_owner}.json")
+
+    def _add_ref(self, owner: str, kind: str, path: str):
+        with self._lock:
+            refs = self._refs.setdefault(owner, {})
+            refs[kind] = path
+            if self._sink is None:
+                self._referenced_at[owner] = time.monotonic()
+            else:
+                ref_path = self._ref_path(owner)
+                snapshot = json.dumps(refs)
+                self._sink.submit(lambda: _write_file(ref_path, snapshot))
+
+    def _load_refs(self):
+        """이전 실행에서 남은 참조 기록을 불러옵니다. (업로드되지 않은 산출물 보존)"""
+        for name in os.listdir(self.refs_dir):
+            if name.startswith('.partial-') or not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.refs_dir, name), 'r', encoding='utf-8') as f:
+                    self._refs[name[:-len('.json')]] = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"참조 기록을 읽을 수 없습니다: {name} - {e}")
+
+
+def _write_file(path: str, content: str):
+    """임시 파일에 쓴 뒤 교체하여 원자적으로 저장합니다."""
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix='.partial-', suffix=os.path.splitext(path)[1], dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def _persist_artifact(path: str, content: str):
+    # 내용 해시 이름이므로 이미 있으면 같은 내용
+    if os.path.exists(path):
+        return
+    _write_file(path, content)
+    print(f"산출물 파일 저장: {path}")
+
+
+def _remove_file(path: str):
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+def _remove_files(ref_path: str, paths: List[str]):
+    if os.path.exists(ref_path):
+        os.unlink(ref_path)
+    for path in paths:
+        if os.path.exists(path):
+            os.unlink(path)
+            print(f"로컬 산출물 삭제: {path}")
+
+
+_default_store: Optional[ArtifactStore] = None
+_store_lock = threading.Lock()
+
+
+def get_artifact_store() -> ArtifactStore:
+    """프로세스 공용 산출물 저장소를 반환합니다."""
+    global _default_store
+    with _store_lock:
+        if _default_store is None:
+            _default_store = ArtifactStore()
+            # CLI 실행 시 종료 전에 남은 파일 저장을 마무리
+            atexit.register(_default_store.close)
+        return _default_store
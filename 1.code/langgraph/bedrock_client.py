@@ -1,20 +1,14 @@
-import boto3
-import json
 import os
-from typing import Optional
+from typing import Iterator, Optional
 from dotenv import load_dotenv
+from llm_gateway import get_llm_gateway, user_message
 
 # .env 파일 로드
 load_dotenv()
 
 class BedrockClient:
     def __init__(self):
-        self.client = boto3.client(
-            'bedrock-runtime',
-            region_name=os.getenv('AWS_REGION', 'us-east-1'),
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
+        self.gateway = get_llm_gateway()
         self.model_id = os.getenv('BEDROCK_MODEL_ID', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
         self.max_tokens = 8000
         self.temperature = float(os.getenv('MODEL_TEMPERATURE', '0'))
@@ -24,32 +18,16 @@ class BedrockClient:
     def generate_text(self, prompt: str, max_tokens: Optional[int] = None) -> str:
         """Bedrock을 사용하여 텍스트를 생성합니다."""
         try:
-            tokens = max_tokens or self.max_tokens
-            
-            body = json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": tokens,
-                "temperature": self.temperature,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            })
-            
             print(f"Bedrock 호출 시작: 모델 {self.model_id}")
             
-            response = self.client.invoke_model(
-                body=body,
-                modelId=self.model_id,
-                accept='application/json',
-                contentType='application/json'
+            content = self.gateway.generate(
+                user_message(prompt),
+                provider='bedrock',
+                model=self.model_id,
+                max_tokens=max_tokens or self.max_tokens,
+                temperature=self.temperature
             )
             
-            response_body = json.loads(response.get('body').read())
-            content = response_body.get('content', [{}])[0].get('text', '')
-            
             print(f"Bedrock 응답 성공: {len(content)} 문자")
             return content
             
@@ -58,6 +36,28 @@ class BedrockClient:
             # 테스트용 더미 데이터 반환
             return self._get_dummy_response(prompt)
     
+    def generate_text_stream(self, prompt: str, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """Bedrock 스트리밍 API로 텍스트를 생성하며 조각 단위로 반환합니다."""
+        emitted = False
+        try:
+            print(f"Bedrock 스트리밍 호출 시작: 모델 {self.model_id}")
+            
+            for text in self.gateway.generate_stream(
+                user_message(prompt),
+                provider='bedrock',
+                model=self.model_id,
+                max_tokens=max_tokens or self.max_tokens,
+                temperature=self.temperature
+            ):
+                emitted = True
+                yield text
+            
+        except Exception as e:
+            print(f"Bedrock 스트리밍 오류: {e}")
+            # 아직 아무것도 보내지 않았다면 더미 데이터로 대체
+            if not emitted:
+                yield self._get_dummy_response(prompt)
+    
     def _get_dummy_response(self, prompt: str) -> str:
         """Bedrock 실패시 더미 응답을 생성합니다."""
         if "검색" in prompt or "조회" in prompt:
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""FastAPI 서비스 부하 테스트 / SLO 벤치마크
+
+stub LLM 백엔드(LLM_TRANSPORT=stub)와 가짜 Node.js 업로드 서버로 앱을 띄운 뒤,
+설정한 요청 비율과 엔드포인트 구성으로 open-loop 부하(응답을 기다리지 않고 도착 간격대로 요청)를 걸고
+엔드포인트별 처리량, p50/p95/p99 지연 시간, 오류율과 서버 이벤트 루프 지연을 JSON으로 출력합니다.
+
+사용법:
+    python benchmarks/load_test.py --profile benchmarks/profiles/default.json
+    python benchmarks/load_test.py --rate 20 --duration 60 --output result.json
+    python benchmarks/load_test.py --base-url http://localhost:8000   # 이미 실행 중인 서버에 부하
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, Optional
+import aiohttp
+from aiohttp import web
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_PROFILE = os.path.join(APP_DIR, 'benchmarks', 'profiles', 'default.json')
+# 서버 기동 대기 시간 (초)
+STARTUP_TIMEOUT = 60
+# 비동기 워크플로우 작업 상태 조회 간격 (초)
+JOB_POLL_INTERVAL = 0.2
+
+
+def load_profile(path: str, overrides: Dict[str, Any]) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        profile = json.load(f)
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+def percentile(samples: List[float], value: float) -> Optional[float]:
+    if not samples:
+        return None
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(value / 100 * (len(samples) - 1))))
+    return round(samples[index], 4)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class EndpointStats:
+    """엔드포인트 하나의 요청 결과 집계"""
+
+    def __init__(self):
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.status: Dict[str, int] = {}
+
+    def record(self, seconds: float, ok: bool, status: str):
+        self.status[status] = self.status.get(status, 0) + 1
+        if ok:
+            self.latencies.append(seconds)
+        else:
+            self.errors += 1
+
+    def summary(self, elapsed: float, slo: Optional[Dict[str, float]]) -> Dict[str, Any]:
+        total = len(self.latencies) + self.errors
+        result = {
+            "requests": total,
+            "errors": self.errors,
+            "error_rate": round(self.errors / total, 4) if total else 0.0,
+            "throughput": round(len(self.latencies) / elapsed, 3) if elapsed else 0.0,
+            "p50": percentile(self.latencies, 50),
+            "p95": percentile(self.latencies, 95),
+            "p99": percentile(self.latencies, 99),
+            "max": round(max(self.latencies), 4) if self.latencies else None,
+            "status": self.status
+        }
+        if slo and total:
+            violations = []
+            for name, limit in slo.items():
+                value = result.get(name)
+                if value is None or value > limit:
+                    violations.append(f"{name} {value} > {limit}")
+            result["slo"] = {"passed": not violations, "violations": violations}
+        return result
+
+
+class LoadTest:
+    """open-loop 부하를 걸고 결과를 모읍니다."""
+
+    def __init__(self, base_url: str, profile: Dict[str, Any]):
+        self.base_url = base_url.rstrip('/')
+        self.profile = profile
+        self.stats: Dict[str, EndpointStats] = {name: EndpointStats() for name in profile['mix']}
+        self.payload = profile.get('workflow_payload', {})
+        self.html_filename: Optional[str] = None
+        self.prd_file_path: Optional[str] = None
+        self._counter = 0
+
+    async def prepare(self, session: aiohttp.ClientSession):
+        """/html/{filename}, /generate-html에서 쓸 PRD와 HTML을 미리 만듭니다."""
+        async with session.post(f"{self.base_url}/generate-prd", json=self.payload) as response:
+            response.raise_for_status()
+            self.prd_file_path = (await response.json())['file_path']
+        async with session.post(f"{self.base_url}/generate-html",
+                                json={"prd_file_path": self.prd_file_path}) as response:
+            response.raise_for_status()
+            self.html_filename = os.path.basename((await response.json())['file_path'])
+        async with session.post(f"{self.base_url}/stats/event-loop/reset") as response:
+            response.raise_for_status()
+
+    async def run(self, session: aiohttp.ClientSession) -> float:
+        rate = float(self.profile['rate'])
+        duration = float(self.profile['duration'])
+        names = list(self.profile['mix'])
+        weights = [self.profile['mix'][name] for name in names]
+        tasks = []
+
+        started = time.monotonic()
+        next_at = started
+        while next_at < started + duration:
+            # 포아송 도착: 이전 요청이 끝났는지와 무관하게 정해진 간격으로 요청을 보냄
+            await asyncio.sleep(max(0.0, next_at - time.monotonic()))
+            name = random.choices(names, weights)[0]
+            tasks.append(asyncio.ensure_future(self._request(session, name)))
+            next_at += random.expovariate(rate)
+
+        # 부하 종료 후 남은 요청을 기다리고, 그래도 끝나지 않으면 오류로 집계
+        if tasks:
+            _, pending = await asyncio.wait(tasks, timeout=float(self.profile.get('drain_timeout', 120)))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        return time.monotonic() - started
+
+    async def _request(self, session: aiohttp.ClientSession, name: str):
+        self._counter += 1
+        started = time.monotonic()
+        status = 'error'
+        ok = False
+        try:
+            status, ok = await getattr(self, f"_{name}")(session, self._counter)
+        except asyncio.CancelledError:
+            self.stats[name].record(time.monotonic() - started, False, 'drain_timeout')
+            raise
+        except Exception as e:
+            status = type(e).__name__
+        self.stats[name].record(time.monotonic() - started, ok, str(status))
+
+    async def _llm(self, session: aiohttp.ClientSession, index: int):
+        # 캐시 적중률을 조절하도록 프롬프트를 일정 개수 안에서 고름
+        pool = int(self.profile.get('llm_prompt_pool', 0)) or index
+        prompt = f"{self.profile.get('llm_prompt', '상품 목록 샘플 데이터를 만들어 주세요')} #{random.randint(1, pool)}"
+        async with session.post(f"{self.base_url}/llm", json={"prompt": prompt}) as response:
+            await response.read()
+            return response.status, response.status == 200
+
+    async def _workflow(self, session: aiohttp.ClientSession, index: int):
+        sync = self.profile.get('workflow_mode', 'sync') == 'sync'
+        payload = {**self.payload, "room_id": f"bench-{index}", "sync": sync}
+        async with session.post(f"{self.base_url}/workflow", json=payload) as response:
+            body = await response.json()
+            if response.status != 200 or sync:
+                return response.status, response.status == 200
+        # 비동기 작업은 완료될 때까지의 시간을 측정
+        while True:
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+            async with session.get(f"{self.base_url}{body['status_url']}") as response:
+                job = await response.json()
+            if job['status'] in ('completed', 'failed'):
+                return job['status'], job['status'] == 'completed'
+
+    async def _generate_prd(self, session: aiohttp.ClientSession, index: int):
+        payload = {**self.payload, "conversation_summary": f"{self.payload['conversation_summary']} ({index})"}
+        async with session.post(f"{self.base_url}/generate-prd", json=payload) as response:
+            await response.read()
+            return response.status, response.status == 200
+
+    async def _generate_html(self, session: aiohttp.ClientSession, index: int):
+        async with session.post(f"{self.base_url}/generate-html",
+                                json={"prd_file_path": self.prd_file_path}) as response:
+            await response.read()
+            return response.status, response.status == 200
+
+    async def _html(self, session: aiohttp.ClientSession, index: int):
+        async with session.get(f"{self.base_url}/html/{self.html_filename}") as response:
+            await response.read()
+            return response.status, response.status == 200
+
+    def report(self, elapsed: float, server_stats: Dict[str, Any]) -> Dict[str, Any]:
+        slo = self.profile.get('slo', {})
+        endpoints = {name: stats.summary(elapsed, slo.get(name)) for name, stats in self.stats.items()}
+        event_loop = server_stats.get('event_loop', {})
+        result = {
+            "profile": {key: self.profile.get(key) for key in ('rate', 'duration', 'mix', 'workflow_mode', 'stub')},
+            "elapsed": round(elapsed, 3),
+            "endpoints": endpoints,
+            "event_loop": event_loop,
+            "server": {key: server_stats.get(key) for key in ('transport', 'rate_limits', 'single_flight', 'llm_cache')}
+        }
+        violations = [f"{name}: {violation}" for name, summary in endpoints.items()
+                      for violation in summary.get('slo', {}).get('violations', [])]
+        max_lag = slo.get('event_loop', {}).get('p99')
+        if max_lag is not None and event_loop.get('p99', 0) > max_lag:
+            violations.append(f"event_loop: p99 {event_loop.get('p99')} > {max_lag}")
+        result["slo_passed"] = not violations
+        result["slo_violations"] = violations
+        return result
+
+
+async def start_fake_node_server(port: int) -> web.AppRunner:
+    """업로드를 바로 성공시키는 가짜 Node.js 서버"""
+    async def upload(request: web.Request) -> web.Response:
+        await request.read()
+        return web.json_response({"success": True})
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_post('/api/rooms/{room_id}/{kind}', upload)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+
+def start_app(port: int, node_port: int, profile: Dict[str, Any]) -> subprocess.Popen:
+    """stub LLM 백엔드로 앱을 별도 프로세스에서 실행합니다."""
+    stub = profile.get('stub', {})
+    env = {
+        **os.environ,
+        "LLM_TRANSPORT": "stub",
+        "LLM_STUB_LATENCY": str(stub.get('latency', 'lognormal:1.0,0.3')),
+        "LLM_STUB_TOKENS_PER_SEC": str(stub.get('tokens_per_sec', 60)),
+        "LLM_STUB_OUTPUT_TOKENS": str(stub.get('output_tokens', 300)),
+        "LLM_STUB_ERROR_RATE": str(stub.get('error_rate', 0)),
+        "NODEJS_URL": f"http://127.0.0.1:{node_port}",
+        "OPEN_AI_KEY": os.getenv('OPEN_AI_KEY') or 'stub',
+        "ARTIFACT_PERSIST": "false",
+        "JOB_DB_PATH": ":memory:",
+        "STYLE_GUIDE_CACHE_PATH": ":memory:",
+        "PYTHONUNBUFFERED": "1",
+        **{key: str(value) for key, value in profile.get('env', {}).items()}
+    }
+    log = open(profile.get('server_log', os.devnull), 'w')
+    return subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--log-level', 'warning'],
+        cwd=APP_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+
+async def wait_until_healthy(session: aiohttp.ClientSession, base_url: str, process: Optional[subprocess.Popen]):
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"앱 프로세스가 종료되었습니다 (exit {process.returncode}). --server-log로 로그를 확인하세요.")
+        try:
+            async with session.get(f"{base_url}/health") as response:
+                if response.status == 200:
+                    return
+        except aiohttp.ClientError:
+            pass
+        await asyncio.sleep(0.5)
+    raise RuntimeError("앱이 제한 시간 안에 시작되지 않았습니다.")
+
+
+async def main_async(args) -> Dict[str, Any]:
+    profile = load_profile(args.profile, {"rate": args.rate, "duration": args.duration,
+                                          "server_log": args.server_log})
+    process = None
+    node_runner = None
+    base_url = args.base_url
+    try:
+        if base_url is None:
+            port = free_port()
+            node_port = free_port()
+            node_runner = await start_fake_node_server(node_port)
+            process = start_app(port, node_port, profile)
+            base_url = f"http://127.0.0.1:{port}"
+
+        connector = aiohttp.TCPConnector(limit=int(profile.get('max_connections', 1000)))
+        timeout = aiohttp.ClientTimeout(total=float(profile.get('request_timeout', 600)))
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            await wait_until_healthy(session, base_url, process)
+            test = LoadTest(base_url, profile)
+            await test.prepare(session)
+            print(f"부하 시작: 초당 {profile['rate']}건, {profile['duration']}초, 구성 {profile['mix']}",
+                  file=sys.stderr)
+            elapsed = await test.run(session)
+            async with session.get(f"{base_url}/stats") as response:
+                server_stats = await response.json()
+        return test.report(elapsed, server_stats)
+    finally:
+        if process is not None:
+            process.terminate()
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if node_runner is not None:
+            await node_runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="FastAPI 서비스 부하 테스트 / SLO 벤치마크")
+    parser.add_argument('--profile', default=DEFAULT_PROFILE, help="부하 프로필 JSON 파일")
+    parser.add_argument('--rate', type=float, help="초당 요청 수 (프로필 값 대신 사용)")
+    parser.add_argument('--duration', type=float, help="부하 시간(초) (프로필 값 대신 사용)")
+    parser.add_argument('--base-url', help="이미 실행 중인 서버 주소 (지정하면 앱을 직접 띄우지 않음)")
+    parser.add_argument('--server-log', help="띄운 앱의 로그를 저장할 파일")
+    parser.add_argument('--output', help="결과 JSON을 저장할 파일")
+    args = parser.parse_args()
+
+    result = asyncio.run(main_async(args))
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(text)
+    # SLO를 어기면 실패 코드로 종료 (CI에서 동시성 회귀 탐지용)
+    sys.exit(0 if result['slo_passed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional, Tuple
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 블로킹 LLM/IO 호출을 실행할 스레드 수
+LLM_MAX_WORKERS = int(os.getenv('LLM_MAX_WORKERS', '32'))
+# 동시에 실행할 수 있는 워크플로우 수 (초과분은 대기)
+WORKFLOW_MAX_CONCURRENCY = int(os.getenv('WORKFLOW_MAX_CONCURRENCY', '16'))
+# 워크플로우 안의 단계(이미지 다운로드, 비전 분석 등)를 병렬로 실행할 스레드 수
+STAGE_MAX_WORKERS = int(os.getenv('STAGE_MAX_WORKERS', '32'))
+
+_executor: Optional[ThreadPoolExecutor] = None
+_stage_executor: Optional[ThreadPoolExecutor] = None
+_workflow_semaphore = asyncio.Semaphore(WORKFLOW_MAX_CONCURRENCY)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """블로킹 호출용 공용 스레드 풀을 반환합니다."""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=LLM_MAX_WORKERS, thread_name_prefix='llm-worker')
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """블로킹 함수를 공용 스레드 풀에서 실행하여 이벤트 루프를 막지 않습니다.
+
+    호출한 쪽의 contextvars(현재 추적 span 등)를 복사해서 실행합니다.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+async def iterate_blocking(iterator: Iterator[Any]) -> AsyncIterator[Any]:
+    """블로킹 이터레이터(스트리밍 응답 등)를 스레드 풀에서 한 조각씩 꺼내 비동기로 전달합니다."""
+    sentinel = object()
+    executor = get_executor()
+    pending: Optional[Future] = None
+    try:
+        while True:
+            context = contextvars.copy_context()
+            pending = executor.submit(context.run, next, iterator, sentinel)
+            item = await asyncio.wrap_future(pending)
+            pending = None
+            if item is sentinel:
+                break
+            yield item
+    finally:
+        # 클라이언트 연결 종료 시 업스트림 스트림도 정리
+        # 실행 중인 next()가 있으면 제너레이터를 닫을 수 없으므로, 끝난 뒤에 스레드 풀에서 닫음
+        close = getattr(iterator, 'close', None)
+        if close:
+            if pending is None:
+                _submit_close(executor, close)
+            else:
+                pending.add_done_callback(lambda _: _submit_close(executor, close))
+
+
+def _submit_close(executor: ThreadPoolExecutor, close: Callable[[], Any]):
+    try:
+        executor.submit(close)
+    except RuntimeError:
+        # 종료 중이라 스레드 풀을 쓸 수 없으면 바로 닫음
+        close()
+
+
+def get_stage_executor() -> ThreadPoolExecutor:
+    """StageGraph 단계 실행용 스레드 풀을 반환합니다.
+
+    단계를 실행하는 쪽이 이미 공용 스레드 풀 안에서 돌고 있으므로, 같은 풀을 쓰면
+    풀이 가득 찼을 때 서로를 기다리며 멈출 수 있어 별도 풀을 사용합니다.
+    """
+    global _stage_executor
+    if _stage_executor is None:
+        _stage_executor = ThreadPoolExecutor(max_workers=STAGE_MAX_WORKERS, thread_name_prefix='stage-worker')
+    return _stage_executor
+
+
+class StageGraph:
+    """의존 관계가 있는 단계들을 입력이 준비되는 즉시 병렬로 실행합니다.
+
+    각 단계 함수는 의존하는 단계의 결과를 단계 이름의 키워드 인자로 받습니다.
+    단계는 호출한 쪽의 contextvars(현재 추적 span 등)를 복사해서 실행됩니다.
+
+        graph = StageGraph()
+        graph.add('image', download)
+        graph.add('style', analyze, 'image')        # analyze(image=...)
+        graph.add('prompt', build_prompt, 'style')  # build_prompt(style=...)
+        results = graph.run()
+    """
+
+    def __init__(self, executor: Optional[ThreadPoolExecutor] = None):
+        self.executor = executor
+        self._stages: Dict[str, Tuple[Callable[..., Any], Tuple[str, ...]]] = {}
+
+    def add(self, name: str, func: Callable[..., Any], *deps: str) -> 'StageGraph':
+        if name in self._stages:
+            raise ValueError(f"이미 등록된 단계입니다: {name}")
+        self._stages[name] = (func, deps)
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """모든 단계를 실행하고 단계 이름별 결과를 반환합니다. 한 단계라도 실패하면 그 예외를 전달합니다."""
+        executor = self.executor or get_stage_executor()
+        pending = dict(self._stages)
+        running: Dict[Future, str] = {}
+        results: Dict[str, Any] = {}
+        try:
+            while pending or running:
+                for name, (func, deps) in list(pending.items()):
+                    if all(dep in results for dep in deps):
+                        context = contextvars.copy_context()
+                        future = executor.submit(context.run, func, **{dep: results[dep] for dep in deps})
+                        running[future] = name
+                        del pending[name]
+                if not running:
+                    raise ValueError(f"실행할 수 없는 단계가 있습니다 (없는 단계에 의존): {sorted(pending)}")
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    results[running.pop(future)] = future.result()
+        finally:
+            # 실패로 빠져나가면 아직 시작하지 않은 단계는 취소
+            for future in running:
+                future.cancel()
+        return results
+
+
+def workflow_slot() -> asyncio.Semaphore:
+    """워크플로우 동시 실행 수를 제한하는 세마포어를 반환합니다."""
+    return _workflow_semaphore
+
+
+def shutdown_executor():
+    """서버 종료 시 스레드 풀을 정리합니다."""
+    global _executor, _stage_executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+    if _stage_executor is not None:
+        _stage_executor.shutdown(wait=False, cancel_futures=True)
+        _stage_executor = None
@@ -0,0 +1,291 @@
+import contextvars
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 응답이 늦을 때 두 번째 요청을 보내는 헤징 사용 여부 (추가 비용이 있으므로 기본 꺼짐)
+LLM_HEDGING = os.getenv('LLM_HEDGING', 'false').lower() == 'true'
+# 최근 첫 토큰 지연 시간의 몇 번째 백분위수를 넘기면 헤지할지
+LLM_HEDGE_PERCENTILE = float(os.getenv('LLM_HEDGE_PERCENTILE', '95'))
+# 백분위수를 계산할 최근 표본 수 / 헤징을 시작하기 전 최소 표본 수
+LLM_HEDGE_WINDOW = int(os.getenv('LLM_HEDGE_WINDOW', '200'))
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv('LLM_HEDGE_MIN_SAMPLES', '20'))
+# 헤지 요청을 보내기 전 최소 대기 시간 (초)
+LLM_HEDGE_MIN_DELAY = float(os.getenv('LLM_HEDGE_MIN_DELAY', '0.5'))
+# 전체 요청 중 헤지할 수 있는 최대 비율 (추가 비용 상한)
+LLM_HEDGE_MAX_RATE = float(os.getenv('LLM_HEDGE_MAX_RATE', '0.1'))
+# 헤지 요청을 보낼 제공자 (same: 같은 제공자/모델, bedrock, openai)
+LLM_HEDGE_PROVIDER = os.getenv('LLM_HEDGE_PROVIDER', 'same')
+# 헤징 중인 스트림을 읽는 스레드 수 (모두 사용 중이면 헤징 없이 호출한 스레드에서 바로 읽음)
+LLM_HEDGE_MAX_WORKERS = int(os.getenv('LLM_HEDGE_MAX_WORKERS', os.getenv('LLM_MAX_WORKERS', '32')))
+
+_CHUNK = 'chunk'
+_DONE = 'done'
+_ERROR = 'error'
+
+
+class LatencyTracker:
+    """키별 최근 지연 시간을 모아 백분위수를 계산합니다."""
+
+    def __init__(self, window: int = LLM_HEDGE_WINDOW):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            self._samples.setdefault(key, deque(maxlen=self.window)).append(seconds)
+
+    def percentile(self, key: str, percentile: float, min_samples: int = 1) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < max(min_samples, 1):
+            return None
+        index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+class HedgeCancelled(Exception):
+    """헤징에서 진 요청이 취소되었습니다."""
+
+
+class CancelScope:
+    """헤징 요청 하나의 취소 상태와, 취소 시 닫을 제공자 응답(연결) 목록"""
+
+    def __init__(self):
+        self.cancelled = threading.Event()
+        self._closers: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+    def on_cancel(self, closer: Callable[[], None]):
+        """취소되면 호출할 함수를 등록합니다. 이미 취소되었으면 바로 호출합니다."""
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._closers.append(closer)
+                return
+        _close_quietly(closer)
+
+    def cancel(self):
+        with self._lock:
+            self.cancelled.set()
+            closers, self._closers = self._closers, []
+        for closer in closers:
+            _close_quietly(closer)
+
+
+_current_scope: 'contextvars.ContextVar[Optional[CancelScope]]' = contextvars.ContextVar(
+    'hedge_cancel_scope', default=None)
+
+
+def current_cancel_scope() -> Optional[CancelScope]:
+    """헤징으로 실행 중인 요청이면 그 취소 범위를 반환합니다."""
+    return _current_scope.get()
+
+
+def on_cancel(closer: Callable[[], None]):
+    """헤징으로 실행 중인 요청이면, 요청이 지는 순간 closer로 응답 스트림을 닫도록 등록합니다.
+
+    진 요청이 첫 토큰을 기다리며 읽기에서 막혀 있어도 연결이 바로 끊깁니다.
+    """
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.on_cancel(closer)
+
+
+def raise_if_cancelled():
+    scope = _current_scope.get()
+    if scope is not None and scope.cancelled.is_set():
+        raise HedgeCancelled("헤징에서 진 요청이 취소되었습니다.")
+
+
+def _close_quietly(closer: Callable[[], None]):
+    try:
+        closer()
+    except Exception as e:
+        print(f"헤지 요청 연결 종료 실패: {e}")
+
+
+class _Runner:
+    """스트림 하나를 풀 스레드에서 읽어 공용 큐로 전달합니다."""
+
+    def __init__(self, index: int, factory: Callable[[], Iterator[str]], events: 'queue.Queue'):
+        self.index = index
+        self.factory = factory
+        self.events = events
+        self.scope = CancelScope()
+
+    def cancel(self):
+        """진 쪽의 응답 스트림(연결)을 바로 닫습니다."""
+        self.scope.cancel()
+
+    def run(self):
+        _current_scope.set(self.scope)
+        stream = None
+        try:
+            stream = self.factory()
+            for text in stream:
+                if self.scope.cancelled.is_set():
+                    return
+                self.events.put((self.index, _CHUNK, text))
+            self.events.put((self.index, _DONE, None))
+        except Exception as e:
+            self.events.put((self.index, _ERROR, e))
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+
+
+class HedgePolicy:
+    """응답이 늦는 호출에 두 번째 요청을 보내 꼬리 지연 시간을 줄입니다.
+
+    첫 토큰이 최근 지연 시간 백분위수로 정한 기한 안에 오지 않으면 헤지 요청을 보내고,
+    먼저 첫 토큰을 보낸 쪽의 응답을 사용하며 나머지는 취소합니다.
+    헤지 비율은 LLM_HEDGE_MAX_RATE로 제한됩니다.
+    """
+
+    def __init__(self, enabled: bool = LLM_HEDGING, percentile: float = LLM_HEDGE_PERCENTILE,
+                 min_samples: int = LLM_HEDGE_MIN_SAMPLES, min_delay: float = LLM_HEDGE_MIN_DELAY,
+                 max_rate: float = LLM_HEDGE_MAX_RATE, max_workers: int = LLM_HEDGE_MAX_WORKERS):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_rate = max_rate
+        self.max_workers = max(max_workers, 1)
+        self.latencies = LatencyTracker()
+        self._lock = threading.Lock()
+        # 스레드를 미리 확보한 뒤에만 제출하므로 풀 대기열에 쌓이지 않음
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "primary_wins": 0, "skipped_budget": 0,
+                       "skipped_workers": 0}
+
+    def active(self, hedge: Optional[bool] = None) -> bool:
+        return self.enabled if hedge is None else hedge
+
+    def deadline(self, key: str) -> Optional[float]:
+        """헤지 요청을 보낼 첫 토큰 기한 (표본이 부족하면 None)"""
+        value = self.latencies.percentile(key, self.percentile, self.min_samples)
+        return None if value is None else max(value, self.min_delay)
+
+    def stream(self, key: str, primary: Callable[[], Iterator[str]],
+               backup: Callable[[], Iterator[str]], hedge: Optional[bool] = None) -> Iterator[str]:
+        """primary 스트림을 반환하되, 첫 토큰이 늦으면 backup과 경쟁시킵니다."""
+        if not self.active(hedge):
+            yield from primary()
+            return
+        events: 'queue.Queue' = queue.Queue()
+        first = self._start(_Runner(0, primary, events))
+        if first is None:
+            # 헤징용 스레드가 모두 사용 중이면 헤징 없이 호출
+            self._count("skipped_workers")
+            yield from primary()
+            return
+
+        self._count("requests")
+        runners = [first]
+        started = time.monotonic()
+        deadline = self.deadline(key)
+
+        try:
+            winner = None
+            errors = 0
+            while winner is None:
+                timeout = None
+                if len(runners) == 1 and deadline is not None:
+                    timeout = max(0.0, started + deadline - time.monotonic())
+                try:
+                    index, kind, value = events.get(timeout=timeout)
+                except queue.Empty:
+                    within_budget = self._within_budget()
+                    hedge_runner = self._start(_Runner(1, backup, events)) if within_budget else None
+                    if hedge_runner is not None:
+                        self._count("hedged")
+                        print(f"⏱️ 첫 토큰이 {deadline:.2f}초 안에 오지 않아 헤지 요청 전송: {key}")
+                        runners.append(hedge_runner)
+                    else:
+                        self._count("skipped_workers" if within_budget else "skipped_budget")
+                        deadline = None
+                    continue
+
+                if kind == _ERROR:
+                    errors += 1
+                    # 남은 요청이 있으면 그 결과를 기다림
+                    if errors == len(runners):
+                        raise value
+                    continue
+                winner = runners[index]
+
+            # 헤지로 이긴 경우에도 원래 요청은 최소 이만큼 걸렸으므로 표본으로 기록
+            self.latencies.record(key, time.monotonic() - started)
+            self._count("primary_wins" if winner.index == 0 else "hedge_wins")
+            # 진 쪽은 첫 토큰 전이라도 연결을 바로 닫아 연결과 호출 슬롯을 반납
+            for runner in runners:
+                if runner is not winner:
+                    runner.cancel()
+
+            while True:
+                if kind == _CHUNK:
+                    yield value
+                elif kind == _DONE:
+                    return
+                elif kind == _ERROR:
+                    raise value
+                index, kind, value = events.get()
+                while index != winner.index:
+                    index, kind, value = events.get()
+        finally:
+            for runner in runners:
+                runner.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self._stats["requests"]
+            hedged = self._stats["hedged"]
+            return {
+                **self._stats,
+                "enabled": self.enabled,
+                "hedge_rate": round(hedged / requests, 4) if requests else 0.0,
+                "hedge_win_rate": round(self._stats["hedge_wins"] / hedged, 4) if hedged else 0.0
+            }
+
+    def _start(self, runner: _Runner) -> Optional[_Runner]:
+        """남는 헤징 스레드가 있으면 runner를 실행하고, 없으면 None을 반환합니다."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='llm-hedge')
+            executor = self._executor
+
+        def run():
+            try:
+                runner.run()
+            finally:
+                self._slots.release()
+
+        # 호출한 쪽의 추적 span 아래에 기록되도록 contextvars를 복사해서 실행
+        executor.submit(contextvars.copy_context().run, run)
+        return runner
+
+    def _within_budget(self) -> bool:
+        with self._lock:
+            return (self._stats["hedged"] + 1) / max(self._stats["requests"], 1) <= self.max_rate
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+# 프로세스 전체에서 공유하는 헤징 정책
+llm_hedging = HedgePolicy()
@@ -1,51 +1,204 @@
 import os
 import re
-import json
-import boto3
+import time
 from datetime import datetime
-from typing import Optional, Dict, Any
-from botocore.config import Config
+from typing import Optional, Dict, Any, Iterator, Union
+from artifact_store import Artifact, ArtifactStore, ArtifactWriter, get_artifact_store
+from html_patch import (HTML_PATCH_ENABLED, HTML_PATCH_MAX_CHARS, HTML_PATCH_MAX_TOKENS, HTMLPatchError,
+                        apply_edits, fetch_html, parse_edits)
+from html_runtime import (FEATURE_ATTRIBUTE, HOOK_IDS, RuntimeScanner, inject_runtime, runtime_config,
+                          runtime_version, strip_runtime)
+from llm_gateway import user_message
+from llm_router import get_llm_router
+from metrics import llm_fallbacks, observe_stage, stage_duration
+from prd_ir import PRDIR, PRDIRError, load_prd_ir
+from tracing import tracer
+
+# 스트리밍 생성에서 런타임을 넣기 위해 마지막까지 보류하는 문서 끝부분 길이 (글자)
+_STREAM_TAIL_CHARS = 256
 
 class HTMLAgent:
-    def __init__(self, llm_api_url: str = "http://localhost:8000/llm"):
+    def __init__(self, llm_api_url: str = "http://localhost:8000/llm",
+                 artifact_store: Optional[ArtifactStore] = None):
         self.llm_api_url = llm_api_url
-        self.output_dir = "html_outputs"
-        self._setup_bedrock_client()
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.llm_stream_url = f"{llm_api_url.rstrip('/')}/stream"
+        self.artifact_store = artifact_store or get_artifact_store()
+        # 공용 LLM 라우터 (지연 시간/오류율/비용 기준으로 모델 선택, 실패 시 다음 후보로 전환)
+        self.router = get_llm_router()
     
-    def _setup_bedrock_client(self):
-        """Bedrock 클라이언트 설정"""
-        config = Config(
-            read_timeout=int(os.getenv("MODEL_TIMEOUT", "180")),
-            connect_timeout=30,
-            retries={'max_attempts': 3}
-        )
-        
-        self.bedrock_client = boto3.client(
-            'bedrock-runtime',
-            region_name=os.getenv("AWS_REGION", "us-east-1"),
-            config=config
-        )
-        
-        self.model_id = os.getenv("BEDROCK_MODEL_ID", "us.anthropic.claude-opus-4-1-20250805-v1:0")
+    def generate_html(self, prd_file_path: str, owner: Optional[str] = None) -> str:
+        """PRD 파일을 읽어서 HTML을 생성합니다. (owner: 산출물을 참조할 작업/방 ID)"""
+        return self.create_html(prd_file_path, owner).path
     
-    def generate_html(self, prd_file_path: str) -> str:
-        """PRD 파일을 읽어서 HTML을 생성합니다."""
-        prd_content = self._read_prd_file(prd_file_path)
-        html_structure = self._extract_html_requirements(prd_content)
-        html_content = self._generate_html_content(html_structure)
+    def create_html(self, prd: Union[Artifact, str], owner: Optional[str] = None,
+                    html_url: Optional[str] = None, existing_html: Optional[str] = None) -> Artifact:
+        """PRD 산출물(또는 파일 경로)로 HTML을 생성하여 저장하고, 내용을 포함한 산출물을 반환합니다.
+
+        html_url(수정 시나리오)이 있으면 기존 HTML에 수정 목록만 적용하고, 실패할 때만 전체를 다시 생성합니다.
+        existing_html이 주어지면 html_url을 다시 내려받지 않고 그 내용을 사용합니다.
+        """
+        prd_content = self._read_prd(prd)
+        patched = self._patch_existing_html(prd_content, html_url, existing_html) if html_url else None
+        if patched is not None:
+            return self.artifact_store.put('html', patched, owner=owner)
         
-        output_file = f"{self.output_dir}/index.html"
+        with observe_stage('html_generation', prd_chars=len(prd_content)) as span:
+            html_structure = self._html_requirements(prd, prd_content)
+            span.set_attribute('ir', 'ir' in html_structure)
+            html_content = self._generate_html_content(html_structure)
+            span.set_attribute('html_chars', len(html_content))
         
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(html_content)
+        return self.artifact_store.put('html', html_content, owner=owner)
+    
+    def generate_html_stream(self, prd: Union[Artifact, str], writer: ArtifactWriter,
+                             html_url: Optional[str] = None,
+                             existing_html: Optional[str] = None) -> Iterator[str]:
+        """PRD로 HTML을 스트리밍 생성하며, 받은 조각을 바로 writer에 이어 씁니다.
+
+        수정 시나리오에서 패치가 성공하면 완성된 문서를 한 조각으로 보냅니다.
+        """
+        prd_content = self._read_prd(prd)
+        patched = self._patch_existing_html(prd_content, html_url, existing_html) if html_url else None
+        if patched is not None:
+            writer.write(patched)
+            yield patched
+            return
         
-        return output_file
+        started = time.perf_counter()
+        # 제너레이터 안이므로 현재 span으로 설정하지 않고 직접 끝냄
+        span = tracer.start_span('html_generation', prd_chars=len(prd_content), stream=True)
+        html_chars = 0
+        try:
+            html_structure = self._html_requirements(prd, prd_content)
+            span.set_attribute('ir', 'ir' in html_structure)
+            prompt = self._build_html_prompt(html_structure)
+            
+            for chunk in self._stream_bedrock_for_html(prompt, html_structure):
+                writer.write(chunk)
+                html_chars += len(chunk)
+                yield chunk
+            # 스트리밍은 끝까지 받은 경우만 기록 (중간에 끊긴 요청은 제외)
+            stage_duration.observe(time.perf_counter() - started, stage='html_generation')
+        finally:
+            span.set_attribute('html_chars', html_chars)
+            span.end()
+    
+    def _patch_existing_html(self, prd_content: str, html_url: str,
+                             existing_html: Optional[str] = None) -> Optional[str]:
+        """기존 HTML을 가져와 모델이 만든 수정 목록을 적용합니다. (실패하면 None, 전체 재생성으로 전환)
+
+        existing_html은 워크플로우가 이미 가져온 기존 HTML입니다. (빈 문자열이면 가져오기에 실패한 것)
+        """
+        if not HTML_PATCH_ENABLED:
+            return None
+        with observe_stage('html_patch', url=html_url) as span:
+            try:
+                fetched = fetch_html(html_url) if existing_html is None else existing_html
+                if not fetched:
+                    raise HTMLPatchError("기존 HTML을 가져오지 못했습니다")
+                # 서버가 넣은 런타임은 모델에 보내지 않고, 패치 후 현재 버전으로 다시 넣음
+                original, config = strip_runtime(fetched)
+                span.set_attributes(original_chars=len(fetched), runtime_version=runtime_version(fetched))
+                if len(original) > HTML_PATCH_MAX_CHARS:
+                    raise HTMLPatchError(f"기존 HTML이 너무 깁니다 ({len(original)} > {HTML_PATCH_MAX_CHARS} 글자)")
+                response = self.router.generate(
+                    'html_patch',
+                    messages=user_message(self._build_patch_prompt(prd_content, original)),
+                    max_tokens=HTML_PATCH_MAX_TOKENS,
+                    temperature=float(os.getenv("MODEL_TEMPERATURE", "0"))
+                )
+                edits = parse_edits(response)
+                patched = apply_edits(original, edits)
+                if config is not None:
+                    defaults = runtime_config('', self.llm_api_url, self.llm_stream_url)
+                    patched = inject_runtime(patched, {**defaults, **config})
+            except Exception as e:
+                print(f"⚠️ HTML 패치 실패, 전체 재생성으로 전환: {e}")
+                span.set_attribute('fallback', type(e).__name__)
+                llm_fallbacks.inc(call_class='html', kind='patch')
+                return None
+            span.set_attributes(edits=len(edits), html_chars=len(patched))
+        print(f"✂️ 기존 HTML에 수정 {len(edits)}개 적용 ({len(original)} → {len(patched)} 글자)")
+        return patched
+    
+    def _build_patch_prompt(self, prd_content: str, original: str) -> str:
+        """기존 HTML 수정 목록 프롬프트를 만듭니다."""
+        return f"""당신은 기존 HTML 문서를 최소한으로 수정하는 전문가입니다.
+아래 PRD의 요구사항을 반영하도록 기존 HTML을 고치되, 문서 전체를 다시 쓰지 말고 바꿀 부분만 수정 목록으로 답하세요.
+
+**PRD (수정 요구사항):**
+{prd_content}
+
+**기존 HTML:**
+```html
+{original}
+```
+
+**응답 형식 (JSON만 출력, 다른 설명 금지):**
+{{"edits": [
+  {{"op": "replace", "find": "기존 HTML에서 그대로 복사한 부분", "content": "바꿀 내용"}},
+  {{"op": "insert_after", "find": "기준이 되는 기존 부분", "content": "뒤에 넣을 내용"}},
+  {{"op": "insert_before", "find": "기준이 되는 기존 부분", "content": "앞에 넣을 내용"}},
+  {{"op": "delete", "find": "지울 기존 부분"}}
+]}}
+
+**규칙:**
+1. find는 기존 HTML에서 글자 그대로 복사하고, 문서 안에서 한 곳만 가리키도록 충분히 길게 잡으세요.
+2. 수정은 위에서부터 순서대로 적용됩니다. 앞의 수정 결과를 다시 find로 가리키지 마세요.
+3. content는 여는 태그와 닫는 태그의 짝이 맞는 완전한 조각이어야 합니다.
+4. 스타일 변경은 기존 <style> 안의 규칙을 replace하거나 새 규칙을 insert_after로 추가하세요.
+5. 요구사항이 문서 대부분을 바꿔야 하는 수준이면 {{"regenerate": true, "reason": "이유"}}만 답하세요.
+6. {', '.join(f'id="{hook}"' for hook in HOOK_IDS)}와 {FEATURE_ATTRIBUTE} 속성은 서버가 넣는 LLM 호출 런타임의 연결 지점이므로 유지하세요.
+"""
+    
+    def _read_prd(self, prd: Union[Artifact, str]) -> str:
+        """PRD 내용을 가져옵니다. (워크플로우에서는 메모리의 산출물을 그대로 사용)"""
+        if isinstance(prd, Artifact):
+            return prd.read()
+        artifact = self.artifact_store.get_by_path(prd, 'prd')
+        if artifact is None:
+            raise FileNotFoundError(f"PRD 파일을 찾을 수 없습니다: {prd}")
+        return artifact.read()
+    
+    def _html_requirements(self, prd: Union[Artifact, str], prd_content: str) -> Dict[str, Any]:
+        """구조화 PRD가 있으면 그대로 쓰고, 없으면 마크다운 PRD에서 HTML 요구사항을 추출합니다."""
+        prd_ir = self._read_prd_ir(prd)
+        if prd_ir is None:
+            return self._extract_html_requirements(prd_content)
+        css_guide = prd_ir.style.css_guide
+        return {
+            "title": prd_ir.title,
+            "features": [f"{feature.name}: {feature.description}" if feature.description else feature.name
+                         for feature in prd_ir.prioritized_features()],
+            "prd_content": prd_content,
+            "css_guide": css_guide,
+            "has_image_css": bool(css_guide),
+            "ir": prd_ir
+        }
+    
+    def _read_prd_ir(self, prd: Union[Artifact, str]) -> Optional[PRDIR]:
+        """PRD와 함께 만든 구조화 PRD를 읽습니다. (없거나 스키마 버전이 다르면 None)"""
+        if not isinstance(prd, Artifact) or prd.ir is None:
+            return None
+        try:
+            return load_prd_ir(prd.ir.read())
+        except (OSError, PRDIRError) as e:
+            print(f"⚠️ 구조화 PRD를 사용할 수 없어 마크다운에서 추출: {e}")
+            return None
     
-    def _read_prd_file(self, file_path: str) -> str:
-        """PRD 파일을 읽습니다."""
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+    def _describe_ir(self, prd_ir: PRDIR) -> str:
+        """HTML 프롬프트에 넣을 구조화 PRD 요약 (PRD 전문 대신 사용)"""
+        lines = []
+        if prd_ir.summary:
+            lines.append(f"요약: {prd_ir.summary}")
+        lines.append("주요 기능 (우선순위 순, must부터 눈에 띄게 배치):")
+        for feature in prd_ir.prioritized_features():
+            description = f": {feature.description}" if feature.description else ''
+            lines.append(f"- [{feature.priority}] {feature.name}{description}")
+        if prd_ir.style.tokens:
+            lines.append("디자인 토큰 (CSS 변수로 정의해 사용):")
+            lines.extend(f"- --{name}: {value}" for name, value in prd_ir.style.tokens.items())
+        return '\n        '.join(lines)
     
     def _extract_html_requirements(self, prd_content: str) -> Dict[str, Any]:
         """PRD에서 HTML 요구사항을 추출합니다."""
@@ -96,22 +249,55 @@ class HTMLAgent:
     
     def _generate_html_content(self, structure: Dict[str, Any]) -> str:
         """요약 내용을 분석하여 맞춤형 HTML을 생성합니다."""
+        return self._call_bedrock_for_html(self._build_html_prompt(structure), structure)
+    
+    def _build_html_prompt(self, structure: Dict[str, Any]) -> str:
+        """HTML 생성 프롬프트를 만듭니다."""
         
         # 이미지 기반 CSS가 있는 경우와 없는 경우 구분
         if structure.get('has_image_css'):
-            return self._generate_html_with_predefined_css(structure)
+            return self._build_predefined_css_prompt(structure)
         else:
-            return self._generate_html_with_auto_css(structure)
+            return self._build_auto_css_prompt(structure)
+    
+    def _runtime_config(self, structure: Dict[str, Any]) -> Dict[str, Any]:
+        """생성 HTML에 넣을 런타임 설정 (구조화 PRD의 데이터 패널 포함)"""
+        prd_ir = structure.get('ir')
+        panels = [{"id": panel.id, "prompt": panel.prompt} for panel in prd_ir.data_panels] if prd_ir else []
+        return runtime_config(structure['title'], self.llm_api_url, self.llm_stream_url, panels)
+    
+    def _hook_contract(self, structure: Dict[str, Any]) -> str:
+        """모델이 마크업에 배치할 동적 데이터 연결 지점 (LLM 호출 런타임은 생성 후 서버가 넣음)"""
+        lines = [
+            "**동적 데이터 연결 지점 (LLM 호출 JavaScript는 생성 후 서버가 자동으로 넣습니다):**",
+            '- id="dynamicContent": 대시보드, 검색 결과, 기능 화면이 LLM으로 채워지는 주 영역 (비워 둘 것)',
+            '- id="searchInput" 입력창과 id="searchButton" 버튼: 검색 (onclick 없이 두면 런타임이 연결)',
+            f'- {FEATURE_ATTRIBUTE}="기능 이름": 클릭하면 그 기능 화면을 dynamicContent에 불러오는 요소 (주요 기능마다 하나)'
+        ]
+        prd_ir = structure.get('ir')
+        for panel in (prd_ir.data_panels if prd_ir else []):
+            lines.append(f'- id="{panel.id}": {panel.title} 영역 (비워 둘 것, 페이지가 열리면 런타임이 채움)')
+        lines.append("- callLLM, searchData, loadFeatureData, window.onload 같은 LLM 호출/데이터 로드 코드는 작성하지 마세요. "
+                     "화면 전용 상호작용(탭 전환 등)이 필요할 때만 짧은 스크립트를 작성하세요.")
+        return '\n        '.join(lines)
+    
+    def _features_block(self, structure: Dict[str, Any]) -> str:
+        """HTML 프롬프트의 요구사항 부분 (구조화 PRD가 없으면 추출한 기능 목록과 PRD 전문)"""
+        if structure.get('ir') is not None:
+            return self._describe_ir(structure['ir'])
+        block = f"주요 기능: {', '.join(structure['features'])}"
+        if not structure.get('has_image_css'):
+            block += f"\n        \n        PRD 전체 내용:\n        {structure['prd_content']}"
+        return block
     
-    def _generate_html_with_predefined_css(self, structure: Dict[str, Any]) -> str:
-        """PRD의 이미지 기반 CSS를 사용하여 HTML을 생성합니다."""
+    def _build_predefined_css_prompt(self, structure: Dict[str, Any]) -> str:
+        """PRD의 이미지 기반 CSS를 사용하는 HTML 생성 프롬프트를 만듭니다."""
         print("🎨 이미지 기반 CSS로 HTML 생성")
-        
         design_prompt = f"""
         다음 PRD 내용과 이미지 기반 CSS 가이드를 사용하여 웹 애플리케이션을 생성해주세요.
 
         프로젝트: {structure['title']}
-        주요 기능: {', '.join(structure['features'])}
+        {self._features_block(structure)}
         
         **중요 지시사항:**
         1. 아래 CSS 가이드만 사용하고 다른 CSS 스타일은 절대 생성하지 마세요
@@ -121,129 +307,23 @@ class HTMLAgent:
         **이미지 기반 CSS 가이드:**
         {structure['css_guide']}
         
-        **필수 JavaScript 기능:**
-        ```javascript
-        async function callLLM(prompt) {{
-            try {{
-                const response = await fetch('{self.llm_api_url}', {{
-                    method: 'POST',
-                    headers: {{ 
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    }},
-                    body: JSON.stringify({{ prompt: prompt }})
-                }});
-                
-                if (!response.ok) {{
-                    throw new Error(`HTTP ${{response.status}}: ${{response.statusText}}`);
-                }}
-                
-                const data = await response.json();
-                return data.response || data.content || '데이터를 생성할 수 없습니다.';
-            }} catch (error) {{
-                console.error('LLM API 호출 오류:', error);
-                return `<div style="color: red; padding: 10px; border: 1px solid red; border-radius: 5px;">오류: ${{error.message}}</div>`;
-            }}
-        }}
-
-        async function searchData() {{
-            const searchInput = document.getElementById('searchInput');
-            const searchButton = document.getElementById('searchButton');
-            
-            if (!searchInput) return;
-            
-            const query = searchInput.value?.trim();
-            if (!query) {{
-                alert('검색어를 입력하세요.');
-                return;
-            }}
-            
-            const contentArea = document.getElementById('dynamicContent');
-            if (!contentArea) return;
-            
-            if (searchButton) {{
-                searchButton.disabled = true;
-                searchButton.textContent = '검색 중...';
-            }}
-            
-            contentArea.innerHTML = '<div style="text-align: center; padding: 20px; color: #666;">🔍 검색 중...</div>';
-            
-            const searchPrompt = `"{structure['title']}" 프로젝트의 "${{query}}" 검색 결과를 생성해주세요. HTML만 반환하고 추가 설명은 제외해주세요.`;
-            
-            try {{
-                const result = await callLLM(searchPrompt);
-                contentArea.innerHTML = result;
-            }} catch (error) {{
-                contentArea.innerHTML = `<div style="color: red; padding: 20px; text-align: center;">검색 실패: ${{error.message}}</div>`;
-            }} finally {{
-                if (searchButton) {{
-                    searchButton.disabled = false;
-                    searchButton.textContent = '검색';
-                }}
-            }}
-        }}
-
-        function setupSearchInput() {{
-            const searchInput = document.getElementById('searchInput');
-            if (searchInput) {{
-                searchInput.addEventListener('keypress', function(e) {{
-                    if (e.key === 'Enter') {{
-                        e.preventDefault();
-                        searchData();
-                    }}
-                }});
-            }}
-        }}
-
-        async function loadFeatureData(index, name) {{
-            const contentArea = document.getElementById('dynamicContent');
-            if (!contentArea) return;
-            
-            contentArea.innerHTML = '<div style="text-align: center; padding: 20px;">⚙️ 데이터 로딩 중...</div>';
-            
-            const featurePrompt = `"${{name}}" 기능에 대한 관리 화면을 HTML로 생성해주세요. HTML만 반환하고 추가 설명은 제외해주세요.`;
-            
-            const result = await callLLM(featurePrompt);
-            contentArea.innerHTML = result;
-        }}
-
-        window.onload = async function() {{
-            setupSearchInput();
-            
-            const contentArea = document.getElementById('dynamicContent');
-            if (!contentArea) return;
-            
-            contentArea.innerHTML = '<div style="text-align: center; padding: 20px;">🚀 대시보드 로딩 중...</div>';
-            
-            const dashboardPrompt = `프로젝트 "{structure['title']}"에 적합한 대시보드를 HTML로 생성해주세요. HTML만 반환하고 추가 설명은 제외해주세요.`;
-            
-            const result = await callLLM(dashboardPrompt);
-            contentArea.innerHTML = result;
-        }}
-        ```
+        {self._hook_contract(structure)}
 
         **출력**: 완전한 HTML 문서 (<!DOCTYPE html>부터 </html>까지)
         
         위의 CSS 가이드를 정확히 따라 구현하고, 다른 CSS 스타일은 추가하지 마세요.
         """
         
-        return self._call_bedrock_for_html(design_prompt, structure)
+        return design_prompt
     
-    def _generate_html_with_auto_css(self, structure: Dict[str, Any]) -> str:
-        """자동 CSS 생성으로 HTML을 생성합니다."""
+    def _build_auto_css_prompt(self, structure: Dict[str, Any]) -> str:
+        """자동 CSS 생성용 HTML 프롬프트를 만듭니다."""
         print("🎨 자동 CSS로 HTML 생성")
-    def _generate_html_with_auto_css(self, structure: Dict[str, Any]) -> str:
-        """자동 CSS 생성으로 HTML을 생성합니다."""
-        print("🎨 자동 CSS로 HTML 생성")
-        
         design_prompt = f"""
         다음 PRD 내용을 깊이 분석하여 사용자 요구사항에 완벽히 맞는 웹 애플리케이션을 생성해주세요.
 
         프로젝트: {structure['title']}
-        주요 기능: {', '.join(structure['features'])}
-        
-        PRD 전체 내용:
-        {structure['prd_content']}
+        {self._features_block(structure)}
         
         **요구사항 분석 및 맞춤 설계:**
         1. **도메인 분석**: PRD 내용에서 비즈니스 도메인을 파악하고 해당 업종에 특화된 UI/UX 설계
@@ -251,162 +331,120 @@ class HTMLAgent:
         3. **적합한 디자인 선택**: 업종별 색상 팔레트, 적절한 레이아웃
         4. **현대적 웹 표준**: 반응형 디자인, 접근성 고려
 
-        **필수 JavaScript 기능:**
-        ```javascript
-        async function callLLM(prompt) {{
-            try {{
-                const response = await fetch('{self.llm_api_url}', {{
-                    method: 'POST',
-                    headers: {{ 
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    }},
-                    body: JSON.stringify({{ prompt: prompt }})
-                }});
-                
-                if (!response.ok) {{
-                    throw new Error(`HTTP ${{response.status}}: ${{response.statusText}}`);
-                }}
-                
-                const data = await response.json();
-                return data.response || data.content || '데이터를 생성할 수 없습니다.';
-            }} catch (error) {{
-                console.error('LLM API 호출 오류:', error);
-                return `<div style="color: red; padding: 10px; border: 1px solid red; border-radius: 5px;">오류: ${{error.message}}</div>`;
-            }}
-        }}
-
-        async function searchData() {{
-            const searchInput = document.getElementById('searchInput');
-            const searchButton = document.getElementById('searchButton');
-            
-            if (!searchInput) return;
-            
-            const query = searchInput.value?.trim();
-            if (!query) {{
-                alert('검색어를 입력하세요.');
-                return;
-            }}
-            
-            const contentArea = document.getElementById('dynamicContent');
-            if (!contentArea) return;
-            
-            if (searchButton) {{
-                searchButton.disabled = true;
-                searchButton.textContent = '검색 중...';
-            }}
-            
-            contentArea.innerHTML = '<div style="text-align: center; padding: 20px; color: #666;">🔍 검색 중...</div>';
-            
-            const searchPrompt = `"{structure['title']}" 프로젝트의 "${{query}}" 검색 결과를 생성해주세요. HTML만 반환하고 추가 설명은 제외해주세요.`;
-            
-            try {{
-                const result = await callLLM(searchPrompt);
-                contentArea.innerHTML = result;
-            }} catch (error) {{
-                contentArea.innerHTML = `<div style="color: red; padding: 20px; text-align: center;">검색 실패: ${{error.message}}</div>`;
-            }} finally {{
-                if (searchButton) {{
-                    searchButton.disabled = false;
-                    searchButton.textContent = '검색';
-                }}
-            }}
-        }}
-
-        function setupSearchInput() {{
-            const searchInput = document.getElementById('searchInput');
-            if (searchInput) {{
-                searchInput.addEventListener('keypress', function(e) {{
-                    if (e.key === 'Enter') {{
-                        e.preventDefault();
-                        searchData();
-                    }}
-                }});
-            }}
-        }}
-
-        async function loadFeatureData(index, name) {{
-            const contentArea = document.getElementById('dynamicContent');
-            if (!contentArea) return;
-            
-            contentArea.innerHTML = '<div style="text-align: center; padding: 20px;">⚙️ 데이터 로딩 중...</div>';
-            
-            const featurePrompt = `"${{name}}" 기능에 대한 관리 화면을 HTML로 생성해주세요. HTML만 반환하고 추가 설명은 제외해주세요.`;
-            
-            const result = await callLLM(featurePrompt);
-            contentArea.innerHTML = result;
-        }}
-
-        window.onload = async function() {{
-            setupSearchInput();
-            
-            const contentArea = document.getElementById('dynamicContent');
-            if (!contentArea) return;
-            
-            contentArea.innerHTML = '<div style="text-align: center; padding: 20px;">🚀 대시보드 로딩 중...</div>';
-            
-            const dashboardPrompt = `프로젝트 "{structure['title']}"에 적합한 대시보드를 HTML로 생성해주세요. HTML만 반환하고 추가 설명은 제외해주세요.`;
-            
-            const result = await callLLM(dashboardPrompt);
-            contentArea.innerHTML = result;
-        }}
-        ```
+        {self._hook_contract(structure)}
 
         **출력**: 완전한 HTML 문서 (<!DOCTYPE html>부터 </html>까지)
         """
         
-        return self._call_bedrock_for_html(design_prompt, structure)
+        return design_prompt
+    
+    def _html_request(self, prompt: str) -> Dict[str, Any]:
+        """HTML 생성용 LLM 호출 인자를 만듭니다."""
+        return {
+            "messages": user_message(prompt),
+            "max_tokens": 8000,
+            "temperature": float(os.getenv("MODEL_TEMPERATURE", "0"))
+        }
     
     def _call_bedrock_for_html(self, prompt: str, structure: Dict[str, Any]) -> str:
         """Bedrock API를 호출하여 HTML을 생성합니다."""
         try:
-            response = self.bedrock_client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 8000,
-                    "temperature": float(os.getenv("MODEL_TEMPERATURE", "0")),
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
-                })
-            )
-            
-            response_body = json.loads(response['body'].read())
-            html_content = response_body['content'][0]['text']
+            html_content = self.router.generate('html', **self._html_request(prompt))
             
             # HTML 문서 형식 확인
             if not html_content.strip().startswith('<!DOCTYPE html>'):
-                html_content = f"""<!DOCTYPE html>
+                header, footer = self._document_wrapper(structure['title'])
+                html_content = f"{header}{html_content}{footer}"
+            
+            return inject_runtime(html_content, self._runtime_config(structure))
+            
+        except Exception as e:
+            print(f"HTML 생성 오류: {e}")
+            llm_fallbacks.inc(call_class='html', kind='content')
+            return self._build_error_html(structure['title'], e)
+    
+    def _stream_bedrock_for_html(self, prompt: str, structure: Dict[str, Any]) -> Iterator[str]:
+        """Bedrock 스트리밍 API로 HTML을 조각 단위로 생성합니다."""
+        doctype = '<!DOCTYPE html>'
+        header, footer = self._document_wrapper(structure['title'])
+        head = ""
+        # 런타임을 </body> 앞에 넣을 수 있도록 문서 끝부분은 마지막까지 보내지 않고 보류
+        tail = ""
+        started = False
+        wrapped = False
+        # 이미 보낸 부분에 모델이 쓴 런타임이 있었는지 (끝부분만 보고는 알 수 없음)
+        scanner = RuntimeScanner()
+        
+        try:
+            for text in self.router.generate_stream('html', **self._html_request(prompt)):
+                if started:
+                    tail += text
+                    if len(tail) > _STREAM_TAIL_CHARS:
+                        yield scanner.feed(tail[:-_STREAM_TAIL_CHARS])
+                        tail = tail[-_STREAM_TAIL_CHARS:]
+                    continue
+                
+                # DOCTYPE 여부를 판단할 수 있을 만큼 문서 앞부분을 모음
+                head += text
+                if len(head.lstrip()) < len(doctype):
+                    continue
+                wrapped = not head.strip().startswith(doctype)
+                started = True
+                yield scanner.feed(f"{header}{head}" if wrapped else head)
+            
+            if not started:
+                wrapped = not head.strip().startswith(doctype)
+                started = True
+                tail = f"{header}{head}" if wrapped else head
+            
+        except Exception as e:
+            print(f"HTML 스트리밍 생성 오류: {e}")
+            if started:
+                # 이미 일부를 보냈으므로 잘린 문서를 확정하지 않고 작성기를 중단시킴
+                llm_fallbacks.inc(call_class='html', kind='aborted')
+                raise
+            llm_fallbacks.inc(call_class='html', kind='content')
+            yield self._build_error_html(structure['title'], e)
+            return
+        
+        if wrapped:
+            tail += footer
+        if scanner.found:
+            # 보낸 부분의 런타임은 지울 수 없으므로 두 번째 런타임을 넣지 않음
+            print("⚠️ 생성된 HTML에 이미 런타임이 있어 주입하지 않습니다.")
+            yield tail
+            return
+        yield inject_runtime(tail, self._runtime_config(structure))
+    
+    def _document_wrapper(self, title: str):
+        """HTML 조각을 완전한 문서로 감쌀 머리말/꼬리말을 반환합니다."""
+        header = f"""<!DOCTYPE html>
 <html lang="ko">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{structure['title']}</title>
+    <title>{title}</title>
 </head>
 <body>
-{html_content}
+"""
+        footer = """
 </body>
 </html>"""
-            
-            return html_content
-            
-        except Exception as e:
-            print(f"HTML 생성 오류: {e}")
-            return f"""<!DOCTYPE html>
+        return header, footer
+    
+    def _build_error_html(self, title: str, error: Exception) -> str:
+        """HTML 생성 실패 시 표시할 오류 페이지를 만듭니다."""
+        return f"""<!DOCTYPE html>
 <html lang="ko">
 <head>
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>{structure['title']} - 오류</title>
+    <title>{title} - 오류</title>
 </head>
 <body>
     <h1>HTML 생성 오류</h1>
-    <p>오류: {e}</p>
-    <p>프로젝트: {structure['title']}</p>
+    <p>오류: {error}</p>
+    <p>프로젝트: {title}</p>
     <script>
         async function callLLM(prompt) {{ return '오류 발생'; }}
         async function searchData() {{ }}
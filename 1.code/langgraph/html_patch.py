@@ -0,0 +1,149 @@
+import json
+import os
+import re
+from collections import Counter
+from html.parser import HTMLParser
+from typing import Any, Dict, List
+import requests
+from dotenv import load_dotenv
+from metrics import observe_stage
+
+# .env 파일 로드
+load_dotenv()
+
+HTML_PATCH_ENABLED = os.getenv('HTML_PATCH_ENABLED', 'true').lower() == 'true'
+# 수정 목록 응답의 최대 출력 토큰 (전체 재생성은 8000)
+HTML_PATCH_MAX_TOKENS = int(os.getenv('HTML_PATCH_MAX_TOKENS', '2000'))
+# 패치를 시도할 기존 HTML의 최대 길이 (글자, 넘으면 바로 전체 재생성)
+HTML_PATCH_MAX_CHARS = int(os.getenv('HTML_PATCH_MAX_CHARS', '60000'))
+# 한 번에 적용할 수 있는 최대 수정 개수 (넘으면 전체 재생성이 낫다고 판단)
+HTML_PATCH_MAX_EDITS = int(os.getenv('HTML_PATCH_MAX_EDITS', '30'))
+# 기존 HTML 다운로드 제한 시간 (초)
+HTML_FETCH_TIMEOUT = float(os.getenv('HTML_FETCH_TIMEOUT', '30'))
+
+EDIT_OPS = ('replace', 'insert_before', 'insert_after', 'delete')
+# 닫는 태그가 없는 요소 (태그 짝 검사에서 제외)
+_VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'param',
+              'source', 'track', 'wbr'}
+
+
+class HTMLPatchError(Exception):
+    """수정 목록을 해석하거나 기존 HTML에 안전하게 적용할 수 없는 경우"""
+
+
+def fetch_html(url: str) -> str:
+    """수정할 기존 HTML 문서를 가져옵니다."""
+    with observe_stage('html_fetch', url=url) as span:
+        response = requests.get(url, timeout=HTML_FETCH_TIMEOUT)
+        response.raise_for_status()
+        span.set_attribute('bytes', len(response.content))
+    return response.text
+
+
+def parse_edits(text: str) -> List[Dict[str, str]]:
+    """모델 응답에서 {"edits": [...]} JSON을 꺼내 형식을 검사합니다.
+
+    모델이 패치보다 전체 재생성이 낫다고 답하면({"regenerate": true}) HTMLPatchError를 냅니다.
+    """
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end <= start:
+        raise HTMLPatchError("응답에 JSON 객체가 없습니다")
+    try:
+        payload = json.loads(text[start:end + 1])
+    except json.JSONDecodeError as e:
+        raise HTMLPatchError(f"수정 목록 JSON 해석 실패: {e}")
+    if not isinstance(payload, dict):
+        raise HTMLPatchError("수정 목록은 JSON 객체여야 합니다")
+    if payload.get('regenerate'):
+        raise HTMLPatchError(f"모델이 전체 재생성을 요청했습니다: {payload.get('reason', '')}")
+    edits = payload.get('edits')
+    if not isinstance(edits, list) or not edits:
+        raise HTMLPatchError("적용할 수정이 없습니다")
+    if len(edits) > HTML_PATCH_MAX_EDITS:
+        raise HTMLPatchError(f"수정이 너무 많습니다 ({len(edits)} > {HTML_PATCH_MAX_EDITS})")
+    parsed = []
+    for index, edit in enumerate(edits):
+        if not isinstance(edit, dict) or edit.get('op') not in EDIT_OPS:
+            raise HTMLPatchError(f"{index}번 수정의 op가 올바르지 않습니다: {edit!r:.100}")
+        find = edit.get('find')
+        content = edit.get('content', '')
+        if not isinstance(find, str) or not find.strip():
+            raise HTMLPatchError(f"{index}번 수정에 find가 없습니다")
+        if not isinstance(content, str) or (edit['op'] != 'delete' and not content):
+            raise HTMLPatchError(f"{index}번 수정에 content가 없습니다")
+        parsed.append({"op": edit['op'], "find": find, "content": content})
+    return parsed
+
+
+def apply_edits(html: str, edits: List[Dict[str, str]]) -> str:
+    """수정을 순서대로 적용하고, 결과 문서의 구조가 깨지지 않았는지 검사합니다.
+
+    각 find는 (적용 시점의 문서에서) 정확히 한 곳과 일치해야 합니다.
+    그대로 일치하는 곳이 없으면 공백 차이만 무시하고 다시 찾습니다.
+    """
+    patched = html
+    for index, edit in enumerate(edits):
+        start, end = _locate(patched, edit['find'], index)
+        matched = patched[start:end]
+        if edit['op'] == 'replace':
+            replacement = edit['content']
+        elif edit['op'] == 'insert_before':
+            replacement = edit['content'] + matched
+        elif edit['op'] == 'insert_after':
+            replacement = matched + edit['content']
+        else:
+            replacement = ''
+        patched = patched[:start] + replacement + patched[end:]
+    validate_patched(html, patched)
+    return patched
+
+
+def validate_patched(original: str, patched: str):
+    """패치 결과가 완전한 문서이고, 원본에 없던 태그 짝 불일치가 생기지 않았는지 확인합니다."""
+    for marker in ('<!doctype html', '</html>', '</body>'):
+        if marker in original.lower() and marker not in patched.lower():
+            raise HTMLPatchError(f"패치 후 문서에서 {marker}가 사라졌습니다")
+    before, after = _tag_balance(original), _tag_balance(patched)
+    changed = sorted(tag for tag in set(before) | set(after) if before.get(tag, 0) != after.get(tag, 0))
+    if changed:
+        raise HTMLPatchError(f"패치 후 여닫는 태그 짝이 맞지 않습니다: {', '.join(changed)}")
+
+
+def _locate(html: str, find: str, index: int):
+    count = html.count(find)
+    if count == 1:
+        start = html.index(find)
+        return start, start + len(find)
+    if count > 1:
+        raise HTMLPatchError(f"{index}번 수정의 find가 {count}곳과 일치합니다")
+    # 들여쓰기/줄바꿈만 다른 경우
+    pattern = r'\s+'.join(re.escape(part) for part in find.split())
+    matches = list(re.finditer(pattern, html))
+    if len(matches) != 1:
+        raise HTMLPatchError(f"{index}번 수정의 find가 {len(matches)}곳과 일치합니다")
+    return matches[0].span()
+
+
+class _TagBalance(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.balance: Counter = Counter()
+
+    def handle_starttag(self, tag: str, attrs: List[Any]):
+        if tag not in _VOID_TAGS:
+            self.balance[tag] += 1
+
+    def handle_endtag(self, tag: str):
+        if tag not in _VOID_TAGS:
+            self.balance[tag] -= 1
+
+    def handle_startendtag(self, tag: str, attrs: List[Any]):
+        pass
+
+
+def _tag_balance(html: str) -> Dict[str, int]:
+    """태그별 (여는 수 - 닫는 수). 원본 자체의 불균형은 원본과 비교해 상쇄합니다."""
+    parser = _TagBalance()
+    parser.feed(html)
+    parser.close()
+    return {tag: count for tag, count in parser.balance.items() if count}
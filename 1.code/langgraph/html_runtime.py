@@ -0,0 +1,262 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# 생성 HTML에 넣는 LLM 호출 런타임 버전 (스크립트를 바꾸면 올림)
+RUNTIME_VERSION = 1
+
+# 모델이 마크업에 배치해야 하는 연결 지점 (런타임이 id/속성으로 찾아 동작을 연결)
+HOOK_IDS = ('dynamicContent', 'searchInput', 'searchButton')
+FEATURE_ATTRIBUTE = 'data-feature'
+
+_BLOCK = re.compile(r'<!-- llm-runtime:start v(\d+) -->.*?<!-- llm-runtime:end -->\s*', re.DOTALL)
+_BLOCK_START = re.compile(r'<!-- llm-runtime:start v\d+ -->')
+_CONFIG = re.compile(r'<script type="application/json" id="llm-runtime-config">(.*?)</script>', re.DOTALL)
+# 런타임 주입 전에 모델이 직접 작성하던 방식의 문서 (함수가 중복 정의되지 않도록 주입하지 않음)
+_LEGACY_RUNTIME = re.compile(r'function\s+callLLM\s*\(')
+
+_RUNTIME_JS = r"""const LLM_RUNTIME = JSON.parse(document.getElementById('llm-runtime-config').textContent);
+const LLM_HTML_ONLY = ' HTML만 반환하고 추가 설명은 제외해주세요.';
+
+async function callLLM(prompt, onChunk) {
+    // onChunk가 주어지면 스트리밍으로 받아 첫 토큰부터 화면에 그림
+    if (onChunk && window.ReadableStream && window.TextDecoder) {
+        try {
+            return await callLLMStream(prompt, onChunk);
+        } catch (error) {
+            console.warn('스트리밍 호출 실패, 일반 호출로 전환:', error);
+        }
+    }
+
+    try {
+        const response = await fetch(LLM_RUNTIME.llmUrl, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+            body: JSON.stringify({ prompt: prompt })
+        });
+
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+        }
+
+        const data = await response.json();
+        return data.response || data.content || '데이터를 생성할 수 없습니다.';
+    } catch (error) {
+        console.error('LLM API 호출 오류:', error);
+        return `<div style="color: red; padding: 10px; border: 1px solid red; border-radius: 5px;">오류: ${error.message}</div>`;
+    }
+}
+
+async function callLLMStream(prompt, onChunk) {
+    const response = await fetch(LLM_RUNTIME.llmStreamUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+            'Accept': 'text/event-stream'
+        },
+        body: JSON.stringify({ prompt: prompt })
+    });
+
+    if (!response.ok || !response.body) {
+        throw new Error(`HTTP ${response.status}: ${response.statusText}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let text = '';
+
+    while (true) {
+        const { done, value } = await reader.read();
+        if (done) break;
+
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split('\n\n');
+        buffer = events.pop();
+
+        for (const event of events) {
+            const dataLine = event.split('\n').find(line => line.startsWith('data: '));
+            if (!dataLine) continue;
+
+            const data = JSON.parse(dataLine.slice(6));
+            if (data.delta) {
+                text += data.delta;
+                onChunk(text);
+            }
+        }
+    }
+
+    return text || '데이터를 생성할 수 없습니다.';
+}
+
+function progressiveRenderer(element) {
+    // 토큰마다 다시 그리지 않고 프레임당 한 번만 갱신
+    let latest = '';
+    let scheduled = false;
+    return function(text) {
+        latest = text;
+        if (scheduled) return;
+        scheduled = true;
+        requestAnimationFrame(function() {
+            scheduled = false;
+            element.innerHTML = latest;
+        });
+    };
+}
+
+async function fillWithLLM(element, prompt, loadingHtml) {
+    element.innerHTML = `<div style="text-align: center; padding: 20px; color: #666;">${loadingHtml}</div>`;
+    const result = await callLLM(prompt + LLM_HTML_ONLY, progressiveRenderer(element));
+    element.innerHTML = result;
+}
+
+async function searchData() {
+    const searchInput = document.getElementById('searchInput');
+    const searchButton = document.getElementById('searchButton');
+    const contentArea = document.getElementById('dynamicContent');
+    if (!searchInput || !contentArea) return;
+
+    const query = searchInput.value?.trim();
+    if (!query) {
+        alert('검색어를 입력하세요.');
+        return;
+    }
+
+    if (searchButton) {
+        searchButton.disabled = true;
+        searchButton.dataset.label = searchButton.dataset.label || searchButton.textContent;
+        searchButton.textContent = '검색 중...';
+    }
+
+    try {
+        await fillWithLLM(contentArea, `"${LLM_RUNTIME.title}" 프로젝트의 "${query}" 검색 결과를 생성해주세요.`, '🔍 검색 중...');
+    } catch (error) {
+        contentArea.innerHTML = `<div style="color: red; padding: 20px; text-align: center;">검색 실패: ${error.message}</div>`;
+    } finally {
+        if (searchButton) {
+            searchButton.disabled = false;
+            searchButton.textContent = searchButton.dataset.label;
+        }
+    }
+}
+
+async function loadFeatureData(index, name) {
+    const contentArea = document.getElementById('dynamicContent');
+    if (!contentArea) return;
+    await fillWithLLM(contentArea, `"${name}" 기능에 대한 관리 화면을 HTML로 생성해주세요.`, '⚙️ 데이터 로딩 중...');
+}
+
+function setupHooks() {
+    // 마크업에 직접 연결한 핸들러(onclick)가 있으면 건드리지 않음
+    const searchInput = document.getElementById('searchInput');
+    if (searchInput) {
+        searchInput.addEventListener('keypress', function(e) {
+            if (e.key === 'Enter') {
+                e.preventDefault();
+                searchData();
+            }
+        });
+    }
+    const searchButton = document.getElementById('searchButton');
+    if (searchButton && !searchButton.hasAttribute('onclick')) {
+        searchButton.addEventListener('click', searchData);
+    }
+    document.querySelectorAll('[data-feature]').forEach(function(element, index) {
+        if (element.hasAttribute('onclick')) return;
+        element.addEventListener('click', function(e) {
+            e.preventDefault();
+            loadFeatureData(index, element.dataset.feature);
+        });
+    });
+}
+
+window.addEventListener('load', function() {
+    setupHooks();
+
+    (LLM_RUNTIME.panels || []).forEach(function(panel) {
+        const element = document.getElementById(panel.id);
+        if (element) fillWithLLM(element, panel.prompt, '⏳ 불러오는 중...');
+    });
+
+    const contentArea = document.getElementById('dynamicContent');
+    if (contentArea) {
+        fillWithLLM(contentArea, `프로젝트 "${LLM_RUNTIME.title}"에 적합한 대시보드를 HTML로 생성해주세요.`, '🚀 대시보드 로딩 중...');
+    }
+});"""
+
+
+def runtime_config(title: str, llm_url: str, llm_stream_url: str,
+                   panels: Optional[List[Dict[str, str]]] = None) -> Dict[str, Any]:
+    """런타임이 읽는 페이지별 설정 (제목, LLM 호출 주소, 데이터 패널)"""
+    return {"title": title, "llmUrl": llm_url, "llmStreamUrl": llm_stream_url, "panels": panels or []}
+
+
+def render_runtime(config: Dict[str, Any]) -> str:
+    """문서에 넣을 런타임 블록 (설정 JSON + 버전이 표시된 스크립트)"""
+    # </script>로 태그가 끝나지 않도록 이스케이프
+    config_json = json.dumps(config, ensure_ascii=False).replace('</', '<\\/')
+    return (
+        f"<!-- llm-runtime:start v{RUNTIME_VERSION} -->\n"
+        f'<script type="application/json" id="llm-runtime-config">{config_json}</script>\n'
+        f'<script id="llm-runtime" data-version="{RUNTIME_VERSION}">\n{_RUNTIME_JS}\n</script>\n'
+        "<!-- llm-runtime:end -->\n"
+    )
+
+
+def inject_runtime(html: str, config: Dict[str, Any]) -> str:
+    """런타임 블록을 </body> 앞에 넣습니다. 이미 있으면 현재 버전으로 교체합니다."""
+    html = _BLOCK.sub('', html)
+    if _LEGACY_RUNTIME.search(html):
+        return html
+    block = render_runtime(config)
+    index = html.lower().rfind('</body>')
+    if index < 0:
+        return html + block
+    return html[:index] + block + html[index:]
+
+
+class RuntimeScanner:
+    """스트리밍으로 이미 내보낸 문서 조각에 런타임(블록 또는 모델이 직접 작성한 callLLM)이 있었는지 기록합니다.
+
+    보낸 조각은 되돌릴 수 없으므로, 있었다면 끝부분에 런타임을 다시 넣지 않아야 합니다.
+    조각 경계에 걸친 표시도 찾도록 직전 조각의 끝부분을 이어서 검사합니다.
+    """
+
+    _CARRY_CHARS = 64
+
+    def __init__(self):
+        self.found = False
+        self._carry = ""
+
+    def feed(self, text: str) -> str:
+        """조각을 검사하고 그대로 반환합니다."""
+        if not self.found:
+            window = self._carry + text
+            if _BLOCK_START.search(window) or _LEGACY_RUNTIME.search(window):
+                self.found = True
+            self._carry = window[-self._CARRY_CHARS:]
+        return text
+
+
+def strip_runtime(html: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """런타임 블록을 떼어 낸 문서와 블록에 있던 설정을 반환합니다. (블록이 없으면 None, 설정을 읽을 수 없으면 {})"""
+    match = _BLOCK.search(html)
+    if match is None:
+        return html, None
+    config: Dict[str, Any] = {}
+    config_match = _CONFIG.search(match.group(0))
+    if config_match:
+        try:
+            config = json.loads(config_match.group(1).replace('<\\/', '</'))
+        except ValueError:
+            pass
+    return html[:match.start()] + html[match.end():], config
+
+
+def runtime_version(html: str) -> Optional[int]:
+    """문서에 들어 있는 런타임 버전 (없으면 None)"""
+    match = _BLOCK.search(html)
+    return int(match.group(1)) if match else None
@@ -0,0 +1,159 @@
+import base64
+import hashlib
+import io
+import math
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+import requests
+from dotenv import load_dotenv
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow가 없으면 크기 제한과 형식 확인만 하고 원본을 그대로 사용
+    Image = None
+
+# .env 파일 로드
+load_dotenv()
+
+# 다운로드할 이미지의 최대 크기 (바이트, 넘으면 중단)
+IMAGE_MAX_BYTES = int(os.getenv('IMAGE_MAX_BYTES', str(20 * 1024 * 1024)))
+# 비전 모델에 보낼 이미지의 긴 변 최대 픽셀 (Claude는 이보다 큰 이미지를 내부에서 줄여서 사용)
+IMAGE_MAX_EDGE = int(os.getenv('IMAGE_MAX_EDGE', '1568'))
+# 비전 모델에 보낼 이미지의 최대 픽셀 수 (약 1.15 메가픽셀)
+IMAGE_MAX_PIXELS = int(os.getenv('IMAGE_MAX_PIXELS', '1150000'))
+# 다시 압축할 때의 JPEG 품질
+IMAGE_JPEG_QUALITY = int(os.getenv('IMAGE_JPEG_QUALITY', '85'))
+# 다운로드 제한 시간 (초)
+IMAGE_DOWNLOAD_TIMEOUT = float(os.getenv('IMAGE_DOWNLOAD_TIMEOUT', '30'))
+
+_CHUNK_SIZE = 64 * 1024
+
+
+class ImageIngestError(Exception):
+    """이미지를 가져오거나 비전 모델 입력으로 바꿀 수 없는 경우"""
+
+
+@dataclass
+class EncodedImage:
+    """비전 모델에 보낼 base64 이미지와 크기 정보"""
+    data: str
+    media_type: str
+    source_bytes: int
+    payload_bytes: int
+    # 내려받은 원본 바이트의 SHA-256 (같은 이미지 판별용)
+    sha256: str = ''
+    size: Optional[Tuple[int, int]] = None
+    resized: bool = False
+    # 다음 조건부 요청에 쓸 응답 헤더 (ETag, Last-Modified)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+def fetch_image(url: str, max_bytes: int = IMAGE_MAX_BYTES, etag: Optional[str] = None,
+                last_modified: Optional[str] = None) -> Optional[EncodedImage]:
+    """이미지를 스트리밍으로 내려받아(최대 max_bytes) 형식을 확인하고, 줄인 뒤 base64로 인코딩합니다.
+
+    etag/last_modified를 주면 조건부 요청을 보내고, 이미지가 바뀌지 않았으면(304) None을 반환합니다.
+    """
+    headers: Dict[str, str] = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    downloaded = _download(url, max_bytes, headers)
+    if downloaded is None:
+        return None
+    data, validators = downloaded
+    media_type = sniff_media_type(data)
+    if media_type is None:
+        raise ImageIngestError("지원하지 않는 이미지 형식입니다 (PNG/JPEG/GIF/WebP만 가능)")
+    image = encode_image(data, media_type)
+    image.etag, image.last_modified = validators
+    return image
+
+
+def encode_image(data: bytes, media_type: str) -> EncodedImage:
+    """비전 모델이 실제로 사용하는 해상도로 줄이고 다시 압축한 뒤 base64로 인코딩합니다."""
+    payload, payload_type, size, resized = _downscale(data, media_type)
+    return EncodedImage(
+        data=base64.b64encode(payload).decode('ascii'),
+        media_type=payload_type,
+        source_bytes=len(data),
+        payload_bytes=len(payload),
+        sha256=hashlib.sha256(data).hexdigest(),
+        size=size,
+        resized=resized
+    )
+
+
+def sniff_media_type(data: bytes) -> Optional[str]:
+    """파일 앞부분(매직 바이트)으로 이미지 형식을 판별합니다. (서버의 content-type은 믿지 않음)"""
+    if data.startswith(b'\x89PNG\r\n\x1a\n'):
+        return 'image/png'
+    if data.startswith(b'\xff\xd8\xff'):
+        return 'image/jpeg'
+    if data.startswith((b'GIF87a', b'GIF89a')):
+        return 'image/gif'
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    return None
+
+
+def _download(url: str, max_bytes: int,
+              headers: Dict[str, str]) -> Optional[Tuple[bytes, Tuple[Optional[str], Optional[str]]]]:
+    with requests.get(url, stream=True, timeout=IMAGE_DOWNLOAD_TIMEOUT, headers=headers) as response:
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        length = response.headers.get('content-length')
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise ImageIngestError(f"이미지가 너무 큽니다 ({int(length)} > {max_bytes} 바이트)")
+        buffer = bytearray()
+        sniffed = False
+        for chunk in response.iter_content(_CHUNK_SIZE):
+            buffer.extend(chunk)
+            if len(buffer) > max_bytes:
+                raise ImageIngestError(f"이미지가 너무 큽니다 ({max_bytes} 바이트 초과)")
+            # 앞부분만으로 이미지가 아닌 응답(HTML 오류 페이지 등)을 걸러 끝까지 받지 않음
+            if not sniffed and len(buffer) >= 12:
+                if sniff_media_type(bytes(buffer[:12])) is None:
+                    raise ImageIngestError("이미지가 아닌 응답입니다")
+                sniffed = True
+        return bytes(buffer), (response.headers.get('etag'), response.headers.get('last-modified'))
+
+
+def _target_size(width: int, height: int) -> Tuple[int, int]:
+    scale = min(1.0, IMAGE_MAX_EDGE / max(width, height), math.sqrt(IMAGE_MAX_PIXELS / (width * height)))
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def _downscale(data: bytes, media_type: str) -> Tuple[bytes, str, Optional[Tuple[int, int]], bool]:
+    if Image is None:
+        return data, media_type, None, False
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            size = image.size
+            target = _target_size(*size)
+            # 애니메이션 GIF/WebP는 첫 프레임만 남게 되므로 그대로 보냄
+            if target == size or getattr(image, 'is_animated', False):
+                return data, media_type, size, False
+            # JPEG는 디코딩 단계에서 미리 줄여 메모리와 시간을 아낌
+            image.draft('RGB', target)
+            image.thumbnail(target, Image.LANCZOS)
+            output = io.BytesIO()
+            has_alpha = image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+            if has_alpha:
+                image.save(output, 'PNG', optimize=True)
+                payload_type = 'image/png'
+            else:
+                image.convert('RGB').save(output, 'JPEG', quality=IMAGE_JPEG_QUALITY, optimize=True)
+                payload_type = 'image/jpeg'
+            payload = output.getvalue()
+            if len(payload) >= len(data):
+                return data, media_type, size, False
+            return payload, payload_type, image.size, True
+    except Exception as e:
+        # 디코딩할 수 없는 이미지는 원본 그대로 보내고 판단은 모델에 맡김
+        print(f"이미지 축소 실패, 원본 사용: {e}")
+        return data, media_type, None, False
@@ -0,0 +1,193 @@
+import asyncio
+import functools
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 작업 상태 저장 위치 (운영 환경의 영속 저장소를 대신하는 로컬 SQLite)
+JOB_DB_PATH = os.getenv('JOB_DB_PATH', 'jobs.db')
+# 큐를 처리할 워커 수
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', os.getenv('WORKFLOW_MAX_CONCURRENCY', '16')))
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobError(Exception):
+    """작업 실패. result가 있으면 실패한 작업의 결과(남아 있는 산출물 등)로 함께 기록됩니다."""
+
+    def __init__(self, message: str, result: Optional[Dict[str, Any]] = None):
+        super().__init__(message)
+        self.result = result
+
+
+class JobStore:
+    """워크플로우 작업 상태를 SQLite에 저장합니다.
+
+    이벤트 루프에서는 a로 시작하는 메서드를 사용합니다. 쓰기는 전용 스레드 하나에서 순서대로 실행되어
+    루프를 막지 않고, 공용 스레드 풀이 워크플로우로 가득 차 있어도 상태 갱신이 밀리지 않습니다.
+    """
+
+    def __init__(self, db_path: str = JOB_DB_PATH):
+        self._lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='job-store')
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL,
+                    request TEXT NOT NULL,
+                    stages TEXT NOT NULL DEFAULT '{}',
+                    result TEXT,
+                    error TEXT,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            """)
+
+    def create(self, request: Dict[str, Any]) -> str:
+        """새 작업을 대기 상태로 등록하고 작업 ID를 반환합니다."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, request, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(request, ensure_ascii=False), now, now)
+            )
+        return job_id
+
+    def set_status(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                   error: Optional[str] = None):
+        """작업 상태를 갱신합니다."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ? WHERE id = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+                 error, time.time(), job_id)
+            )
+
+    def record_stage(self, job_id: str, stage: str, seconds: float):
+        """단계별 소요 시간을 기록합니다."""
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT stages FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is None:
+                return
+            stages = json.loads(row['stages'])
+            stages[stage] = {"seconds": round(seconds, 3), "finished_at": time.time()}
+            self._conn.execute(
+                "UPDATE jobs SET stages = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(stages), time.time(), job_id)
+            )
+
+    async def _write(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, functools.partial(fn, *args, **kwargs))
+
+    async def acreate(self, request: Dict[str, Any]) -> str:
+        return await self._write(self.create, request)
+
+    async def aset_status(self, job_id: str, status: str, result: Optional[Dict[str, Any]] = None,
+                          error: Optional[str] = None):
+        await self._write(self.set_status, job_id, status, result=result, error=error)
+
+    async def arecord_stage(self, job_id: str, stage: str, seconds: float):
+        await self._write(self.record_stage, job_id, stage, seconds)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """작업 정보를 조회합니다."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row['id'],
+            "status": row['status'],
+            "request": json.loads(row['request']),
+            "stages": json.loads(row['stages']),
+            "result": json.loads(row['result']) if row['result'] else None,
+            "error": row['error'],
+            "created_at": row['created_at'],
+            "updated_at": row['updated_at']
+        }
+
+    def unfinished(self) -> List[Dict[str, Any]]:
+        """재시작 시 다시 처리해야 할 작업 목록을 반환합니다."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id FROM jobs WHERE status IN (?, ?) ORDER BY created_at", (QUEUED, RUNNING)
+            ).fetchall()
+        return [self.get(row['id']) for row in rows]
+
+    def close(self):
+        self._writer.shutdown(wait=True)
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """워크플로우 작업을 큐에 넣고 정해진 수의 워커로 처리합니다."""
+
+    def __init__(self, store: JobStore, runner: Callable[[str, Dict[str, Any]], Awaitable[Dict[str, Any]]],
+                 workers: int = JOB_WORKERS):
+        self.store = store
+        self.runner = runner
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self):
+        """워커를 시작하고, 이전 실행에서 끝나지 않은 작업을 다시 큐에 넣습니다."""
+        self._queue = asyncio.Queue()
+        for job in self.store.unfinished():
+            print(f"미완료 작업 재등록: {job['id']}")
+            self.store.set_status(job['id'], QUEUED)
+            self._queue.put_nowait((job['id'], job['request']))
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        print(f"작업 큐 시작: 워커 {self.workers}개")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def enqueue(self, request: Dict[str, Any]) -> str:
+        """작업을 등록하고 바로 작업 ID를 반환합니다."""
+        job_id = await self.store.acreate(request)
+        self._queue.put_nowait((job_id, request))
+        return job_id
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def _worker(self, index: int):
+        while True:
+            job_id, request = await self._queue.get()
+            try:
+                await self.store.aset_status(job_id, RUNNING)
+                result = await self.runner(job_id, request)
+                await self.store.aset_status(job_id, SUCCEEDED, result=result)
+                print(f"✅ 작업 완료: {job_id}")
+            except asyncio.CancelledError:
+                raise
+            except JobError as e:
+                print(f"❌ 작업 실패: {job_id} - {e}")
+                await self.store.aset_status(job_id, FAILED, result=e.result, error=str(e))
+            except Exception as e:
+                print(f"❌ 작업 실패: {job_id} - {e}")
+                await self.store.aset_status(job_id, FAILED, error=str(e))
+            finally:
+                self._queue.task_done()
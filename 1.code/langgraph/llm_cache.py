@@ -0,0 +1,210 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+from concurrency import run_blocking
+
+# .env 파일 로드
+load_dotenv()
+
+LLM_CACHE_ENABLED = os.getenv('LLM_CACHE_ENABLED', 'true').lower() == 'true'
+# 메모리 캐시 최대 크기 (바이트, 초과 시 가장 오래 사용하지 않은 항목부터 제거)
+LLM_CACHE_MAX_BYTES = int(os.getenv('LLM_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# 항목 유효 시간 (초)
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', '3600'))
+# 디스크 캐시 경로 (비어 있으면 메모리만 사용)
+LLM_CACHE_DISK_PATH = os.getenv('LLM_CACHE_DISK_PATH', '')
+# 디스크 캐시 최대 항목 수 (초과 시 만료가 가장 가까운 항목부터 제거)
+LLM_CACHE_DISK_MAX_ROWS = int(os.getenv('LLM_CACHE_DISK_MAX_ROWS', '50000'))
+# 디스크 캐시에서 만료 항목 정리와 항목 수 제한을 적용하는 주기 (초)
+LLM_CACHE_DISK_PURGE_INTERVAL = float(os.getenv('LLM_CACHE_DISK_PURGE_INTERVAL', '300'))
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_prompt(prompt: str) -> str:
+    """공백 차이만 있는 프롬프트가 같은 키를 갖도록 정규화합니다."""
+    return _WHITESPACE.sub(' ', prompt).strip()
+
+
+class ResponseCache:
+    """LLM 응답 캐시 (메모리 LRU + TTL, 선택적 SQLite 디스크 계층)
+
+    이벤트 루프에서는 aget/aset을 사용합니다. 메모리 계층은 바로 조회하고,
+    디스크 계층의 읽기/쓰기만 공용 스레드 풀에서 처리합니다.
+    """
+
+    def __init__(self, max_bytes: int = LLM_CACHE_MAX_BYTES, ttl: int = LLM_CACHE_TTL,
+                 disk_path: Optional[str] = LLM_CACHE_DISK_PATH or None,
+                 disk_max_rows: int = LLM_CACHE_DISK_MAX_ROWS,
+                 purge_interval: float = LLM_CACHE_DISK_PURGE_INTERVAL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.disk_max_rows = disk_max_rows
+        self.purge_interval = purge_interval
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "disk_hits": 0, "evictions": 0, "expirations": 0,
+                       "disk_evictions": 0, "disk_expirations": 0}
+
+        self._disk = None
+        # SQLite 연결은 메모리 계층과 별도의 잠금으로 보호 (디스크 I/O 중에도 메모리 조회는 진행)
+        self._disk_lock = threading.Lock()
+        self._disk_writes = 0
+        self._last_purge = 0.0
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False)
+            with self._disk:
+                self._disk.execute("""
+                    CREATE TABLE IF NOT EXISTS llm_cache (
+                        key TEXT PRIMARY KEY,
+                        value TEXT NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                """)
+                self._disk.execute("CREATE INDEX IF NOT EXISTS llm_cache_expires ON llm_cache (expires_at)")
+            self._purge_disk(time.time())
+
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: float) -> str:
+        """정규화된 프롬프트, 모델, 온도로 캐시 키를 만듭니다."""
+        raw = json.dumps([normalize_prompt(prompt), model, temperature], ensure_ascii=False)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        found, value = self._get_memory(key, now)
+        if found:
+            return value
+        if self._disk is not None:
+            value = self._get_disk(key, now)
+        return self._record_lookup(value)
+
+    async def aget(self, key: str) -> Optional[str]:
+        """get과 같지만 디스크 계층 조회는 스레드 풀에서 실행합니다."""
+        now = time.time()
+        found, value = self._get_memory(key, now)
+        if found:
+            return value
+        if self._disk is not None:
+            value = await run_blocking(self._get_disk, key, now)
+        return self._record_lookup(value)
+
+    def set(self, key: str, value: str, ttl: Optional[int] = None):
+        expires_at = self._set_memory(key, value, ttl)
+        if self._disk is not None:
+            self._set_disk(key, value, expires_at)
+
+    async def aset(self, key: str, value: str, ttl: Optional[int] = None):
+        """set과 같지만 디스크 계층 쓰기는 스레드 풀에서 실행합니다."""
+        expires_at = self._set_memory(key, value, ttl)
+        if self._disk is not None:
+            await run_blocking(self._set_disk, key, value, expires_at)
+
+    def _get_memory(self, key: str, now: float):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, size = entry
+                if expires_at >= now:
+                    self._entries.move_to_end(key)
+                    self._stats["hits"] += 1
+                    return True, value
+                self._remove(key)
+                self._stats["expirations"] += 1
+        return False, None
+
+    def _record_lookup(self, value: Optional[str]) -> Optional[str]:
+        with self._lock:
+            if value is None:
+                self._stats["misses"] += 1
+            else:
+                self._stats["hits"] += 1
+                self._stats["disk_hits"] += 1
+        return value
+
+    def _set_memory(self, key: str, value: str, ttl: Optional[int]) -> float:
+        expires_at = time.time() + (ttl or self.ttl)
+        with self._lock:
+            self._insert(key, value, expires_at)
+        return expires_at
+
+    def _get_disk(self, key: str, now: float) -> Optional[str]:
+        with self._disk_lock:
+            row = self._disk.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row and row[1] >= now:
+            with self._lock:
+                self._insert(key, row[0], row[1])
+            return row[0]
+        return None
+
+    def _set_disk(self, key: str, value: str, expires_at: float):
+        with self._disk_lock:
+            with self._disk:
+                self._disk.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at)
+                )
+            self._disk_writes += 1
+        # 주기가 지났거나, 마지막 정리 이후 쓰기가 많아 항목 수 제한을 넘었을 수 있으면 정리
+        now = time.time()
+        if (now - self._last_purge >= self.purge_interval
+                or self._disk_writes >= max(1, self.disk_max_rows // 10)):
+            self._purge_disk(now)
+
+    def _purge_disk(self, now: float):
+        """만료된 항목을 지우고, 항목 수 제한을 넘으면 만료가 가장 가까운 항목부터 제거합니다."""
+        with self._disk_lock:
+            with self._disk:
+                expired = self._disk.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,)).rowcount
+                count = self._disk.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+                evicted = 0
+                if count > self.disk_max_rows:
+                    evicted = self._disk.execute(
+                        "DELETE FROM llm_cache WHERE key IN "
+                        "(SELECT key FROM llm_cache ORDER BY expires_at LIMIT ?)",
+                        (count - self.disk_max_rows,)
+                    ).rowcount
+            self._disk_writes = 0
+            self._last_purge = now
+        with self._lock:
+            self._stats["disk_expirations"] += max(expired, 0)
+            self._stats["disk_evictions"] += max(evicted, 0)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": self._disk is not None
+            }
+
+    def _insert(self, key: str, value: str, expires_at: float):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, expires_at, size)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self._stats["evictions"] += 1
+
+    def _remove(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
@@ -0,0 +1,402 @@
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import boto3
+import httpx
+from botocore.config import Config
+from dotenv import load_dotenv
+from openai import OpenAI
+from concurrency import LLM_MAX_WORKERS
+from single_flight import llm_single_flight, make_key
+from rate_limiter import llm_limiters, is_throttle, throttle_backoff, LLM_THROTTLE_RETRIES
+from hedging import llm_hedging, current_cancel_scope, on_cancel, raise_if_cancelled, LLM_HEDGE_PROVIDER
+from llm_transport import get_llm_transport
+from metrics import record_tokens
+from tracing import tracer
+
+# .env 파일 로드
+load_dotenv()
+
+# 모든 제공자에 공통으로 적용하는 연결/응답 제한 시간 (초)
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))
+LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', os.getenv('MODEL_TIMEOUT', '180')))
+# 일시적 오류 재시도 횟수 (첫 시도 제외)
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '2'))
+# 제공자별 연결 풀 크기 (블로킹 호출 스레드 수와 같게 맞춤)
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', str(LLM_MAX_WORKERS)))
+# 재시도는 게이트웨이(_call_with_retries)가 항상 직접 하므로 SDK 재시도는 끔
+# (켜 두면 한 번의 스로틀링이 SDK 시도 수 × 게이트웨이 시도 수만큼 요청을 보냄)
+_SDK_RETRIES = 0
+
+# 재시도해도 되는 일시적 오류 (스로틀링 제외)
+_TRANSIENT_CODES = {'ServiceUnavailableException', 'InternalServerException', 'ModelNotReadyException'}
+_TRANSIENT_ERRORS = {'EndpointConnectionError', 'ConnectionClosedError', 'ConnectTimeoutError', 'ReadTimeoutError',
+                     'APIConnectionError', 'APITimeoutError', 'InternalServerError'}
+
+BEDROCK_DEFAULT_MODEL = os.getenv('BEDROCK_MODEL_ID', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
+OPENAI_DEFAULT_MODEL = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+
+Messages = List[Dict[str, Any]]
+
+
+class LLMGateway:
+    """프로세스 전체가 공유하는 LLM 호출 계층.
+
+    Bedrock/OpenAI 클라이언트를 한 번만 만들어 연결 풀을 재사용하고, 제한 시간과
+    재시도 설정을 통일하며, 동시에 들어온 같은 요청은 한 번만 호출합니다.
+    호출은 모델별 적응형 호출 제한(rate_limiter)을 거치고, 스로틀링 응답은
+    백오프 후 다시 대기열에 넣어 재시도하며, 선택적으로 헤징(hedging)을 적용합니다.
+    제공자 호출은 전송 계층(llm_transport)을 거치므로 카세트로 기록/재생할 수 있습니다.
+    """
+
+    def __init__(self, pool_size: int = LLM_POOL_SIZE):
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._bedrock = None
+        self._openai = None
+        self.transport = get_llm_transport()
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    @property
+    def bedrock(self):
+        with self._lock:
+            if self._bedrock is None:
+                self._bedrock = boto3.client(
+                    'bedrock-runtime',
+                    region_name=os.getenv('AWS_REGION', 'us-east-1'),
+                    aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                    aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                    config=Config(
+                        connect_timeout=LLM_CONNECT_TIMEOUT,
+                        read_timeout=LLM_READ_TIMEOUT,
+                        retries={'max_attempts': _SDK_RETRIES + 1, 'mode': 'standard'},
+                        max_pool_connections=self.pool_size
+                    )
+                )
+            return self._bedrock
+
+    @property
+    def openai(self) -> OpenAI:
+        with self._lock:
+            if self._openai is None:
+                api_key = os.getenv('OPEN_AI_KEY')
+                if not api_key:
+                    raise ValueError("OPEN_AI_KEY가 .env 파일에 설정되지 않았습니다.")
+                self._openai = OpenAI(
+                    api_key=api_key,
+                    max_retries=_SDK_RETRIES,
+                    timeout=httpx.Timeout(LLM_READ_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+                    http_client=httpx.Client(limits=httpx.Limits(
+                        max_connections=self.pool_size,
+                        max_keepalive_connections=self.pool_size
+                    ))
+                )
+            return self._openai
+
+    def generate(self, messages: Messages, provider: str = 'bedrock', model: Optional[str] = None,
+                 max_tokens: int = 4000, temperature: float = 0, system: Optional[str] = None,
+                 hedge: Optional[bool] = None) -> str:
+        """메시지 목록으로 응답 전체를 생성합니다. 실패 시 예외를 그대로 전달합니다."""
+        model = model or self._default_model(provider)
+        key = make_key(provider, model, messages, max_tokens, temperature, system)
+
+        def invoke():
+            # 헤징 시에는 진 쪽을 도중에 끊을 수 있도록 스트리밍 API로 받아서 합침
+            if llm_hedging.active(hedge):
+                return "".join(self.generate_stream(messages, provider, model, max_tokens, temperature,
+                                                    system, hedge=True))
+            if provider == 'bedrock':
+                generate = lambda: self._bedrock_generate(messages, model, max_tokens, temperature, system)
+            else:
+                generate = lambda: self._openai_generate(messages, model, max_tokens, temperature, system)
+            request = self._transport_request(messages, max_tokens, temperature, system)
+            call = lambda: self.transport.call(provider, model, request, generate)
+            return self._call_with_retries(provider, model, call, _prompt_chars(messages, system))
+
+        # 동시에 들어온 같은 요청은 한 번만 호출
+        return llm_single_flight.do(key, invoke)
+
+    def generate_stream(self, messages: Messages, provider: str = 'bedrock', model: Optional[str] = None,
+                        max_tokens: int = 4000, temperature: float = 0, system: Optional[str] = None,
+                        hedge: Optional[bool] = None) -> Iterator[str]:
+        """메시지 목록으로 응답을 생성하며 텍스트 조각을 순서대로 반환합니다.
+
+        헤징이 켜져 있으면 첫 토큰이 늦을 때 두 번째 요청을 보내 먼저 응답한 쪽을 사용합니다.
+        """
+        model = model or self._default_model(provider)
+        backup_provider, backup_model = self._hedge_target(provider, model, messages)
+        return llm_hedging.stream(
+            f"{provider}:{model}",
+            lambda: self._stream_with_retries(messages, provider, model, max_tokens, temperature, system),
+            lambda: self._stream_with_retries(messages, backup_provider, backup_model, max_tokens,
+                                              temperature, system),
+            hedge=hedge
+        )
+
+    def _stream_with_retries(self, messages: Messages, provider: str, model: str, max_tokens: int,
+                             temperature: float, system: Optional[str]) -> Iterator[str]:
+        limiter = llm_limiters.get(f"{provider}:{model}")
+        attempt = 0
+        # 제너레이터는 여러 번에 나눠 실행되므로 현재 span으로 설정하지 않고 직접 끝냄
+        span = tracer.start_span('llm.stream', provider=provider, model=model,
+                                 prompt_chars=_prompt_chars(messages, system))
+        response_chars = 0
+        # 헤징으로 실행 중이면 진 순간 슬롯 대기와 재시도를 멈춤
+        scope = current_cancel_scope()
+        try:
+            while True:
+                raise_if_cancelled()
+                self._count(provider, 'streams')
+                emitted = False
+                permit = limiter.acquire(cancelled=scope.cancelled if scope else None) if limiter else None
+                try:
+                    if provider == 'bedrock':
+                        open_stream = lambda: self._bedrock_stream(messages, model, max_tokens, temperature,
+                                                                   system)
+                    else:
+                        open_stream = lambda: self._openai_stream(messages, model, max_tokens, temperature,
+                                                                  system)
+                    stream = self.transport.stream(provider, model,
+                                                   self._transport_request(messages, max_tokens, temperature,
+                                                                           system),
+                                                   open_stream)
+                    for text in stream:
+                        if not emitted and permit:
+                            permit.succeeded()
+                        emitted = True
+                        response_chars += len(text)
+                        yield text
+                    if permit:
+                        permit.succeeded()
+                    return
+                except Exception as e:
+                    self._count(provider, 'errors')
+                    # 이미 조각을 보낸 스트림은 이어 붙일 수 없고, 헤징에서 진 요청은 연결을 끊은 것이므로 재시도하지 않음
+                    if emitted or (scope and scope.cancelled.is_set()) or \
+                            not self._should_retry(provider, e, attempt, permit):
+                        span.record_error(e)
+                        raise
+                    error = e
+                finally:
+                    if permit:
+                        permit.release()
+                self._trace_retry(span, error)
+                self._backoff(error, attempt)
+                attempt += 1
+        finally:
+            span.set_attribute('response_chars', response_chars)
+            span.end()
+
+    def _call_with_retries(self, provider: str, model: str, call: Callable[[], str],
+                           prompt_chars: int = 0) -> str:
+        limiter = llm_limiters.get(f"{provider}:{model}")
+        attempt = 0
+        with tracer.span('llm.call', provider=provider, model=model, prompt_chars=prompt_chars) as span:
+            while True:
+                self._count(provider, 'calls')
+                permit = limiter.acquire() if limiter else None
+                try:
+                    result = call()
+                    if permit:
+                        permit.succeeded()
+                    span.set_attribute('response_chars', len(result))
+                    return result
+                except Exception as e:
+                    self._count(provider, 'errors')
+                    if not self._should_retry(provider, e, attempt, permit):
+                        raise
+                    error = e
+                finally:
+                    if permit:
+                        permit.release()
+                self._trace_retry(span, error)
+                self._backoff(error, attempt)
+                attempt += 1
+
+    def _should_retry(self, provider: str, error: Exception, attempt: int, permit) -> bool:
+        if is_throttle(error):
+            self._count(provider, 'throttles')
+            if permit:
+                permit.throttled()
+            return attempt < LLM_THROTTLE_RETRIES
+        if _is_transient(error):
+            return attempt < LLM_MAX_RETRIES
+        return False
+
+    def _trace_retry(self, span, error: Exception):
+        span.add('retries')
+        if is_throttle(error):
+            span.add('throttles')
+
+    def _backoff(self, error: Exception, attempt: int):
+        delay = throttle_backoff(attempt)
+        print(f"LLM 호출 재시도 {attempt + 1}회 ({delay:.1f}초 후): {error}")
+        time.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {provider: dict(counts) for provider, counts in self._stats.items()}
+
+    def _hedge_target(self, provider: str, model: str, messages: Messages):
+        """헤지 요청을 보낼 (제공자, 모델)"""
+        target = LLM_HEDGE_PROVIDER
+        # 이미지 등 텍스트가 아닌 입력은 같은 제공자로만 보냄
+        text_only = all(isinstance(message.get('content'), str) for message in messages)
+        if target in ('same', provider) or not text_only:
+            return provider, model
+        return target, self._default_model(target)
+
+    def _default_model(self, provider: str) -> str:
+        if provider == 'bedrock':
+            return BEDROCK_DEFAULT_MODEL
+        if provider == 'openai':
+            return OPENAI_DEFAULT_MODEL
+        raise ValueError(f"알 수 없는 LLM 제공자입니다: {provider}")
+
+    def _count(self, provider: str, name: str):
+        with self._lock:
+            counts = self._stats.setdefault(provider, {"calls": 0, "streams": 0, "errors": 0, "throttles": 0})
+            counts[name] += 1
+
+    def _transport_request(self, messages: Messages, max_tokens: int, temperature: float,
+                           system: Optional[str]) -> Dict[str, Any]:
+        """카세트에서 응답을 찾을 때 쓰는 제공자 공통 요청 내용"""
+        return {"messages": messages, "max_tokens": max_tokens, "temperature": temperature, "system": system}
+
+    def _bedrock_body(self, messages: Messages, max_tokens: int, temperature: float,
+                      system: Optional[str]) -> str:
+        body = {
+            "anthropic_version": "bedrock-2023-05-31",
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "messages": messages
+        }
+        if system:
+            body["system"] = system
+        return json.dumps(body)
+
+    def _bedrock_generate(self, messages, model, max_tokens, temperature, system) -> str:
+        response = self.bedrock.invoke_model(
+            modelId=model,
+            body=self._bedrock_body(messages, max_tokens, temperature, system),
+            accept='application/json',
+            contentType='application/json'
+        )
+        response_body = json.loads(response['body'].read())
+        usage = response_body.get('usage', {})
+        record_tokens('bedrock', model, usage.get('input_tokens'), usage.get('output_tokens'))
+        return response_body['content'][0]['text']
+
+    def _bedrock_stream(self, messages, model, max_tokens, temperature, system) -> Iterator[str]:
+        response = self.bedrock.invoke_model_with_response_stream(
+            modelId=model,
+            body=self._bedrock_body(messages, max_tokens, temperature, system),
+            accept='application/json',
+            contentType='application/json'
+        )
+        usage = {}
+        # 헤징에서 지면 첫 토큰을 기다리는 중이라도 다른 스레드에서 연결을 닫음
+        on_cancel(response['body'].close)
+        try:
+            yield from iter_stream_text(response, usage)
+        finally:
+            # 도중에 멈추면 연결도 닫음
+            response['body'].close()
+            record_tokens('bedrock', model, usage.get('input_tokens'), usage.get('output_tokens'))
+
+    def _openai_messages(self, messages: Messages, system: Optional[str]) -> Messages:
+        return ([{"role": "system", "content": system}] if system else []) + messages
+
+    def _openai_generate(self, messages, model, max_tokens, temperature, system) -> str:
+        response = self.openai.chat.completions.create(
+            model=model,
+            messages=self._openai_messages(messages, system),
+            max_tokens=max_tokens,
+            temperature=temperature
+        )
+        if response.usage:
+            record_tokens('openai', model, response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    def _openai_stream(self, messages, model, max_tokens, temperature, system) -> Iterator[str]:
+        stream = self.openai.chat.completions.create(
+            model=model,
+            messages=self._openai_messages(messages, system),
+            max_tokens=max_tokens,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        on_cancel(stream.close)
+        try:
+            for chunk in stream:
+                # 사용량은 마지막에 choices 없이 따로 옴
+                if chunk.usage:
+                    record_tokens('openai', model, chunk.usage.prompt_tokens, chunk.usage.completion_tokens)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+        finally:
+            stream.close()
+
+
+def _prompt_chars(messages: Messages, system: Optional[str]) -> int:
+    """추적용 프롬프트 크기 (텍스트 글자 수, 이미지는 제외)"""
+    total = len(system or '')
+    for message in messages:
+        content = message.get('content')
+        if isinstance(content, str):
+            total += len(content)
+        else:
+            total += sum(len(block.get('text', '')) for block in content if isinstance(block, dict))
+    return total
+
+
+def _is_transient(error: BaseException) -> bool:
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict) and response.get('Error', {}).get('Code') in _TRANSIENT_CODES:
+        return True
+    return type(error).__name__ in _TRANSIENT_ERRORS
+
+
+def iter_stream_text(response, usage: Optional[Dict[str, int]] = None) -> Iterator[str]:
+    """invoke_model_with_response_stream 응답에서 텍스트 조각을 순서대로 꺼냅니다.
+
+    usage가 주어지면 스트림에 실려 오는 토큰 사용량(input_tokens, output_tokens)을 채웁니다.
+    """
+    for event in response.get('body'):
+        chunk = event.get('chunk')
+        if not chunk:
+            continue
+        payload = json.loads(chunk['bytes'])
+        if usage is not None:
+            if payload.get('type') == 'message_start':
+                usage.update(payload.get('message', {}).get('usage', {}))
+            elif payload.get('type') == 'message_delta':
+                usage.update(payload.get('usage', {}))
+        if payload.get('type') == 'content_block_delta':
+            text = payload.get('delta', {}).get('text')
+            if text:
+                yield text
+
+
+def user_message(content: Any) -> Messages:
+    """단일 사용자 메시지 목록을 만듭니다."""
+    return [{"role": "user", "content": content}]
+
+
+_default_gateway: Optional[LLMGateway] = None
+_gateway_lock = threading.Lock()
+
+
+def get_llm_gateway() -> LLMGateway:
+    """프로세스 공용 LLM 게이트웨이를 반환합니다."""
+    global _default_gateway
+    with _gateway_lock:
+        if _default_gateway is None:
+            _default_gateway = LLMGateway()
+        return _default_gateway
@@ -0,0 +1,279 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Deque, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from llm_gateway import LLMGateway, Messages, get_llm_gateway, user_message
+from llm_transport import get_llm_transport
+from metrics import llm_dummy_responses, llm_fallbacks
+from tracing import tracer
+
+# .env 파일 로드
+load_dotenv()
+
+_OPUS = 'us.anthropic.claude-opus-4-1-20250805-v1:0'
+_SONNET = 'us.anthropic.claude-sonnet-4-20250514-v1:0'
+
+# 생성 단계(PRD/HTML)에서 주 모델이 실패할 때 넘어갈 모델 (비어 있으면 사용 안 함)
+# 지연 시간 점수로는 더 빠른 모델이 항상 앞서므로, 품질 차이를 감수할 때만 지정
+LLM_FALLBACK_BEDROCK_MODEL = os.getenv('LLM_FALLBACK_BEDROCK_MODEL', '')
+_GENERATION_ROUTES = [f"bedrock:{os.getenv('BEDROCK_MODEL_ID', _OPUS)}"] + \
+    ([f"bedrock:{LLM_FALLBACK_BEDROCK_MODEL}"] if LLM_FALLBACK_BEDROCK_MODEL else [])
+
+# 호출 종류별 후보 (점수가 같으면 앞에 있을수록 우선, "제공자:모델" 형식)
+# fragment: 생성된 페이지의 /llm 호출, prd/html: 워크플로우 생성 단계, html_patch: 기존 HTML 수정 목록,
+# prd_section: 섹션별 PRD 생성의 개요/섹션 호출, prd_ir: HTMLAgent용 구조화 PRD(JSON)
+DEFAULT_ROUTES = {
+    'fragment': [f"openai:{os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')}",
+                 f"bedrock:{os.getenv('LLM_FRAGMENT_BEDROCK_MODEL', _SONNET)}"],
+    'prd': _GENERATION_ROUTES,
+    'html': _GENERATION_ROUTES,
+    'html_patch': _GENERATION_ROUTES,
+    'prd_section': _GENERATION_ROUTES,
+    'prd_ir': _GENERATION_ROUTES,
+}
+# 출력 1천 토큰당 비용 (USD, 점수 계산용)
+DEFAULT_COSTS = {
+    'openai:gpt-3.5-turbo': 0.0015,
+    f'bedrock:{_SONNET}': 0.015,
+    f'bedrock:{_OPUS}': 0.075,
+}
+
+# JSON으로 후보/비용 재정의 (예: {"fragment": ["bedrock:..."]}, {"openai:gpt-4o-mini": 0.0006})
+LLM_ROUTES = json.loads(os.getenv('LLM_ROUTES', '{}'))
+LLM_ROUTE_COSTS = json.loads(os.getenv('LLM_ROUTE_COSTS', '{}'))
+# 비용 1달러(1천 토큰당)를 몇 초의 지연 시간과 같게 볼지
+LLM_ROUTER_COST_WEIGHT = float(os.getenv('LLM_ROUTER_COST_WEIGHT', '10'))
+# 오류율이 점수에 미치는 가중치
+LLM_ROUTER_ERROR_PENALTY = float(os.getenv('LLM_ROUTER_ERROR_PENALTY', '4'))
+# 최근 결과 표본 수 / 이 비율 이상 실패하면 잠시 제외 / 제외 시간 (초)
+LLM_ROUTER_WINDOW = int(os.getenv('LLM_ROUTER_WINDOW', '50'))
+LLM_ROUTER_EJECT_ERROR_RATE = float(os.getenv('LLM_ROUTER_EJECT_ERROR_RATE', '0.5'))
+LLM_ROUTER_COOLDOWN = float(os.getenv('LLM_ROUTER_COOLDOWN', '30'))
+
+_EWMA_ALPHA = 0.2
+_MIN_EJECT_SAMPLES = 5
+
+
+@dataclass(frozen=True)
+class Route:
+    """호출을 보낼 제공자와 모델"""
+    provider: str
+    model: str
+    cost: float = 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}:{self.model}"
+
+    @classmethod
+    def parse(cls, spec: str, costs: Dict[str, float]) -> 'Route':
+        provider, model = spec.split(':', 1)
+        return cls(provider=provider, model=model, cost=costs.get(spec, 0.0))
+
+
+class _RouteHealth:
+    def __init__(self, window: int):
+        self.outcomes: Deque[bool] = deque(maxlen=window)
+        self.latency: Dict[str, float] = {}
+        self.ejected_until = 0.0
+        self.last_attempt = 0.0
+
+    def error_rate(self) -> float:
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+
+class LLMRouter:
+    """호출 종류별로 지연 시간, 오류율, 비용 점수가 가장 좋은 제공자/모델을 고르고, 실패하면 다음 후보로 넘깁니다."""
+
+    def __init__(self, gateway: Optional[LLMGateway] = None, routes: Optional[Dict[str, List[str]]] = None,
+                 costs: Optional[Dict[str, float]] = None):
+        self.gateway = gateway or get_llm_gateway()
+        costs = {**DEFAULT_COSTS, **LLM_ROUTE_COSTS, **(costs or {})}
+        specs = {**DEFAULT_ROUTES, **LLM_ROUTES, **(routes or {})}
+        self.routes: Dict[str, List[Route]] = {
+            call_class: [Route.parse(spec, costs) for spec in call_specs]
+            for call_class, call_specs in specs.items()
+        }
+        self._health: Dict[str, _RouteHealth] = {}
+        self._lock = threading.Lock()
+
+    def candidates(self, call_class: str, messages: Optional[Messages] = None, kind: str = 'full') -> List[Route]:
+        """점수 순으로 정렬한 사용 가능한 후보 목록"""
+        if call_class not in self.routes:
+            raise ValueError(f"알 수 없는 호출 종류입니다: {call_class}")
+        text_only = messages is None or all(isinstance(m.get('content'), str) for m in messages)
+        routes = [route for route in self.routes[call_class] if self._available(route, text_only)]
+
+        now = time.monotonic()
+        with self._lock:
+            healthy = [route for route in routes if self._health_for(route).ejected_until <= now]
+            # 모두 제외된 상태면 그래도 시도
+            ranked = healthy or routes
+            order = {route: index for index, route in enumerate(self.routes[call_class])}
+            return sorted(ranked, key=lambda route: (self._score(call_class, kind, route), order[route]))
+
+    def generate(self, call_class: str, messages: Messages, max_tokens: int = 4000,
+                 temperature: float = 0, system: Optional[str] = None) -> str:
+        """가장 좋은 후보로 호출하고, 실패하면 다음 후보로 넘깁니다."""
+        last_error: Optional[Exception] = None
+        # 호출한 단계의 span에 선택된 경로와 전환 횟수를 남김
+        span = tracer.current_span()
+        for route in self.candidates(call_class, messages):
+            started = time.monotonic()
+            span.set_attributes(call_class=call_class, route=route.key)
+            try:
+                result = self.gateway.generate(messages, provider=route.provider, model=route.model,
+                                               max_tokens=max_tokens, temperature=temperature, system=system)
+            except Exception as e:
+                self._record(call_class, route, 'full', None)
+                llm_fallbacks.inc(call_class=call_class, kind='failover')
+                span.add('failovers')
+                print(f"⚠️ {call_class} 호출 실패 ({route.key}), 다음 후보로 전환: {e}")
+                last_error = e
+                continue
+            self._record(call_class, route, 'full', time.monotonic() - started)
+            return result
+        raise last_error or RuntimeError(f"{call_class} 호출에 사용할 수 있는 후보가 없습니다.")
+
+    def generate_stream(self, call_class: str, messages: Messages, max_tokens: int = 4000,
+                        temperature: float = 0, system: Optional[str] = None) -> Iterator[str]:
+        """스트리밍 호출. 첫 조각을 받기 전에 실패하면 다음 후보로 넘깁니다."""
+        last_error: Optional[Exception] = None
+        span = tracer.current_span()
+        for route in self.candidates(call_class, messages, kind='stream'):
+            started = time.monotonic()
+            emitted = False
+            span.set_attributes(call_class=call_class, route=route.key)
+            try:
+                for text in self.gateway.generate_stream(messages, provider=route.provider, model=route.model,
+                                                         max_tokens=max_tokens, temperature=temperature,
+                                                         system=system):
+                    if not emitted:
+                        # 대화형 호출은 첫 토큰까지의 시간으로 평가
+                        self._record(call_class, route, 'stream', time.monotonic() - started)
+                        emitted = True
+                    yield text
+                if not emitted:
+                    self._record(call_class, route, 'stream', time.monotonic() - started)
+                return
+            except Exception as e:
+                if emitted:
+                    raise
+                self._record(call_class, route, 'stream', None)
+                llm_fallbacks.inc(call_class=call_class, kind='failover')
+                span.add('failovers')
+                print(f"⚠️ {call_class} 스트리밍 실패 ({route.key}), 다음 후보로 전환: {e}")
+                last_error = e
+        raise last_error or RuntimeError(f"{call_class} 호출에 사용할 수 있는 후보가 없습니다.")
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        with self._lock:
+            routes = {}
+            for key, health in self._health.items():
+                routes[key] = {
+                    "error_rate": round(health.error_rate(), 4),
+                    "samples": len(health.outcomes),
+                    "latency": {name: round(value, 3) for name, value in health.latency.items()},
+                    "ejected": health.ejected_until > now
+                }
+        return {
+            "routes": routes,
+            "preferred": {call_class: [route.key for route in self.candidates(call_class)]
+                          for call_class in self.routes}
+        }
+
+    def _available(self, route: Route, text_only: bool) -> bool:
+        if route.provider == 'openai':
+            # OpenAI 경로는 키가 있고 텍스트 입력일 때만 사용 (카세트 재생/stub 모드에서는 키가 없어도 됨)
+            return (bool(os.getenv('OPEN_AI_KEY')) or get_llm_transport().offline) and text_only
+        return True
+
+    def _health_for(self, route: Route) -> _RouteHealth:
+        health = self._health.get(route.key)
+        if health is None:
+            health = self._health[route.key] = _RouteHealth(LLM_ROUTER_WINDOW)
+        return health
+
+    def _score(self, call_class: str, kind: str, route: Route) -> float:
+        health = self._health_for(route)
+        # 아직 표본이 없는 후보는 한 번은 시도해 보도록 지연 시간을 0으로 봄
+        latency = health.latency.get(f"{call_class}/{kind}", 0.0)
+        error_rate = health.error_rate()
+        if time.monotonic() - health.last_attempt > LLM_ROUTER_COOLDOWN:
+            # 한동안 쓰지 않은 후보는 회복했는지 다시 시도해 볼 수 있도록 오류율을 무시
+            error_rate = 0.0
+        # 성공 표본 없이 실패만 있는 후보도 밀려나도록 오류율을 초 단위로도 더함
+        return (latency * (1 + LLM_ROUTER_ERROR_PENALTY * error_rate) + LLM_ROUTER_ERROR_PENALTY * error_rate
+                + LLM_ROUTER_COST_WEIGHT * route.cost)
+
+    def _record(self, call_class: str, route: Route, kind: str, latency: Optional[float]):
+        with self._lock:
+            health = self._health_for(route)
+            health.last_attempt = time.monotonic()
+            health.outcomes.append(latency is not None)
+            if latency is not None:
+                name = f"{call_class}/{kind}"
+                previous = health.latency.get(name)
+                health.latency[name] = latency if previous is None else \
+                    (1 - _EWMA_ALPHA) * previous + _EWMA_ALPHA * latency
+            elif (len(health.outcomes) >= _MIN_EJECT_SAMPLES
+                  and health.error_rate() >= LLM_ROUTER_EJECT_ERROR_RATE):
+                health.ejected_until = time.monotonic() + LLM_ROUTER_COOLDOWN
+                print(f"🚫 {route.key} 오류율 {health.error_rate():.0%}, {LLM_ROUTER_COOLDOWN:.0f}초 동안 제외")
+
+
+class RoutedClient:
+    """라우터를 거치는 텍스트 클라이언트 (BedrockClient/OpenAIClient와 같은 generate_text 형태)"""
+
+    def __init__(self, call_class: str, dummy: Callable[[str], str], router: Optional['LLMRouter'] = None):
+        self.call_class = call_class
+        self.router = router or get_llm_router()
+        self.model = f"router:{call_class}"
+        self.max_tokens = 8000
+        self.temperature = float(os.getenv('MODEL_TEMPERATURE', '0'))
+        self._dummy = dummy
+
+    def generate_text(self, prompt: str, max_tokens: Optional[int] = None) -> str:
+        try:
+            return self.router.generate(self.call_class, user_message(prompt),
+                                        max_tokens=max_tokens or self.max_tokens, temperature=self.temperature)
+        except Exception as e:
+            print(f"LLM 호출 오류 (모든 후보 실패): {e}")
+            llm_dummy_responses.inc(call_class=self.call_class)
+            return self._get_dummy_response(prompt)
+
+    def generate_text_stream(self, prompt: str, max_tokens: Optional[int] = None) -> Iterator[str]:
+        emitted = False
+        try:
+            for text in self.router.generate_stream(self.call_class, user_message(prompt),
+                                                    max_tokens=max_tokens or self.max_tokens,
+                                                    temperature=self.temperature):
+                emitted = True
+                yield text
+        except Exception as e:
+            print(f"LLM 스트리밍 오류 (모든 후보 실패): {e}")
+            # 아직 아무것도 보내지 않았다면 더미 데이터로 대체
+            if not emitted:
+                llm_dummy_responses.inc(call_class=self.call_class)
+                yield self._get_dummy_response(prompt)
+
+    def _get_dummy_response(self, prompt: str) -> str:
+        return self._dummy(prompt)
+
+
+_default_router: Optional[LLMRouter] = None
+_router_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """프로세스 공용 LLM 라우터를 반환합니다."""
+    global _default_router
+    with _router_lock:
+        if _default_router is None:
+            _default_router = LLMRouter()
+        return _default_router
@@ -0,0 +1,251 @@
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from dotenv import load_dotenv
+from single_flight import make_key
+
+# .env 파일 로드
+load_dotenv()
+
+# LLM 호출 방식 (live: 실제 호출, record: 실제 호출 후 카세트에 기록, replay: 카세트에서 재생,
+# stub: 설정한 지연 시간/토큰 속도로 가짜 응답 생성)
+LLM_TRANSPORT = os.getenv('LLM_TRANSPORT', 'live').lower()
+# 요청/응답을 기록하는 카세트 파일 (JSON Lines)
+LLM_CASSETTE = os.getenv('LLM_CASSETTE', 'cassettes/llm.jsonl')
+# 재생 시 지연 시간 (recorded: 기록된 시간, none: 지연 없음, fixed:<초>, lognormal:<중앙값>,<sigma>)
+LLM_REPLAY_LATENCY = os.getenv('LLM_REPLAY_LATENCY', 'recorded')
+# 재생 지연 시간 배율 (0.5면 두 배 빠르게)
+LLM_REPLAY_SPEED = float(os.getenv('LLM_REPLAY_SPEED', '1.0'))
+# 가짜 응답(stub)의 첫 토큰 지연 시간 (재생 지연 시간과 같은 형식), 초당 토큰 수, 응답 토큰 수, 오류 비율
+LLM_STUB_LATENCY = os.getenv('LLM_STUB_LATENCY', 'lognormal:1.0,0.3')
+LLM_STUB_TOKENS_PER_SEC = float(os.getenv('LLM_STUB_TOKENS_PER_SEC', '60'))
+LLM_STUB_OUTPUT_TOKENS = int(os.getenv('LLM_STUB_OUTPUT_TOKENS', '300'))
+LLM_STUB_ERROR_RATE = float(os.getenv('LLM_STUB_ERROR_RATE', '0'))
+
+_MODES = ('live', 'record', 'replay', 'stub')
+# 가짜 응답 한 조각에 담는 토큰 수
+_STUB_TOKENS_PER_CHUNK = 5
+
+
+class CassetteMiss(Exception):
+    """재생 모드에서 카세트에 기록되지 않은 요청입니다."""
+
+
+class StubError(Exception):
+    """stub 모드에서 LLM_STUB_ERROR_RATE에 따라 일부러 낸 오류입니다."""
+
+
+class LatencyProfile:
+    """재생할 때 첫 토큰까지의 지연 시간을 정합니다.
+
+    첫 토큰 이후 조각 사이 간격은 기록된 값에 배율만 적용합니다.
+    """
+
+    def __init__(self, spec: str = LLM_REPLAY_LATENCY, speed: float = LLM_REPLAY_SPEED):
+        self.spec = spec
+        self.speed = speed
+        name, _, args = spec.partition(':')
+        self.name = name.strip().lower()
+        self.args = [float(value) for value in args.split(',') if value.strip()]
+        if self.name not in ('recorded', 'none', 'fixed', 'lognormal'):
+            raise ValueError(f"알 수 없는 재생 지연 시간 설정입니다: {spec}")
+
+    def first_token(self, recorded: float) -> float:
+        if self.name == 'none':
+            return 0.0
+        if self.name == 'fixed':
+            return self.args[0] * self.speed
+        if self.name == 'lognormal':
+            median, sigma = (self.args + [0.5])[:2]
+            return random.lognormvariate(math.log(max(median, 1e-6)), sigma) * self.speed
+        return recorded * self.speed
+
+    def gap(self, recorded: float) -> float:
+        return 0.0 if self.name == 'none' else recorded * self.speed
+
+
+class Cassette:
+    """요청 키별로 기록된 응답을 담는 JSON Lines 파일.
+
+    같은 요청이 여러 번 기록되어 있으면 재생할 때 순서대로 돌려가며 사용합니다.
+    """
+
+    def __init__(self, path: str = LLM_CASSETTE):
+        self.path = path
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry['key'], []).append(entry)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    def find(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                return None
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[index % len(entries)]
+
+    def append(self, entry: Dict[str, Any]):
+        with self._lock:
+            self._entries.setdefault(entry['key'], []).append(entry)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+
+
+class LLMTransport:
+    """LLM 제공자 호출 바로 아래에서 요청/응답을 기록하거나 재생합니다.
+
+    record 모드는 실제 응답과 지연 시간(첫 토큰, 조각 간격)을 카세트에 남기고,
+    replay 모드는 네트워크 없이 카세트의 응답을 같은(또는 설정한) 지연 시간으로 돌려줍니다.
+    게이트웨이의 호출 제한, 단일 비행, 헤징, 라우팅은 그대로 거치므로
+    모델을 제외한 파이프라인 전체를 재현 가능하게 측정할 수 있습니다.
+    """
+
+    def __init__(self, mode: str = LLM_TRANSPORT, cassette_path: str = LLM_CASSETTE,
+                 latency: Optional[LatencyProfile] = None):
+        if mode not in _MODES:
+            raise ValueError(f"알 수 없는 LLM_TRANSPORT 값입니다: {mode}")
+        self.mode = mode
+        self.cassette = Cassette(cassette_path) if mode in ('record', 'replay') else None
+        self.latency = latency or LatencyProfile(LLM_STUB_LATENCY if mode == 'stub' else LLM_REPLAY_LATENCY)
+        self._stats = {"recorded": 0, "replayed": 0, "misses": 0, "stubbed": 0}
+        self._lock = threading.Lock()
+        if self.cassette is not None:
+            print(f"🎞️ LLM 전송 모드: {mode} ({cassette_path}, 기록 {len(self.cassette)}건)")
+        elif mode == 'stub':
+            print(f"🧪 LLM 전송 모드: stub (첫 토큰 {self.latency.spec}, 초당 {LLM_STUB_TOKENS_PER_SEC:g} 토큰)")
+
+    @property
+    def offline(self) -> bool:
+        """실제 제공자를 호출하지 않는 모드인지 (replay, stub)"""
+        return self.mode in ('replay', 'stub')
+
+    def call(self, provider: str, model: str, request: Dict[str, Any], invoke: Callable[[], str]) -> str:
+        """응답 전체를 한 번에 받는 호출"""
+        if self.mode == 'live':
+            return invoke()
+        if self.mode == 'stub':
+            return "".join(self._stub(request))
+        key = self._key(provider, model, request)
+        if self.mode == 'replay':
+            entry = self._find(key)
+            time.sleep(self.latency.first_token(entry['latency']))
+            return "".join(text for _, text in entry['chunks'])
+
+        started = time.monotonic()
+        text = invoke()
+        self._record(key, provider, model, False, time.monotonic() - started, [[0.0, text]])
+        return text
+
+    def stream(self, provider: str, model: str, request: Dict[str, Any],
+               open_stream: Callable[[], Iterator[str]]) -> Iterator[str]:
+        """텍스트 조각을 순서대로 받는 스트리밍 호출"""
+        if self.mode == 'live':
+            yield from open_stream()
+            return
+        if self.mode == 'stub':
+            yield from self._stub(request)
+            return
+        key = self._key(provider, model, request)
+        if self.mode == 'replay':
+            entry = self._find(key)
+            for index, (gap, text) in enumerate(entry['chunks']):
+                time.sleep(self.latency.first_token(entry['latency']) if index == 0 else self.latency.gap(gap))
+                yield text
+            return
+
+        started = time.monotonic()
+        last = None
+        chunks = []
+        first_token = 0.0
+        for text in open_stream():
+            now = time.monotonic()
+            if last is None:
+                first_token = now - started
+            chunks.append([0.0 if last is None else round(now - last, 4), text])
+            last = now
+            yield text
+        # 끝까지 받은 스트림만 기록 (헤징 등으로 중간에 끊긴 응답은 재생할 수 없음)
+        self._record(key, provider, model, True, first_token, chunks)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "mode": self.mode}
+
+    def _stub(self, request: Dict[str, Any]) -> Iterator[str]:
+        """설정한 첫 토큰 지연 시간과 토큰 속도로 가짜 응답 조각을 만듭니다."""
+        self._count("stubbed")
+        time.sleep(self.latency.first_token(0.0))
+        if random.random() < LLM_STUB_ERROR_RATE:
+            raise StubError("stub 모드 오류 주입")
+        tokens = max(1, min(LLM_STUB_OUTPUT_TOKENS, request.get('max_tokens') or LLM_STUB_OUTPUT_TOKENS))
+        gap = _STUB_TOKENS_PER_CHUNK / LLM_STUB_TOKENS_PER_SEC if LLM_STUB_TOKENS_PER_SEC > 0 else 0.0
+        for start in range(0, tokens, _STUB_TOKENS_PER_CHUNK):
+            if start:
+                time.sleep(gap)
+            count = min(_STUB_TOKENS_PER_CHUNK, tokens - start)
+            yield "".join(f"token{index} " for index in range(start, start + count))
+
+    def _key(self, provider: str, model: str, request: Dict[str, Any]) -> str:
+        return make_key('transport', provider, model, request)
+
+    def _find(self, key: str) -> Dict[str, Any]:
+        entry = self.cassette.find(key)
+        if entry is None:
+            self._count("misses")
+            raise CassetteMiss(f"카세트에 기록되지 않은 LLM 요청입니다 ({key[:12]}). "
+                               f"LLM_TRANSPORT=record로 먼저 기록하세요.")
+        self._count("replayed")
+        return entry
+
+    def _record(self, key: str, provider: str, model: str, stream: bool, latency: float,
+                chunks: List[List[Any]]):
+        self.cassette.append({
+            "key": key,
+            "provider": provider,
+            "model": model,
+            "stream": stream,
+            "latency": round(latency, 4),
+            "chunks": chunks,
+            "recorded_at": time.time()
+        })
+        self._count("recorded")
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+_default_transport: Optional[LLMTransport] = None
+_transport_lock = threading.Lock()
+
+
+def get_llm_transport() -> LLMTransport:
+    """프로세스 공용 LLM 전송 계층을 반환합니다."""
+    global _default_transport
+    with _transport_lock:
+        if _default_transport is None:
+            _default_transport = LLMTransport()
+        return _default_transport
@@ -0,0 +1,85 @@
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 이벤트 루프 지연을 측정하는 간격 (초)
+EVENT_LOOP_MONITOR_INTERVAL = float(os.getenv('EVENT_LOOP_MONITOR_INTERVAL', '0.1'))
+# 백분위수를 계산할 최근 표본 수
+EVENT_LOOP_MONITOR_WINDOW = int(os.getenv('EVENT_LOOP_MONITOR_WINDOW', '3000'))
+# 이 시간(초) 이상 루프가 막히면 경고 출력 (블로킹 호출 탐지용)
+EVENT_LOOP_LAG_WARN = float(os.getenv('EVENT_LOOP_LAG_WARN', '0.5'))
+
+
+class EventLoopMonitor:
+    """이벤트 루프 지연(lag)을 측정합니다.
+
+    일정 간격으로 잠들었다 깨어나면서 예정보다 늦게 깨어난 시간을 기록합니다.
+    이벤트 루프에서 블로킹 호출이 실행되면 이 값이 커지므로 동시성 회귀를 잡는 데 씁니다.
+    """
+
+    def __init__(self, interval: float = EVENT_LOOP_MONITOR_INTERVAL, window: int = EVENT_LOOP_MONITOR_WINDOW,
+                 warn_after: float = EVENT_LOOP_LAG_WARN):
+        self.interval = interval
+        self.warn_after = warn_after
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+        self._max = 0.0
+        self._warnings = 0
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def reset(self):
+        """지금까지의 표본을 지웁니다. (벤치마크 구간만 측정할 때)"""
+        self._samples.clear()
+        self._max = 0.0
+        self._warnings = 0
+
+    async def _run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            self._samples.append(lag)
+            self._max = max(self._max, lag)
+            if lag >= self.warn_after:
+                self._warnings += 1
+                print(f"⚠️ 이벤트 루프가 {lag:.2f}초 동안 막혔습니다 (블로킹 호출 확인 필요)")
+
+    def stats(self) -> Dict[str, Any]:
+        samples = sorted(self._samples)
+        return {
+            "samples": len(samples),
+            "p50": _percentile(samples, 50),
+            "p95": _percentile(samples, 95),
+            "p99": _percentile(samples, 99),
+            "max": round(self._max, 4),
+            "warnings": self._warnings
+        }
+
+
+def _percentile(samples, percentile: float) -> float:
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, int(round(percentile / 100 * (len(samples) - 1))))
+    return round(samples[index], 4)
+
+
+# 앱 이벤트 루프 지연 측정기
+event_loop_monitor = EventLoopMonitor()
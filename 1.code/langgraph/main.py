@@ -1,13 +1,32 @@
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Optional
-from prd_agent import PRDAgent
+from typing import Optional, Union, Dict, Any
 from html_agent import HTMLAgent
 from openai_client import OpenAIClient
 from workflow import Workflow
+from concurrency import run_blocking, iterate_blocking, shutdown_executor, workflow_slot
+from job_queue import JobError, JobStore, JobQueue
+from artifact_store import Artifact, get_artifact_store
+from node_uploader import NodeUploader
+from llm_cache import ResponseCache, LLM_CACHE_ENABLED
+from single_flight import llm_single_flight, llm_request_single_flight, make_key
+from llm_gateway import get_llm_gateway
+from rate_limiter import llm_limiters
+from hedging import llm_hedging
+from llm_router import RoutedClient, get_llm_router
+from style_guide_cache import get_style_guide_cache
+from llm_transport import get_llm_transport
+from loop_monitor import event_loop_monitor
+from metrics import (registry, http_request_duration, http_requests_in_flight, cache_lookups,
+                     job_queue_depth, observe_stage)
+from tracing import tracer
+from similarity_cache import SimilarityCache, LLM_SIMILARITY_CACHE, record_prompt
+import dataclasses
 import os
+import json
+import time
 
 app = FastAPI(title="PRD & HTML Generator API", version="1.0.0")
 
@@ -20,8 +39,42 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 엔드포인트별 요청 처리 시간 기록 (/metrics) 및 요청 단위 추적 span 시작
+# 들어온 traceparent 헤더가 있으면 그 추적을 이어가고, 응답 헤더로 추적 ID를 돌려줌
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    http_requests_in_flight.inc()
+    with tracer.span(f"{request.method} {request.url.path}", parent=request.headers.get('traceparent'),
+                     method=request.method, path=request.url.path) as span:
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            if span.recording:
+                response.headers['traceparent'] = span.traceparent
+                response.headers['X-Trace-Id'] = span.trace_id
+            return response
+        finally:
+            http_requests_in_flight.dec()
+            # 경로 파라미터 값 대신 라우트 템플릿(/html/{filename})으로 묶어 레이블 수를 제한
+            route = request.scope.get('route')
+            endpoint = getattr(route, 'path', None) or 'unmatched'
+            http_request_duration.observe(time.perf_counter() - started, method=request.method,
+                                          endpoint=endpoint, status=str(status))
+            if span.recording:
+                span.name = f"{request.method} {endpoint}"
+                span.set_attribute('status', status)
+
 # OpenAI 클라이언트 초기화
 openai_client = OpenAIClient()
+# /llm 호출은 라우터가 지연 시간/오류율/비용 기준으로 OpenAI와 Bedrock 중에서 선택
+llm_client = RoutedClient('fragment', dummy=openai_client._get_dummy_response)
+
+# /llm 응답 캐시 (생성된 페이지가 같은 프롬프트를 반복 요청하므로)
+llm_cache = ResponseCache() if LLM_CACHE_ENABLED else None
+# 문구만 조금 다른 프롬프트용 유사도 캐시 (선택)
+similarity_cache = SimilarityCache() if LLM_SIMILARITY_CACHE else None
 
 # 워크플로우 초기화
 llm_url = os.getenv('LLM_API_URL', 'https://d2co7xon1r3p3l.cloudfront.net/llm')
@@ -38,11 +91,14 @@ class PRDResponse(BaseModel):
     success: bool
     file_path: str
     message: str
+    ir_file_path: Optional[str] = None  # 함께 만든 구조화 PRD (JSON)
 
 # HTML 관련 모델
 class HTMLRequest(BaseModel):
     prd_file_path: str
     llm_api_url: str = None
+    html_url: Optional[str] = None  # 있으면 기존 HTML에 수정 목록만 적용
+    prd_ir_file_path: Optional[str] = None  # 있으면 마크다운 대신 구조화 PRD로 HTML 생성
 
 class HTMLResponse(BaseModel):
     success: bool
@@ -56,6 +112,7 @@ class WorkflowRequest(BaseModel):
     image_url: Optional[str] = None
     html_url: Optional[str] = None
     room_id: Optional[str] = "default"
+    sync: bool = False  # True면 작업 큐를 거치지 않고 완료될 때까지 응답을 기다림
 
 class WorkflowResponse(BaseModel):
     success: bool
@@ -63,6 +120,24 @@ class WorkflowResponse(BaseModel):
     html_file: str
     message: str
 
+# 작업 큐 모델
+class JobSubmitResponse(BaseModel):
+    success: bool
+    job_id: str
+    status: str
+    status_url: str
+    message: str
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    stages: Dict[str, Any]
+    result: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    artifacts: Dict[str, str]
+    created_at: float
+    updated_at: float
+
 # LLM 호출 모델
 class LLMRequest(BaseModel):
     prompt: str
@@ -70,11 +145,65 @@ class LLMRequest(BaseModel):
 class LLMResponse(BaseModel):
     response: str
 
+def _sse_event(data: dict, event: Optional[str] = None) -> str:
+    """Server-Sent Events 형식의 메시지를 만듭니다."""
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+async def _run_workflow_job(job_id: str, request: Dict[str, Any]) -> Dict[str, Any]:
+    """작업 큐 워커가 실행하는 워크플로우 (PRD → HTML → 업로드)"""
+    # 작업을 등록한 요청의 추적에 이어서 기록
+    with tracer.span('job', parent=request.get('traceparent'), job_id=job_id):
+        result = await workflow.run_complete_workflow_async(
+            conversation_summary=request['conversation_summary'],
+            prd_url=request.get('prd_url'),
+            image_url=request.get('image_url'),
+            html_url=request.get('html_url'),
+            owner=job_id,
+            on_stage=lambda stage, seconds: job_store.arecord_stage(job_id, stage, seconds)
+        )
+        
+        started = time.perf_counter()
+        uploaded = await upload_files_to_nodejs(result['prd_artifact'], result['html_artifact'],
+                                                request.get('room_id') or "default", owner=result['owner'])
+        await job_store.arecord_stage(job_id, 'upload', time.perf_counter() - started)
+    
+    outcome = {
+        "prd_file": result['prd_file'],
+        "html_file": result['html_file'],
+        "uploaded": uploaded,
+        "message": result['message']
+    }
+    if not uploaded:
+        # 산출물은 참조가 유지되므로 /jobs에서 로컬 링크로 받을 수 있음
+        raise JobError("Node.js 서버로 산출물을 업로드하지 못했습니다.", result=outcome)
+    return outcome
+
+# 산출물 저장소 및 작업 큐 초기화
+artifact_store = get_artifact_store()
+job_store = JobStore()
+job_queue = JobQueue(job_store, _run_workflow_job)
+job_queue_depth.set_function(job_queue.depth)
+# Node.js 업로드 클라이언트 (앱 수명 동안 연결 풀 재사용)
+node_uploader = NodeUploader()
+
 # 워크플로우 API 엔드포인트 (PRD → HTML 자동 생성)
-@app.post("/workflow", response_model=WorkflowResponse)
+# 기본은 작업을 큐에 넣고 작업 ID를 바로 반환하며, sync=true면 완료까지 기다림
+@app.post("/workflow", response_model=Union[WorkflowResponse, JobSubmitResponse])
 async def run_workflow(request: WorkflowRequest):
+    if not request.sync:
+        job_id = await job_queue.enqueue({**request.dict(exclude={'sync'}),
+                                    'traceparent': tracer.current_span().traceparent})
+        return JobSubmitResponse(
+            success=True,
+            job_id=job_id,
+            status="queued",
+            status_url=f"/jobs/{job_id}",
+            message="워크플로우 작업이 등록되었습니다."
+        )
+    
     try:
-        result = workflow.run_complete_workflow(
+        result = await workflow.run_complete_workflow_async(
             conversation_summary=request.conversation_summary,
             prd_url=request.prd_url,
             image_url=request.image_url,
@@ -82,91 +211,208 @@ async def run_workflow(request: WorkflowRequest):
         )
         
         # Node.js 서버로 파일 업로드 요청
-        await upload_files_to_nodejs(result['prd_file'], result['html_file'], request.room_id)
+        uploaded = await upload_files_to_nodejs(result['prd_artifact'], result['html_artifact'],
+                                                request.room_id, owner=result['owner'])
         
         return WorkflowResponse(
-            success=result['success'],
+            success=result['success'] and uploaded,
             prd_file=result['prd_file'],
             html_file=result['html_file'],
-            message=result['message']
+            message=result['message'] if uploaded else "PRD와 HTML은 생성되었지만 Node.js 서버 업로드에 실패했습니다."
         )
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"워크플로우 실행 중 오류 발생: {str(e)}")
 
-async def upload_files_to_nodejs(prd_file_path: str, html_file_path: str, room_id: str = "default"):
-    """생성된 파일들을 Node.js 서버의 기존 업로드 API로 업로드"""
-    import aiohttp
-    import os
+@app.get("/jobs/{job_id}", response_model=JobStatusResponse)
+async def get_job_status(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
     
-    nodejs_url = os.getenv('NODEJS_URL', 'http://localhost:3000')
+    # 업로드에 성공한 산출물은 참조가 해제되어 지워질 수 있으므로 아직 남아 있는 것만 링크로 반환
+    artifacts = {}
+    if job['result']:
+        for kind in ('prd', 'html'):
+            filename = os.path.basename(job['result'][f'{kind}_file'])
+            if artifact_store.get(kind, filename) is not None:
+                artifacts[kind] = f"/{kind}/{filename}"
     
-    try:
-        # 파일 내용을 텍스트로 읽기
-        with open(prd_file_path, 'r', encoding='utf-8') as f:
-            prd_content = f.read()
-        with open(html_file_path, 'r', encoding='utf-8') as f:
-            html_content = f.read()
-        
-        async with aiohttp.ClientSession() as session:
-            # PRD 파일 업로드
-            prd_data = aiohttp.FormData()
-            prd_data.add_field('prd', prd_content, filename=os.path.basename(prd_file_path), content_type='text/markdown')
-            prd_data.add_field('uploadedBy', 'fastapi-agent')
-            
-            async with session.post(f'{nodejs_url}/api/rooms/{room_id}/prd', data=prd_data) as response:
-                if response.status == 200:
-                    print(f"PRD 파일 업로드 성공: {prd_file_path}")
-                else:
-                    print(f"PRD 파일 업로드 실패: {response.status}")
-        
-            # HTML 파일 업로드
-            html_data = aiohttp.FormData()
-            html_data.add_field('html', html_content, filename=os.path.basename(html_file_path), content_type='text/html')
-            html_data.add_field('userId', 'fastapi-agent')
-            
-            async with session.post(f'{nodejs_url}/api/rooms/{room_id}/html', data=html_data) as response:
-                if response.status == 200:
-                    print(f"HTML 파일 업로드 성공: {html_file_path}")
-                else:
-                    print(f"HTML 파일 업로드 실패: {response.status}")
-        
-        # 로컬 파일 삭제 (TODO 항목)
+    return JobStatusResponse(
+        job_id=job['id'],
+        status=job['status'],
+        stages=job['stages'],
+        result=job['result'],
+        error=job['error'],
+        artifacts=artifacts,
+        created_at=job['created_at'],
+        updated_at=job['updated_at']
+    )
+
+# 워크플로우 스트리밍 API 엔드포인트 (PRD 완료, HTML 조각, 완료 이벤트를 SSE로 전달)
+@app.post("/workflow/stream")
+async def run_workflow_stream(request: WorkflowRequest):
+    async def event_stream():
         try:
-            os.unlink(prd_file_path)
-            os.unlink(html_file_path)
-            print(f"로컬 파일 삭제 완료: {prd_file_path}, {html_file_path}")
+            async with workflow_slot():
+                async for item in iterate_blocking(workflow.run_complete_workflow_stream(
+                    conversation_summary=request.conversation_summary,
+                    prd_url=request.prd_url,
+                    image_url=request.image_url,
+                    html_url=request.html_url
+                )):
+                    event = item.pop("event")
+                    if event == "done":
+                        # 방에 결과가 올라간 뒤에 완료 이벤트 전송
+                        uploaded = await upload_files_to_nodejs(item.pop('prd_artifact'), item.pop('html_artifact'),
+                                                                request.room_id, owner=item.pop('owner'))
+                        if not uploaded:
+                            yield _sse_event({"detail": "Node.js 서버로 산출물을 업로드하지 못했습니다.",
+                                              "prd_file": item['prd_file'], "html_file": item['html_file']},
+                                             event="error")
+                            return
+                    yield _sse_event(item, event=event)
         except Exception as e:
-            print(f"파일 삭제 실패: {e}")
-            
+            print(f"워크플로우 스트리밍 오류: {e}")
+            yield _sse_event({"detail": f"워크플로우 실행 중 오류 발생: {str(e)}"}, event="error")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def upload_files_to_nodejs(prd: Artifact, html: Artifact, room_id: str = "default",
+                                 owner: Optional[str] = None) -> bool:
+    """생성된 산출물을 Node.js 서버의 기존 업로드 API로 업로드하고 성공 여부를 반환합니다.
+
+    (owner: 산출물을 참조한 작업 ID) 실패하면 산출물 참조를 유지하므로 /prd, /html로 계속 받을 수 있습니다.
+    """
+    try:
+        with observe_stage('upload', room_id=room_id):
+            uploaded = await node_uploader.upload_artifacts(room_id, prd, html)
     except Exception as e:
         print(f"Node.js 업로드 오류: {e}")
-        # 업로드 실패해도 워크플로우는 계속 진행
+        return False
+    
+    # 로컬 파일 삭제 (다른 작업이 같은 내용을 참조 중이면 유지)
+    if uploaded and owner:
+        try:
+            artifact_store.release(owner)
+        except Exception as e:
+            print(f"파일 삭제 실패: {e}")
+    return uploaded
+
+def _llm_cache_key(prompt: str) -> Optional[str]:
+    if llm_cache is None:
+        return None
+    return llm_cache.make_key(prompt, llm_client.model, llm_client.temperature)
+
+def _llm_namespace() -> str:
+    return f"{llm_client.model}:{llm_client.temperature}"
+
+async def _lookup_llm_response(cache_key: Optional[str], prompt: str) -> Optional[str]:
+    """정확히 일치하는 캐시를 먼저 보고, 없으면 유사도 캐시를 찾습니다."""
+    if cache_key:
+        cached = await llm_cache.aget(cache_key)
+        cache_lookups.inc(cache='exact', result='hit' if cached is not None else 'miss')
+        if cached is not None:
+            print(f"LLM 캐시 적중: {prompt[:50]}...")
+            return cached
+    if similarity_cache is not None:
+        hit = similarity_cache.get(prompt, _llm_namespace())
+        cache_lookups.inc(cache='similarity', result='hit' if hit is not None else 'miss')
+        if hit is not None:
+            print(f"LLM 유사 캐시 적중 (유사도 {hit[1]:.2f}): {prompt[:50]}...")
+            return hit[0]
+    return None
+
+async def _store_llm_response(cache_key: Optional[str], prompt: str, content: str):
+    """정상 응답만 캐시에 저장합니다. (장애 시 더미 응답은 저장하지 않음)"""
+    if not content or content == llm_client._get_dummy_response(prompt):
+        return
+    if cache_key:
+        await llm_cache.aset(cache_key, content)
+    if similarity_cache is not None:
+        similarity_cache.set(prompt, content, _llm_namespace())
 
 # LLM API 엔드포인트 (HTML에서 호출용)
 @app.post("/llm", response_model=LLMResponse)
 async def call_llm(request: LLMRequest):
-    try:
+    record_prompt(request.prompt)
+    cache_key = _llm_cache_key(request.prompt)
+    cached = await _lookup_llm_response(cache_key, request.prompt)
+    if cached is not None:
+        return LLMResponse(response=cached)
+    
+    async def generate() -> str:
         print(f"LLM API 호출 시작: {request.prompt[:50]}...")
-        content = openai_client.generate_text(request.prompt)
+        content = await run_blocking(llm_client.generate_text, request.prompt)
         print(f"LLM API 응답 완료: {len(content)} 문자")
+        await _store_llm_response(cache_key, request.prompt, content)
+        return content
+    
+    try:
+        # 같은 프롬프트가 동시에 들어오면 호출 하나의 결과를 나눠 받음 (기다리는 요청은 스레드를 쓰지 않음)
+        content = await llm_request_single_flight.ado(make_key('/llm', llm_client.model, request.prompt), generate)
         return LLMResponse(response=content)
     except Exception as e:
         print(f"LLM API 오류: {e}")
         # 에러시에도 유용한 더미 데이터 반환
-        dummy_response = openai_client._get_dummy_response(request.prompt)
+        dummy_response = llm_client._get_dummy_response(request.prompt)
         return LLMResponse(response=dummy_response)
 
 @app.options("/llm")
 async def llm_options():
     return {"message": "OK"}
 
+# LLM 스트리밍 API 엔드포인트 (첫 토큰부터 바로 전달)
+@app.post("/llm/stream")
+async def call_llm_stream(request: LLMRequest):
+    async def event_stream():
+        record_prompt(request.prompt)
+        cache_key = _llm_cache_key(request.prompt)
+        cached = await _lookup_llm_response(cache_key, request.prompt)
+        if cached is not None:
+            yield _sse_event({"delta": cached})
+            yield _sse_event({"length": len(cached), "cached": True}, event="done")
+            return
+        
+        # 스트림은 조각을 받는 즉시 보내야 하므로 진행 중인 같은 호출에 합류하지 않음
+        # (끝난 응답은 캐시로 공유되고, 게이트웨이의 호출 합치기도 전체 응답 호출에만 적용됨)
+        print(f"LLM 스트리밍 호출 시작: {request.prompt[:50]}...")
+        parts = []
+        try:
+            async for delta in iterate_blocking(llm_client.generate_text_stream(request.prompt)):
+                parts.append(delta)
+                yield _sse_event({"delta": delta})
+            content = "".join(parts)
+            print(f"LLM 스트리밍 응답 완료: {len(content)} 문자")
+            await _store_llm_response(cache_key, request.prompt, content)
+        except Exception as e:
+            # 중간에 끊긴 응답은 캐시하지 않고, 클라이언트가 스트림 종료를 알 수 있도록 done까지 보냄
+            print(f"LLM 스트리밍 오류: {e}")
+            yield _sse_event({"detail": f"LLM 호출 중 오류 발생: {str(e)}"}, event="error")
+            yield _sse_event({"length": sum(len(part) for part in parts), "error": True}, event="done")
+            return
+        yield _sse_event({"length": len(content)}, event="done")
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.options("/llm/stream")
+async def llm_stream_options():
+    return {"message": "OK"}
+
 # PRD API 엔드포인트
 @app.post("/generate-prd", response_model=PRDResponse)
 async def generate_prd(request: PRDRequest):
     try:
-        agent = PRDAgent()
-        prd_file = agent.generate_prd(
+        prd = await run_blocking(
+            workflow.prd_agent.create_prd,
             conversation_summary=request.conversation_summary,
             prd_url=request.prd_url,
             image_url=request.image_url,
@@ -175,8 +421,9 @@ async def generate_prd(request: PRDRequest):
         
         return PRDResponse(
             success=True,
-            file_path=prd_file,
-            message="PRD 파일이 성공적으로 생성되었습니다."
+            file_path=prd.path,
+            message="PRD 파일이 성공적으로 생성되었습니다.",
+            ir_file_path=prd.ir.path if prd.ir else None
         )
     
     except Exception as e:
@@ -184,15 +431,12 @@ async def generate_prd(request: PRDRequest):
 
 @app.get("/prd/{filename}")
 async def get_prd_content(filename: str):
+    artifact = artifact_store.get('prd', filename)
+    if artifact is None:
+        raise HTTPException(status_code=404, detail="PRD 파일을 찾을 수 없습니다.")
+    
     try:
-        file_path = os.path.join("prd_outputs", filename)
-        if not os.path.exists(file_path):
-            raise HTTPException(status_code=404, detail="PRD 파일을 찾을 수 없습니다.")
-        
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        return {"filename": filename, "content": content}
+        return {"filename": filename, "content": await run_blocking(artifact.read)}
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"파일 읽기 오류: {str(e)}")
@@ -200,12 +444,21 @@ async def get_prd_content(filename: str):
 # HTML API 엔드포인트
 @app.post("/generate-html", response_model=HTMLResponse)
 async def generate_html(request: HTMLRequest):
+    # 찾지 못한 파일은 아래의 500 처리에 섞이지 않도록 먼저 404로 응답
+    prd = artifact_store.get_by_path(request.prd_file_path, 'prd')
+    if prd is None:
+        raise HTTPException(status_code=404, detail="PRD 파일을 찾을 수 없습니다.")
+    if request.prd_ir_file_path:
+        # 임의의 경로를 열지 않도록 prd_ir 산출물 디렉터리 안에서 파일 이름으로만 찾음
+        prd_ir = artifact_store.get('prd_ir', os.path.basename(request.prd_ir_file_path))
+        if prd_ir is None:
+            raise HTTPException(status_code=404, detail="구조화 PRD 파일을 찾을 수 없습니다.")
+        prd = dataclasses.replace(prd, ir=prd_ir)
+    
     try:
-        if not os.path.exists(request.prd_file_path):
-            raise HTTPException(status_code=404, detail="PRD 파일을 찾을 수 없습니다.")
-        
-        agent = HTMLAgent(request.llm_api_url)
-        output_file = agent.generate_html(request.prd_file_path)
+        # 에이전트는 공용 LLM 게이트웨이를 쓰므로 요청마다 만들어도 새 연결을 맺지 않음
+        agent = HTMLAgent(request.llm_api_url) if request.llm_api_url else workflow.html_agent
+        output_file = (await run_blocking(agent.create_html, prd, html_url=request.html_url)).path
         
         return HTMLResponse(
             success=True,
@@ -217,11 +470,59 @@ async def generate_html(request: HTMLRequest):
 
 @app.get("/html/{filename}")
 async def get_html_file(filename: str):
-    file_path = f"html_outputs/{filename}"
-    if not os.path.exists(file_path):
+    artifact = artifact_store.get('html', filename)
+    if artifact is None:
         raise HTTPException(status_code=404, detail="HTML 파일을 찾을 수 없습니다.")
     
-    return FileResponse(file_path, media_type="text/html")
+    # 아직 해시 이름의 파일로 저장되지 않았거나 파일 저장을 끈 경우 내용을 그대로 응답
+    if artifact.content is not None or artifact.staged_path:
+        return Response(await run_blocking(artifact.read), media_type="text/html")
+    return FileResponse(artifact.path, media_type="text/html")
+
+@app.on_event("startup")
+async def startup_event():
+    event_loop_monitor.start()
+    await node_uploader.start()
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    await node_uploader.close()
+    shutdown_executor()
+    artifact_store.close()
+    job_store.close()
+    await event_loop_monitor.stop()
+    tracer.flush()
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+        "similarity_cache": similarity_cache.stats() if similarity_cache else None,
+        "style_guide_cache": get_style_guide_cache().stats() if get_style_guide_cache() else None,
+        "single_flight": llm_single_flight.stats(),
+        "request_single_flight": llm_request_single_flight.stats(),
+        "llm_gateway": get_llm_gateway().stats(),
+        "rate_limits": llm_limiters.stats(),
+        "hedging": llm_hedging.stats(),
+        "router": get_llm_router().stats(),
+        "transport": get_llm_transport().stats(),
+        "artifacts": artifact_store.stats(),
+        "event_loop": event_loop_monitor.stats(),
+        "tracing": tracer.stats()
+    }
+
+# Prometheus 형식 지표 (요청/단계별 지연 시간 히스토그램, 토큰/폴백/캐시 카운터, 진행 중 워크플로우)
+@app.get("/metrics")
+async def get_metrics():
+    return Response(registry.render(), media_type=registry.content_type)
+
+# 이벤트 루프 지연 표본 초기화 (벤치마크 구간만 측정할 때)
+@app.post("/stats/event-loop/reset")
+async def reset_event_loop_stats():
+    event_loop_monitor.reset()
+    return {"message": "OK"}
 
 @app.get("/health")
 async def health_check():
@@ -0,0 +1,262 @@
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from dotenv import load_dotenv
+from tracing import tracer
+
+# .env 파일 로드
+load_dotenv()
+
+# 지연 시간 히스토그램 구간 경계 (초, LLM 호출처럼 긴 요청까지 포함)
+METRICS_LATENCY_BUCKETS = tuple(
+    float(value) for value in
+    os.getenv('METRICS_LATENCY_BUCKETS', '0.005,0.01,0.025,0.05,0.1,0.25,0.5,1,2.5,5,10,30,60,120,300').split(',')
+)
+
+LabelValues = Tuple[str, ...]
+
+
+class _Metric:
+    """이름, 설명, 레이블 이름을 가진 지표의 공통 부분"""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} 레이블이 맞지 않습니다: {sorted(labels)} (필요: {list(self.label_names)})")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def _format_labels(self, values: LabelValues, extra: Optional[Dict[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, values)) + list((extra or {}).items())
+        if not pairs:
+            return ''
+        return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        return lines + self._samples()
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """증가만 하는 누적 값"""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Gauge(_Metric):
+    """현재 값 (진행 중인 작업 수, 큐 길이 등)"""
+
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        super().__init__(name, documentation, labels)
+        self._values: Dict[LabelValues, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1, **labels: str):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        """수집할 때마다 함수를 호출해 값을 읽습니다. (레이블 없는 지표 전용)"""
+        self._function = function
+
+    @contextmanager
+    def track(self, **labels: str) -> Iterator[None]:
+        """블록을 실행하는 동안 값을 1 올려 둡니다."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_number(self._function())}"]
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{self._format_labels(key)} {_number(value)}" for key, value in values]
+
+
+class Histogram(_Metric):
+    """구간별 관측 횟수와 합계 (지연 시간 분포)"""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = METRICS_LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._counts: Dict[LabelValues, List[int]] = {}
+        self._sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = self._key(labels)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self._sums[key] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """블록 실행 시간을 관측합니다. (예외가 나도 기록)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            entries = sorted((key, list(counts), self._sums[key]) for key, counts in self._counts.items())
+        lines = []
+        for key, counts, total in entries:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = '+Inf' if bound == math.inf else _number(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, {'le': le})} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {_number(total)}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """등록된 지표를 Prometheus 텍스트 형식으로 내보냅니다."""
+
+    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"이미 등록된 지표입니다: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = METRICS_LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    return repr(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# 프로세스 전체에서 공유하는 지표
+registry = MetricsRegistry()
+
+http_request_duration = registry.histogram(
+    'http_request_duration_seconds', 'HTTP 요청 처리 시간 (스트리밍 응답은 응답 시작까지)',
+    ('method', 'endpoint', 'status'))
+http_requests_in_flight = registry.gauge('http_requests_in_flight', '처리 중인 HTTP 요청 수')
+stage_duration = registry.histogram(
+    'pipeline_stage_duration_seconds',
+    '파이프라인 단계별 소요 시간 (scenario_detection, image_download, html_fetch, image_css_analysis, '
+    'prd_generation, prd_outline, prd_section, prd_ir, html_patch, html_generation, upload)',
+    ('stage',))
+llm_input_tokens = registry.counter('llm_input_tokens_total', '모델별 입력 토큰 수', ('provider', 'model'))
+llm_output_tokens = registry.counter('llm_output_tokens_total', '모델별 출력 토큰 수', ('provider', 'model'))
+llm_fallbacks = registry.counter(
+    'llm_fallbacks_total',
+    '대체 경로 사용 횟수 (failover: 다음 후보 모델로 전환, content: 폴백 PRD/오류 HTML 생성, aborted: 스트리밍 도중 실패로 HTML 폐기, patch: 패치 실패로 전체 재생성)',
+    ('call_class', 'kind'))
+llm_dummy_responses = registry.counter('llm_dummy_responses_total', '모든 후보가 실패해 더미 응답을 돌려준 횟수',
+                                       ('call_class',))
+cache_lookups = registry.counter(
+    'llm_cache_lookups_total', '/llm 응답 캐시, 이미지 스타일 가이드 캐시, 이미지 조건부 요청 결과', ('cache', 'result'))
+image_bytes = registry.histogram(
+    'image_ingest_bytes', '비전 모델 입력 이미지 크기 (source: 내려받은 원본, payload: 축소/재압축 후)', ('kind',),
+    buckets=(64 * 1024, 256 * 1024, 512 * 1024, 1024 ** 2, 2 * 1024 ** 2, 5 * 1024 ** 2, 10 * 1024 ** 2, 20 * 1024 ** 2))
+workflows_in_flight = registry.gauge('workflows_in_flight', '실행 중인 워크플로우 수')
+job_queue_depth = registry.gauge('job_queue_depth', '대기 중인 워크플로우 작업 수')
+
+
+@contextmanager
+def observe_stage(stage: str, **attributes):
+    """파이프라인 단계 하나의 소요 시간을 기록하고 같은 이름의 추적 span을 엽니다. (span을 반환)"""
+    started = time.perf_counter()
+    try:
+        with tracer.span(stage, **attributes) as span:
+            yield span
+    finally:
+        stage_duration.observe(time.perf_counter() - started, stage=stage)
+
+
+def record_tokens(provider: str, model: str, input_tokens: Optional[int], output_tokens: Optional[int]):
+    """제공자가 알려준 토큰 사용량을 기록합니다."""
+    tracer.current_span().set_attributes(input_tokens=input_tokens, output_tokens=output_tokens)
+    if input_tokens:
+        llm_input_tokens.inc(input_tokens, provider=provider, model=model)
+    if output_tokens:
+        llm_output_tokens.inc(output_tokens, provider=provider, model=model)
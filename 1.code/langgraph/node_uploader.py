@@ -0,0 +1,104 @@
+import asyncio
+import os
+from typing import Optional
+import aiohttp
+from dotenv import load_dotenv
+from artifact_store import Artifact
+from concurrency import run_blocking
+from tracing import tracer
+
+# .env 파일 로드
+load_dotenv()
+
+NODEJS_URL = os.getenv('NODEJS_URL', 'http://localhost:3000')
+# 업로드 재시도 횟수 (첫 시도 포함)
+NODE_UPLOAD_RETRIES = int(os.getenv('NODE_UPLOAD_RETRIES', '3'))
+# 업로드 요청 전체 제한 시간 (초)
+NODE_UPLOAD_TIMEOUT = float(os.getenv('NODE_UPLOAD_TIMEOUT', '30'))
+# Node.js 서버로 유지할 최대 연결 수
+NODE_UPLOAD_POOL_SIZE = int(os.getenv('NODE_UPLOAD_POOL_SIZE', '32'))
+# 유휴 keep-alive 연결 유지 시간 (초)
+NODE_UPLOAD_KEEPALIVE = float(os.getenv('NODE_UPLOAD_KEEPALIVE', '30'))
+
+# (업로드 경로, 폼 필드 이름, 업로더 필드 이름, content type)
+_UPLOAD_TARGETS = {
+    'prd': ('prd', 'prd', 'uploadedBy', 'text/markdown'),
+    'html': ('html', 'html', 'userId', 'text/html'),
+}
+
+
+class NodeUploader:
+    """산출물을 Node.js 서버의 방 업로드 API로 전송합니다.
+
+    앱 수명 동안 하나의 세션(연결 풀)을 재사용하고, PRD와 HTML을 동시에 올리며,
+    일시적인 실패는 지수 백오프로 재시도합니다.
+    """
+
+    def __init__(self, base_url: str = NODEJS_URL, retries: int = NODE_UPLOAD_RETRIES,
+                 timeout: float = NODE_UPLOAD_TIMEOUT, pool_size: int = NODE_UPLOAD_POOL_SIZE):
+        self.base_url = base_url.rstrip('/')
+        self.retries = max(1, retries)
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def start(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=NODE_UPLOAD_KEEPALIVE)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def upload_artifacts(self, room_id: str, prd: Artifact, html: Artifact) -> bool:
+        """PRD와 HTML을 동시에 업로드하고, 둘 다 성공했는지 반환합니다."""
+        if self._session is None:
+            await self.start()
+        results = await asyncio.gather(
+            self._upload(room_id, prd),
+            self._upload(room_id, html),
+            return_exceptions=True
+        )
+        for artifact, result in zip((prd, html), results):
+            if isinstance(result, Exception):
+                print(f"{artifact.kind.upper()} 파일 업로드 오류: {result}")
+        return all(result is True for result in results)
+
+    async def _upload(self, room_id: str, artifact: Artifact) -> bool:
+        path, field, uploader_field, content_type = _UPLOAD_TARGETS[artifact.kind]
+        url = f"{self.base_url}/api/rooms/{room_id}/{path}"
+        # 스트리밍 HTML은 임시 파일에 있을 수 있으므로 파일 읽기는 스레드 풀에서
+        content = await run_blocking(artifact.read)
+
+        with tracer.span(f'upload.{artifact.kind}', url=url, bytes=len(content)) as span:
+            headers = {'traceparent': span.traceparent} if span.recording else None
+            for attempt in range(1, self.retries + 1):
+                # FormData는 한 번 전송하면 재사용할 수 없으므로 시도마다 새로 만듦
+                data = aiohttp.FormData()
+                data.add_field(field, content, filename=artifact.filename, content_type=content_type)
+                data.add_field(uploader_field, 'fastapi-agent')
+
+                span.set_attribute('attempts', attempt)
+                try:
+                    # Node.js 서버가 같은 추적에 이어서 기록할 수 있도록 traceparent 헤더 전달
+                    async with self._session.post(url, data=data, headers=headers) as response:
+                        span.set_attribute('status', response.status)
+                        if response.status == 200:
+                            print(f"{artifact.kind.upper()} 파일 업로드 성공: {artifact.path}")
+                            return True
+                        print(f"{artifact.kind.upper()} 파일 업로드 실패: {response.status} "
+                              f"(시도 {attempt}/{self.retries})")
+                        # 요청 자체가 잘못된 경우는 재시도해도 같으므로 중단 (429 제외)
+                        if 400 <= response.status < 500 and response.status != 429:
+                            return False
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    print(f"{artifact.kind.upper()} 파일 업로드 오류: {e} (시도 {attempt}/{self.retries})")
+
+                if attempt < self.retries:
+                    await asyncio.sleep(0.5 * 2 ** (attempt - 1))
+            return False
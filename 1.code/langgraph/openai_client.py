@@ -1,7 +1,7 @@
 import os
-from typing import Optional
+from typing import Iterator, Optional
 from dotenv import load_dotenv
-from openai import OpenAI
+from llm_gateway import get_llm_gateway, user_message
 
 # .env 파일 로드
 load_dotenv()
@@ -12,8 +12,8 @@ class OpenAIClient:
         if not self.api_key:
             raise ValueError("OPEN_AI_KEY가 .env 파일에 설정되지 않았습니다.")
         
-        self.client = OpenAI(api_key=self.api_key)
-        self.model = "gpt-3.5-turbo"
+        self.gateway = get_llm_gateway()
+        self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
         self.max_tokens = 8000
         self.temperature = float(os.getenv('MODEL_TEMPERATURE', '0'))
         
@@ -22,20 +22,15 @@ class OpenAIClient:
     def generate_text(self, prompt: str, max_tokens: Optional[int] = None) -> str:
         """OpenAI를 사용하여 텍스트를 생성합니다."""
         try:
-            tokens = max_tokens or self.max_tokens
-            
             print(f"OpenAI 호출 시작: 모델 {self.model}")
             
-            response = self.client.chat.completions.create(
+            content = self.gateway.generate(
+                user_message(prompt),
+                provider='openai',
                 model=self.model,
-                messages=[
-                    {"role": "user", "content": prompt}
-                ],
-                max_tokens=tokens,
+                max_tokens=max_tokens or self.max_tokens,
                 temperature=self.temperature
             )
-            
-            content = response.choices[0].message.content
             print(f"OpenAI 응답 성공: {len(content)} 문자")
             return content
             
@@ -45,6 +40,29 @@ class OpenAIClient:
             # API 키 문제시 더미 데이터 반환
             return self._get_dummy_response(prompt)
     
+    def generate_text_stream(self, prompt: str, max_tokens: Optional[int] = None) -> Iterator[str]:
+        """OpenAI 스트리밍 API로 텍스트를 생성하며 토큰 조각 단위로 반환합니다."""
+        emitted = False
+        try:
+            print(f"OpenAI 스트리밍 호출 시작: 모델 {self.model}")
+            
+            for delta in self.gateway.generate_stream(
+                user_message(prompt),
+                provider='openai',
+                model=self.model,
+                max_tokens=max_tokens or self.max_tokens,
+                temperature=self.temperature
+            ):
+                emitted = True
+                yield delta
+            
+        except Exception as e:
+            print(f"OpenAI 스트리밍 오류: {e}")
+            # 아직 아무것도 보내지 않았다면 더미 데이터로 대체
+            if not emitted:
+                print("더미 데이터로 대체합니다.")
+                yield self._get_dummy_response(prompt)
+    
     def _get_dummy_response(self, prompt: str) -> str:
         """OpenAI 실패시 더미 응답을 생성합니다."""
         if "검색" in prompt or "조회" in prompt:
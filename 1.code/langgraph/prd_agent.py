@@ -1,90 +1,46 @@
-from typing import Dict, Optional, Any
+from typing import Dict, Optional, Any, Tuple
 from datetime import datetime
 import os
-import json
-import boto3
-import base64
-import requests
 from dotenv import load_dotenv
+from artifact_store import Artifact, ArtifactStore, get_artifact_store
+from concurrency import StageGraph
+from html_patch import fetch_html
+from llm_gateway import user_message
+from llm_router import get_llm_router
+from image_ingest import fetch_image
+from metrics import cache_lookups, image_bytes, llm_fallbacks, observe_stage
+from prd_ir import IR_EXAMPLE, PRD_IR_ENABLED, PRD_IR_MAX_TOKENS, PRDIR, parse_prd_ir
+from style_guide_cache import StyleGuideCache, get_style_guide_cache
+from tracing import tracer
 
 # 환경 변수 로드
 load_dotenv()
 
-class PRDAgent:
-    def __init__(self):
-        self.output_dir = "prd_outputs"
-        os.makedirs(self.output_dir, exist_ok=True)
-        
-        # Bedrock 클라이언트 초기화
-        self.bedrock_client = boto3.client(
-            'bedrock-runtime',
-            region_name=os.getenv('AWS_REGION', 'us-east-1'),
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY')
-        )
-        
-        self.model_id = os.getenv('BEDROCK_MODEL_ID', 'us.anthropic.claude-opus-4-1-20250805-v1:0')
-    
-    def generate_prd(self, 
-                    conversation_summary: str,
-                    prd_url: Optional[str] = None,
-                    image_url: Optional[str] = None,
-                    html_url: Optional[str] = None) -> str:
-        """PRD 생성 메인 함수"""
-        
-        print(f"PRD 생성 시작: {conversation_summary[:50]}...")
-        
-        # 시나리오 결정
-        scenario = self._determine_scenario(prd_url, image_url, html_url)
-        print(f"시나리오: {scenario}")
-        
-        # Bedrock API로 PRD 생성
-        try:
-            prd_content = self._generate_prd_with_bedrock(conversation_summary, scenario, image_url, html_url)
-            print("✅ Bedrock API로 PRD 생성 완료")
-        except Exception as e:
-            print(f"❌ Bedrock API 오류: {e}")
-            prd_content = self._create_fallback_prd(conversation_summary, scenario)
-            print("✅ 폴백 PRD 생성 완료")
-        
-        # 파일 저장
-        filename = "prd.md"
-        filepath = os.path.join(self.output_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(prd_content)
-        
-        print(f"✅ PRD 파일 저장: {filepath}")
-        return filepath
-    
-    def _download_and_encode_image(self, image_url: str) -> Optional[Dict]:
-        """이미지를 다운로드하고 base64로 인코딩합니다."""
-        try:
-            response = requests.get(image_url, timeout=30)
-            response.raise_for_status()
-            
-            image_data = base64.b64encode(response.content).decode('utf-8')
-            content_type = response.headers.get('content-type', 'image/jpeg')
-            if not content_type.startswith('image/'):
-                content_type = 'image/jpeg'
-            
-            return {
-                'data': image_data,
-                'media_type': content_type
-            }
-        except Exception as e:
-            print(f"이미지 다운로드 오류: {e}")
-            return None
-    
-    def _analyze_image_for_css(self, image_url: str) -> str:
-        """이미지를 분석하여 상세한 CSS 정보를 생성합니다."""
-        print(f"이미지 CSS 분석 시작: {image_url}")
-        
-        image_data = self._download_and_encode_image(image_url)
-        if not image_data:
-            return ""
-        
-        css_prompt = """이 이미지를 정확히 분석하여 동일한 디자인을 구현할 수 있는 상세한 CSS 정보를 생성해주세요.
+# 수정 시나리오에서 기존 HTML(html_url)을 PRD 프롬프트에 넣을 최대 글자 수 (0이면 가져오지 않음)
+PRD_HTML_CONTEXT_CHARS = int(os.getenv('PRD_HTML_CONTEXT_CHARS', '8000'))
+# true면 PRD 생성이 이미지 스타일 분석을 기다리지 않고 동시에 시작하고, 스타일 가이드는 완성된 PRD에 끼워 넣음
+PRD_STYLE_GUIDE_OVERLAP = os.getenv('PRD_STYLE_GUIDE_OVERLAP', 'false').lower() == 'true'
+# true면 짧은 개요 호출 뒤 섹션별로 동시에 생성해 순서대로 합침 (PRD 시간이 섹션 하나의 생성 시간 수준으로 줄어듦)
+PRD_SECTIONAL = os.getenv('PRD_SECTIONAL', 'false').lower() == 'true'
+# 섹션별 생성 모드의 개요 / 섹션 하나의 최대 출력 토큰
+PRD_OUTLINE_MAX_TOKENS = int(os.getenv('PRD_OUTLINE_MAX_TOKENS', '600'))
+PRD_SECTION_MAX_TOKENS = int(os.getenv('PRD_SECTION_MAX_TOKENS', '1200'))
+
+_STYLE_GUIDE_ANCHOR = '## HTML 에이전트 실행 가이드'
+
+# 섹션별 생성 모드의 PRD 섹션 (제목, 작성 지침), 이 순서대로 합침
+# 이미지 기반 스타일 가이드는 생성하지 않고 분석 결과를 그대로 실행 가이드 앞에 넣음
+_PRD_SECTIONS = (
+    ('프로젝트 개요', '첫 줄에 "### 프로젝트명", 다음 줄에 프로젝트 이름만 쓰고, 목적, 대상 사용자, 범위를 정리'),
+    ('요구사항 분석', '기능 요구사항과 비기능 요구사항을 목록으로 정리'),
+    ('기술적 구현 사항', '화면 구성, 주요 컴포넌트, 상태 관리, 사용할 웹 기술'),
+    ('HTML 에이전트 실행 가이드', 'HTML 에이전트가 따라야 할 레이아웃, 섹션 배치, 상호작용을 단계별로 지시'),
+    ('데이터 처리 요구사항', '동적 데이터 생성을 위한 LLM API 호출 코드를 JavaScript로 포함'),
+    ('품질 보증 체크리스트', '검증 가능한 항목을 "- [ ]" 체크리스트로 작성'),
+)
+
+# 이미지 CSS 분석 프롬프트 (내용이 바뀌면 스타일 가이드 캐시 키도 바뀜)
+_CSS_PROMPT = """이 이미지를 정확히 분석하여 동일한 디자인을 구현할 수 있는 상세한 CSS 정보를 생성해주세요.
 
 다음 형식으로 응답해주세요:
 
@@ -113,44 +69,179 @@ class PRDAgent:
 
 이미지에서 보이는 모든 디자인 요소를 구체적으로 분석하여 CSS로 재현 가능한 정보를 제공해주세요."""
 
+class PRDAgent:
+    def __init__(self, artifact_store: Optional[ArtifactStore] = None):
+        self.artifact_store = artifact_store or get_artifact_store()
+        
+        # 공용 LLM 라우터 (지연 시간/오류율/비용 기준으로 모델 선택, 실패 시 다음 후보로 전환)
+        self.router = get_llm_router()
+        # 이미지 스타일 가이드 캐시 (이미지 해시 + 프롬프트 + 모델 기준, 꺼져 있으면 None)
+        self.style_guide_cache = get_style_guide_cache()
+    
+    def generate_prd(self, 
+                    conversation_summary: str,
+                    prd_url: Optional[str] = None,
+                    image_url: Optional[str] = None,
+                    html_url: Optional[str] = None,
+                    owner: Optional[str] = None) -> str:
+        """PRD 생성 메인 함수 (owner: 산출물을 참조할 작업/방 ID)"""
+        return self.create_prd(conversation_summary, prd_url, image_url, html_url, owner).path
+    
+    def create_prd(self,
+                   conversation_summary: str,
+                   prd_url: Optional[str] = None,
+                   image_url: Optional[str] = None,
+                   html_url: Optional[str] = None,
+                   owner: Optional[str] = None,
+                   existing_html: Optional[str] = None) -> Artifact:
+        """PRD를 생성하여 저장하고, 내용을 포함한 산출물을 반환합니다.
+
+        existing_html이 주어지면 html_url을 다시 내려받지 않고 그 내용을 사용합니다. (워크플로우가 한 번만 가져옴)
+        """
+        
+        with tracer.span('prd', owner=owner, conversation_chars=len(conversation_summary)) as span:
+            print(f"PRD 생성 시작: {conversation_summary[:50]}...")
+        
+            # 시나리오 결정
+            with observe_stage('scenario_detection'):
+                scenario = self._determine_scenario(prd_url, image_url, html_url)
+            span.set_attribute('scenario', scenario)
+            print(f"시나리오: {scenario}")
+        
+            # Bedrock API로 PRD 생성 (구조화 PRD도 함께)
+            prd_ir = None
+            try:
+                prd_content, prd_ir = self._generate_prd_with_bedrock(conversation_summary, scenario,
+                                                                      image_url, html_url, existing_html)
+                print("✅ Bedrock API로 PRD 생성 완료")
+            except Exception as e:
+                print(f"❌ Bedrock API 오류: {e}")
+                llm_fallbacks.inc(call_class='prd', kind='content')
+                prd_content = self._create_fallback_prd(conversation_summary, scenario)
+                span.set_attribute('fallback', True)
+                print("✅ 폴백 PRD 생성 완료")
+        
+            # 파일 저장 (내용 해시 이름, 원자적 쓰기)
+            artifact = self.artifact_store.put('prd', prd_content, owner=owner)
+            span.set_attributes(artifact=artifact.path, prd_chars=len(prd_content))
+            if prd_ir is not None:
+                artifact.ir = self.artifact_store.put('prd_ir', prd_ir.to_json(), owner=owner)
+                span.set_attribute('ir_digest', artifact.ir.digest[:16])
+        
+            print(f"✅ PRD 파일 저장: {artifact.path}")
+            return artifact
+    
+    def _download_and_encode_image(self, image_url: str) -> Optional[Dict]:
+        """이미지를 스트리밍으로 내려받아(크기 제한) 비전 모델 해상도로 줄인 뒤 base64로 인코딩합니다.
+
+        이 URL의 스타일 가이드가 캐시에 있으면 조건부 요청을 보내고, 이미지가 바뀌지 않았으면(304)
+        내려받지 않고 이미지 해시만 반환합니다. (data가 None)
+        """
+        cache = self.style_guide_cache
+        known = cache.validators(image_url) if cache else None
+        if known and not cache.contains(self._style_guide_key(known[0])):
+            known = None
+        try:
+            with observe_stage('image_download', url=image_url) as span:
+                image = fetch_image(image_url, etag=known[1] if known else None,
+                                    last_modified=known[2] if known else None)
+                if image is None:
+                    span.set_attribute('not_modified', True)
+                    cache.record_not_modified()
+                    cache_lookups.inc(cache='image_url', result='not_modified')
+                    print("✅ 이미지가 바뀌지 않아 다운로드를 건너뜀")
+                    return {'url': image_url, 'sha256': known[0], 'data': None, 'media_type': None}
+                if known:
+                    cache_lookups.inc(cache='image_url', result='modified')
+                span.set_attributes(bytes=image.source_bytes, payload_bytes=image.payload_bytes,
+                                    media_type=image.media_type, resized=image.resized)
+            image_bytes.observe(image.source_bytes, kind='source')
+            image_bytes.observe(image.payload_bytes, kind='payload')
+            print(f"이미지 준비 완료: {image.source_bytes} → {image.payload_bytes} 바이트 "
+                  f"({image.media_type}{', 축소' if image.resized else ''})")
+            
+            if cache:
+                cache.remember_url(image_url, image.sha256, image.etag, image.last_modified)
+            
+            return {
+                'url': image_url,
+                'sha256': image.sha256,
+                'data': image.data,
+                'media_type': image.media_type
+            }
+        except Exception as e:
+            print(f"이미지 다운로드 오류: {e}")
+            return None
+    
+    def _fetch_existing_html(self, html_url: str) -> str:
+        """수정할 기존 HTML을 가져옵니다. (PRD_HTML_CONTEXT_CHARS 글자까지)"""
+        try:
+            return self._trim_existing_html(fetch_html(html_url))
+        except Exception as e:
+            print(f"기존 HTML 가져오기 오류: {e}")
+            return ""
+    
+    def _trim_existing_html(self, html: str) -> str:
+        if len(html) > PRD_HTML_CONTEXT_CHARS:
+            html = html[:PRD_HTML_CONTEXT_CHARS] + "\n<!-- ... 이하 생략 -->"
+        return html
+    
+    def _analyze_image_for_css(self, image_data: Optional[Dict]) -> str:
+        """다운로드한 이미지를 분석하여 상세한 CSS 정보를 생성합니다."""
+        if not image_data:
+            return ""
+        print("이미지 CSS 분석 시작")
+        
+        # 같은 이미지 + 같은 프롬프트 + 같은 모델의 분석 결과가 있으면 비전 모델을 호출하지 않음
+        cache = self.style_guide_cache
+        key = self._style_guide_key(image_data['sha256']) if cache else None
+        if cache:
+            cached = cache.get(key)
+            cache_lookups.inc(cache='style_guide', result='hit' if cached is not None else 'miss')
+            if cached is not None:
+                print("✅ 이미지 CSS 분석 캐시 적중")
+                return cached
+        if image_data['data'] is None:
+            # 바뀌지 않은 이미지(304)인데 그사이 캐시에서 지워졌으면 다시 내려받음
+            image_data = self._download_and_encode_image(image_data['url'])
+            if not image_data:
+                return ""
+        
         try:
-            response = self.bedrock_client.invoke_model(
-                modelId=self.model_id,
-                body=json.dumps({
-                    "anthropic_version": "bedrock-2023-05-31",
-                    "max_tokens": 4000,
-                    "temperature": 0,
-                    "messages": [
+            with observe_stage('image_css_analysis') as span:
+                css_info = self.router.generate(
+                    'prd',
+                    user_message([
                         {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "type": "image",
-                                    "source": {
-                                        "type": "base64",
-                                        "media_type": image_data['media_type'],
-                                        "data": image_data['data']
-                                    }
-                                },
-                                {
-                                    "type": "text",
-                                    "text": css_prompt
-                                }
-                            ]
+                            "type": "image",
+                            "source": {
+                                "type": "base64",
+                                "media_type": image_data['media_type'],
+                                "data": image_data['data']
+                            }
+                        },
+                        {
+                            "type": "text",
+                            "text": _CSS_PROMPT
                         }
-                    ]
-                })
-            )
-            
-            response_body = json.loads(response['body'].read())
-            css_info = response_body['content'][0]['text']
+                    ]),
+                    max_tokens=4000,
+                    temperature=0
+                )
+                span.set_attribute('response_chars', len(css_info))
             print("✅ 이미지 CSS 분석 완료")
+            if cache and css_info:
+                cache.set(key, image_data['sha256'], css_info)
             return css_info
             
         except Exception as e:
             print(f"이미지 CSS 분석 오류: {e}")
             return ""
     
+    def _style_guide_key(self, image_hash: str) -> str:
+        # 모델 ID는 'prd' 호출의 기본 경로 (다른 후보로 전환된 응답도 같은 키로 저장)
+        return StyleGuideCache.make_key(image_hash, _CSS_PROMPT, self.router.routes['prd'][0].key)
+    
     def _determine_scenario(self, prd_url: Optional[str], image_url: Optional[str], 
                            html_url: Optional[str]) -> str:
         """시나리오 결정"""
@@ -164,26 +255,68 @@ class PRDAgent:
             return "create_new_html"
     
     def _generate_prd_with_bedrock(self, conversation_summary: str, scenario: str, 
-                                  image_url: Optional[str], html_url: Optional[str]) -> str:
-        """Bedrock API를 사용하여 PRD 생성"""
+                                  image_url: Optional[str], html_url: Optional[str],
+                                  existing_html: Optional[str] = None) -> Tuple[str, Optional[PRDIR]]:
+        """Bedrock API를 사용하여 PRD 생성 (마크다운 PRD, 구조화 PRD 또는 None)
+
+        이미지 다운로드와 기존 HTML 가져오기를 동시에 시작하고, 각 단계는 입력이 준비되는 즉시 실행합니다.
+        PRD_STYLE_GUIDE_OVERLAP이면 PRD 호출이 이미지 스타일 분석을 기다리지 않습니다.
+        PRD_SECTIONAL이면 개요를 만든 뒤 섹션별 호출을 동시에 실행하고 정해진 순서로 합칩니다.
+        PRD_IR_ENABLED면 완성된 마크다운 PRD에서 HTMLAgent용 구조화 PRD를 추출합니다.
+        """
+        overlap = PRD_STYLE_GUIDE_OVERLAP and bool(image_url)
+        prompt_deps = []
         
-        # 이미지 CSS 분석
-        css_info = ""
+        graph = StageGraph()
         if image_url:
-            css_info = self._analyze_image_for_css(image_url)
+            graph.add('image', lambda: self._download_and_encode_image(image_url))
+            graph.add('style_guide', lambda image: self._analyze_image_for_css(image), 'image')
+            if not overlap:
+                prompt_deps.append('style_guide')
+        if html_url and PRD_HTML_CONTEXT_CHARS > 0:
+            if existing_html is None:
+                graph.add('existing_html', lambda: self._fetch_existing_html(html_url))
+            else:
+                graph.add('existing_html', lambda: self._trim_existing_html(existing_html))
+            prompt_deps.append('existing_html')
+        graph.add('context', lambda style_guide="", existing_html="": self._build_prd_context(
+            conversation_summary, scenario, image_url, html_url, style_guide, existing_html), *prompt_deps)
+        
+        if PRD_SECTIONAL:
+            graph.add('outline', self._call_prd_outline, 'context')
+            for index, (title, guide) in enumerate(_PRD_SECTIONS):
+                graph.add(f'section_{index}', lambda context, outline, title=title, guide=guide:
+                          self._call_prd_section(title, guide, context, outline), 'context', 'outline')
+            results = graph.run()
+            prd_content = self._merge_prd_sections(results, results.get('style_guide', ''))
+        else:
+            graph.add('prompt', lambda style_guide="", existing_html="": self._build_prd_prompt(
+                conversation_summary, scenario, image_url, html_url, style_guide, existing_html), *prompt_deps)
+            graph.add('prd', self._call_prd_model, 'prompt')
+            results = graph.run()
+            prd_content = results['prd']
+            if overlap:
+                prd_content = self._insert_style_guide(prd_content, results['style_guide'])
+        
+        # 구조화 PRD는 사용자가 보는 마크다운 PRD에서 추출해야 서로 어긋나지 않음
+        prd_ir = self._generate_prd_ir(prd_content) if PRD_IR_ENABLED else None
+        if prd_ir is not None:
+            # 시나리오와 스타일 가이드는 모델에 다시 쓰게 하지 않고 그대로 채움
+            prd_ir.scenario = scenario
+            prd_ir.style.css_guide = results.get('style_guide', '')
+        return prd_content, prd_ir
+    
+    def _build_prd_prompt(self, conversation_summary: str, scenario: str, image_url: Optional[str],
+                          html_url: Optional[str], css_info: str, existing_html: str) -> str:
+        """시나리오별 PRD 프롬프트를 구성합니다."""
+        context = self._build_prd_context(conversation_summary, scenario, image_url, html_url, css_info, existing_html)
         
         # 간단한 프롬프트 구성
         prompt = f"""당신은 PRD(Product Requirements Document) 생성 전문 에이전트입니다.
 
 다음 정보를 바탕으로 완전한 PRD를 생성해주세요:
 
-**요구사항:** {conversation_summary}
-**시나리오:** {scenario}
-**이미지 URL:** {image_url or 'None'}
-**HTML URL:** {html_url or 'None'}
-
-{'**이미지 기반 CSS 스타일 가이드:**' if css_info else ''}
-{css_info if css_info else ''}
+{context}
 
 다음 구조로 PRD를 작성해주세요:
 
@@ -201,29 +334,130 @@ class PRDAgent:
 
 각 섹션에는 구체적이고 실행 가능한 내용을 포함해주세요.
 특히 동적 데이터 생성을 위한 LLM API 호출 코드를 JavaScript로 포함해주세요."""
-
-        # Bedrock API 호출
-        response = self.bedrock_client.invoke_model(
-            modelId=self.model_id,
-            body=json.dumps({
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": 4000,
-                "temperature": 0,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
-            })
-        )
         
-        # 응답 파싱
-        response_body = json.loads(response['body'].read())
-        prd_content = response_body['content'][0]['text']
+        return prompt
+    
+    def _build_prd_context(self, conversation_summary: str, scenario: str, image_url: Optional[str],
+                           html_url: Optional[str], css_info: str, existing_html: str) -> str:
+        """PRD 프롬프트에 공통으로 들어가는 입력 정보 (요구사항, 시나리오, 기존 HTML, 스타일 가이드)"""
+        html_context = f"**기존 HTML (수정 대상):**\n```html\n{existing_html}\n```\n\n" if existing_html else ''
+        return f"""**요구사항:** {conversation_summary}
+**시나리오:** {scenario}
+**이미지 URL:** {image_url or 'None'}
+**HTML URL:** {html_url or 'None'}
+
+{html_context}{'**이미지 기반 CSS 스타일 가이드:**' if css_info else ''}
+{css_info if css_info else ''}"""
+    
+    def _generate_prd_ir(self, prd_content: str) -> Optional[PRDIR]:
+        """완성된 PRD에서 HTMLAgent가 바로 사용할 구조화 PRD(JSON)를 추출합니다. (실패하면 None, HTML 단계는 마크다운을 사용)"""
+        prompt = f"""당신은 PRD(Product Requirements Document) 분석 전문 에이전트입니다.
+
+다음 PRD를 HTML 생성 단계가 바로 사용할 구조화 PRD로 JSON으로 옮겨주세요.
+PRD에 없는 기능이나 내용을 새로 만들지 말고, PRD에 적힌 내용만 사용하세요.
+
+{prd_content}
+
+**응답 형식 (JSON만 출력, 다른 설명 금지):**
+{IR_EXAMPLE}
+
+- features: 화면에 구현할 기능만 최대 12개, 중요한 순서로 priority는 must/should/could 중 하나
+- style.tokens: 색상, 글꼴, 모서리, 간격 등 디자인 토큰 최대 24개 (이름: CSS 값)
+- data_panels: 페이지가 열릴 때 LLM으로 내용을 채울 영역 최대 6개 (id는 영문 HTML id, prompt는 그 영역 내용을 만드는 지시)"""
+        with observe_stage('prd_ir', prompt_chars=len(prompt)) as span:
+            try:
+                response = self.router.generate('prd_ir', user_message(prompt),
+                                                max_tokens=PRD_IR_MAX_TOKENS, temperature=0)
+                prd_ir = parse_prd_ir(response)
+            except Exception as e:
+                print(f"⚠️ 구조화 PRD 생성 실패, HTML 단계는 마크다운 PRD를 사용: {e}")
+                span.set_attribute('fallback', type(e).__name__)
+                llm_fallbacks.inc(call_class='prd_ir', kind='content')
+                return None
+            span.set_attributes(features=len(prd_ir.features), data_panels=len(prd_ir.data_panels))
+        return prd_ir
+    
+    def _call_prd_outline(self, context: str) -> str:
+        """섹션별 생성 모드: 모든 섹션이 공유할 짧은 PRD 개요를 만듭니다."""
+        titles = ', '.join(title for title, _ in _PRD_SECTIONS)
+        prompt = f"""당신은 PRD(Product Requirements Document) 생성 전문 에이전트입니다.
+
+다음 정보를 바탕으로 PRD의 뼈대가 될 개요만 짧게 작성해주세요.
+이 개요는 섹션을 나눠 동시에 작성하는 작성자들이 서로 일관된 내용을 쓰도록 공유됩니다.
+
+{context}
+
+다음 항목만 간결하게 작성해주세요 (전체 20줄 이내):
+- 프로젝트명
+- 목적과 대상 사용자
+- 핵심 기능 목록
+- 화면(페이지) 구성과 주요 영역
+- 각 섹션({titles})에서 다룰 핵심 내용 한 줄씩"""
+        with observe_stage('prd_outline', prompt_chars=len(prompt)) as span:
+            outline = self.router.generate('prd_section', user_message(prompt),
+                                           max_tokens=PRD_OUTLINE_MAX_TOKENS, temperature=0)
+            span.set_attribute('response_chars', len(outline))
+        return outline
+    
+    def _call_prd_section(self, title: str, guide: str, context: str, outline: str) -> str:
+        """섹션별 생성 모드: PRD 섹션 하나의 본문을 생성합니다."""
+        prompt = f"""당신은 PRD(Product Requirements Document) 생성 전문 에이전트입니다.
+여러 작성자가 PRD를 섹션별로 나눠 동시에 작성하고 있으며, 당신은 "## {title}" 섹션만 작성합니다.
+
+{context}
+
+**PRD 개요 (모든 섹션이 공유):**
+{outline}
+
+**이 섹션의 작성 지침:** {guide}
+
+- "## {title}" 제목 줄은 쓰지 말고 본문만 작성하세요. 하위 제목은 ###부터 사용하세요.
+- 다른 섹션에서 다룰 내용은 반복하지 말고, 구체적이고 실행 가능한 내용만 포함하세요."""
+        with observe_stage('prd_section', section=title, prompt_chars=len(prompt)) as span:
+            body = self.router.generate('prd_section', user_message(prompt),
+                                        max_tokens=PRD_SECTION_MAX_TOKENS, temperature=0)
+            span.set_attribute('response_chars', len(body))
+        return body
+    
+    def _merge_prd_sections(self, results: Dict[str, Any], css_info: str) -> str:
+        """섹션별 결과를 정해진 순서로 합쳐 한 번에 생성한 PRD와 같은 구조로 만듭니다."""
+        parts = ["# Product Requirements Document (PRD)"]
+        for index, (title, _) in enumerate(_PRD_SECTIONS):
+            body = results[f'section_{index}'].strip()
+            # 지시와 달리 모델이 섹션 제목을 다시 쓴 경우 제거
+            first_line, _, rest = body.partition('\n')
+            if first_line.lstrip('#').strip() == title:
+                body = rest.strip()
+            parts.append(f"## {title}\n{body}")
+        return self._insert_style_guide('\n\n'.join(parts) + '\n', css_info)
+    
+    def _call_prd_model(self, prompt: str) -> str:
+        """PRD 생성 모델을 호출합니다."""
+        with observe_stage('prd_generation', prompt_chars=len(prompt)) as span:
+            prd_content = self.router.generate(
+                'prd',
+                user_message(prompt),
+                max_tokens=4000,
+                temperature=0
+            )
+            span.set_attribute('response_chars', len(prd_content))
         
         return prd_content
     
+    def _insert_style_guide(self, prd_content: str, css_info: str) -> str:
+        """PRD와 동시에 만든 이미지 스타일 가이드를 PRD의 실행 가이드 앞에 끼워 넣습니다."""
+        if not css_info:
+            return prd_content
+        section = (
+            "## 이미지 기반 스타일 가이드\n"
+            "**중요: HTML 생성 시 아래 CSS 정보만 사용하고 다른 CSS는 생성하지 마세요.**\n"
+            f"{css_info}\n\n"
+        )
+        index = prd_content.find(_STYLE_GUIDE_ANCHOR)
+        if index < 0:
+            return f"{prd_content.rstrip()}\n\n{section}"
+        return prd_content[:index] + section + prd_content[index:]
+    
     def _create_fallback_prd(self, conversation_summary: str, scenario: str) -> str:
         """Bedrock API 실패 시 폴백 PRD 생성"""
         return f"""# Product Requirements Document (PRD)
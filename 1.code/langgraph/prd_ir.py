@@ -0,0 +1,101 @@
+import json
+import os
+from typing import Dict, List, Literal
+from dotenv import load_dotenv
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+
+# .env 파일 로드
+load_dotenv()
+
+# true면 완성된 마크다운 PRD에서 구조화 PRD를 추출 (PRD 뒤에 모델 호출이 하나 더 필요하므로 기본 꺼짐)
+PRD_IR_ENABLED = os.getenv('PRD_IR_ENABLED', 'false').lower() == 'true'
+# 구조화 PRD(JSON) 응답의 최대 출력 토큰
+PRD_IR_MAX_TOKENS = int(os.getenv('PRD_IR_MAX_TOKENS', '1000'))
+
+# 스키마를 바꾸면 올림 (다른 버전의 IR은 읽지 않고 마크다운에서 다시 추출)
+PRD_IR_VERSION = 1
+
+_PRIORITY_ORDER = {'must': 0, 'should': 1, 'could': 2}
+
+
+class PRDIRError(Exception):
+    """모델 응답이 구조화 PRD 스키마에 맞지 않는 경우"""
+
+
+class Feature(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    name: str = Field(min_length=1, max_length=80)
+    description: str = Field('', max_length=300)
+    priority: Literal['must', 'should', 'could'] = 'should'
+
+
+class DataPanel(BaseModel):
+    """페이지가 열릴 때 LLM으로 내용을 채울 영역"""
+    model_config = ConfigDict(extra='forbid')
+
+    id: str = Field(pattern=r'^[a-zA-Z][a-zA-Z0-9_-]{0,39}$')
+    title: str = Field(min_length=1, max_length=80)
+    prompt: str = Field(min_length=1, max_length=500)
+
+
+class Style(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+    # 디자인 토큰 (예: {"color-primary": "#1a73e8", "font-family": "Pretendard, sans-serif"})
+    tokens: Dict[str, str] = Field(default_factory=dict, max_length=24)
+    # 이미지 기반 스타일 가이드 원문 (모델이 아니라 PRDAgent가 분석 결과를 그대로 채움)
+    css_guide: str = ''
+
+
+class PRDIR(BaseModel):
+    """HTMLAgent가 바로 사용하는 구조화 PRD (마크다운 PRD와 함께 저장)"""
+    model_config = ConfigDict(extra='forbid')
+
+    version: Literal[1] = PRD_IR_VERSION
+    title: str = Field(min_length=1, max_length=120)
+    summary: str = Field('', max_length=600)
+    scenario: str = ''
+    features: List[Feature] = Field(min_length=1, max_length=12)
+    style: Style = Field(default_factory=Style)
+    data_panels: List[DataPanel] = Field(default_factory=list, max_length=6)
+
+    def prioritized_features(self) -> List[Feature]:
+        """우선순위(must → should → could) 순서, 같은 우선순위는 원래 순서"""
+        return sorted(self.features, key=lambda feature: _PRIORITY_ORDER[feature.priority])
+
+    def to_json(self) -> str:
+        return self.model_dump_json()
+
+
+# 프롬프트에 넣을 응답 예시 (서버가 채우는 version/scenario/css_guide는 제외)
+IR_EXAMPLE = json.dumps({
+    "title": "프로젝트 이름",
+    "summary": "한두 문장 요약",
+    "features": [
+        {"name": "기능 이름", "description": "무엇을 하는 기능인지 한 문장", "priority": "must"}
+    ],
+    "style": {"tokens": {"color-primary": "#1a73e8", "font-family": "sans-serif"}},
+    "data_panels": [
+        {"id": "recentOrders", "title": "최근 주문", "prompt": "최근 주문 10건을 표 HTML로 생성"}
+    ]
+}, ensure_ascii=False, indent=2)
+
+
+def parse_prd_ir(text: str) -> PRDIR:
+    """모델 응답에서 JSON 객체를 꺼내 스키마로 검사합니다."""
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end <= start:
+        raise PRDIRError("응답에 JSON 객체가 없습니다")
+    try:
+        return PRDIR.model_validate_json(text[start:end + 1])
+    except ValidationError as e:
+        raise PRDIRError(f"구조화 PRD 스키마 검사 실패: {e.error_count()}개 오류 - {e.errors()[0]['msg']}")
+
+
+def load_prd_ir(content: str) -> PRDIR:
+    """저장된 IR을 읽습니다. 다른 버전이면 PRDIRError를 냅니다."""
+    try:
+        return PRDIR.model_validate_json(content)
+    except ValidationError as e:
+        raise PRDIRError(f"저장된 구조화 PRD를 읽을 수 없습니다 (버전 {PRD_IR_VERSION} 필요): {e.error_count()}개 오류")
@@ -0,0 +1,213 @@
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 모델별 적응형 호출 제한 사용 여부
+LLM_ADAPTIVE_LIMIT = os.getenv('LLM_ADAPTIVE_LIMIT', 'true').lower() == 'true'
+# 동시 호출 창(window)의 시작/최대 크기
+LLM_LIMIT_INITIAL_WINDOW = float(os.getenv('LLM_LIMIT_INITIAL_WINDOW', '4'))
+LLM_LIMIT_MAX_WINDOW = float(os.getenv('LLM_LIMIT_MAX_WINDOW', os.getenv('LLM_MAX_WORKERS', '32')))
+# 초당 호출 수(token bucket)의 시작/최대 값
+LLM_LIMIT_INITIAL_RPS = float(os.getenv('LLM_LIMIT_INITIAL_RPS', '2'))
+LLM_LIMIT_MAX_RPS = float(os.getenv('LLM_LIMIT_MAX_RPS', '50'))
+# 스로틀링 시 창과 호출 속도를 줄이는 비율
+LLM_LIMIT_DECREASE = float(os.getenv('LLM_LIMIT_DECREASE', '0.5'))
+# 한도를 넘었을 때 호출 슬롯을 기다리는 최대 시간 (초)
+LLM_LIMIT_QUEUE_TIMEOUT = float(os.getenv('LLM_LIMIT_QUEUE_TIMEOUT', '300'))
+# 스로틀링 응답 재시도 횟수 및 백오프 상한 (초)
+LLM_THROTTLE_RETRIES = int(os.getenv('LLM_THROTTLE_RETRIES', '5'))
+LLM_THROTTLE_MAX_BACKOFF = float(os.getenv('LLM_THROTTLE_MAX_BACKOFF', '20'))
+
+_THROTTLE_CODES = {'throttlingexception', 'toomanyrequestsexception', 'throttling', 'servicequotaexceededexception',
+                   'ratelimiterror'}
+
+_MIN_WINDOW = 1.0
+_MIN_RPS = 0.1
+# 취소 가능한 대기에서 취소 여부를 확인하는 간격 (초)
+_CANCEL_POLL = 0.1
+
+
+class LimiterTimeout(Exception):
+    """호출 슬롯을 제한 시간 안에 얻지 못했습니다."""
+
+
+class LimiterCancelled(Exception):
+    """호출 슬롯을 기다리는 중에 호출이 취소되었습니다."""
+
+
+class Permit:
+    """하나의 호출 슬롯. 호출 결과를 limiter에 알려 창 크기를 조정합니다."""
+
+    def __init__(self, limiter: 'AdaptiveLimiter', started_at: float):
+        self._limiter = limiter
+        self.started_at = started_at
+        self._outcome = 'error'
+        self._released = False
+
+    def succeeded(self):
+        self._outcome = 'success'
+
+    def throttled(self):
+        self._outcome = 'throttled'
+
+    def release(self):
+        """슬롯을 반납합니다. (여러 번 호출해도 한 번만 반영)"""
+        if not self._released:
+            self._released = True
+            self._limiter._release(self, self._outcome)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+
+
+class AdaptiveLimiter:
+    """모델 하나의 적응형 호출 제한 (AIMD 동시 호출 창 + token bucket).
+
+    성공할 때마다 창과 초당 호출 수를 조금씩 늘리고, 스로틀링 응답을 받으면
+    한 번에 줄입니다. 한도를 넘는 호출은 실패시키지 않고 슬롯이 날 때까지 기다리므로
+    처리량이 계정 할당량 바로 아래에서 안정됩니다.
+    """
+
+    def __init__(self, name: str, window: float = LLM_LIMIT_INITIAL_WINDOW,
+                 max_window: float = LLM_LIMIT_MAX_WINDOW, rps: float = LLM_LIMIT_INITIAL_RPS,
+                 max_rps: float = LLM_LIMIT_MAX_RPS, decrease: float = LLM_LIMIT_DECREASE):
+        self.name = name
+        self.window = min(window, max_window)
+        self.max_window = max_window
+        self.rps = min(rps, max_rps)
+        self.max_rps = max_rps
+        self.decrease = decrease
+        self._tokens = 1.0
+        self._refilled_at = time.monotonic()
+        self._last_decrease = 0.0
+        self._in_flight = 0
+        self._queued = 0
+        self._cond = threading.Condition()
+        self._stats = {"acquired": 0, "successes": 0, "throttles": 0, "errors": 0, "timeouts": 0}
+        self._wait_total = 0.0
+
+    def acquire(self, timeout: float = LLM_LIMIT_QUEUE_TIMEOUT,
+                cancelled: Optional[threading.Event] = None) -> Permit:
+        """호출 슬롯을 얻을 때까지 기다립니다. cancelled가 설정되면 기다리지 않고 중단합니다."""
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            self._queued += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._in_flight < max(int(self.window), 1) and self._tokens >= 1:
+                        self._tokens -= 1
+                        self._in_flight += 1
+                        self._stats["acquired"] += 1
+                        self._wait_total += now - started
+                        return Permit(self, now)
+                    if now >= deadline:
+                        self._stats["timeouts"] += 1
+                        raise LimiterTimeout(f"{self.name} 호출 슬롯 대기 시간 초과")
+                    if cancelled is not None and cancelled.is_set():
+                        raise LimiterCancelled(f"{self.name} 호출 슬롯 대기 중 취소")
+                    wait = deadline - now
+                    if self._tokens < 1:
+                        wait = min(wait, (1 - self._tokens) / self.rps)
+                    if cancelled is not None:
+                        # 취소 이벤트는 조건 변수를 깨우지 않으므로 짧게 나눠 확인
+                        wait = min(wait, _CANCEL_POLL)
+                    self._cond.wait(wait)
+            finally:
+                self._queued -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            acquired = self._stats["acquired"]
+            return {
+                **self._stats,
+                "window": round(self.window, 2),
+                "rps": round(self.rps, 2),
+                "in_flight": self._in_flight,
+                "queued": self._queued,
+                "avg_wait": round(self._wait_total / acquired, 3) if acquired else 0.0
+            }
+
+    def _refill(self, now: float):
+        capacity = max(self.rps, 1.0)
+        self._tokens = min(capacity, self._tokens + (now - self._refilled_at) * self.rps)
+        self._refilled_at = now
+
+    def _release(self, permit: Permit, outcome: str):
+        with self._cond:
+            self._in_flight -= 1
+            if outcome == 'success':
+                self._stats["successes"] += 1
+                # 가산 증가: 창 하나만큼 성공하면 창이 1 늘어남
+                # (한도가 실제로 병목일 때만 늘려 한가할 때 창이 부풀지 않게 함)
+                if self._in_flight + 1 >= int(self.window):
+                    self.window = min(self.max_window, self.window + 1 / self.window)
+                if self._queued or self._tokens < 1:
+                    self.rps = min(self.max_rps, self.rps + 1 / max(self.rps, 1.0))
+            elif outcome == 'throttled':
+                self._stats["throttles"] += 1
+                # 승법 감소: 이미 줄인 뒤에 시작된 호출의 스로틀링만 반영 (동시 응답으로 여러 번 줄이지 않음)
+                if permit.started_at >= self._last_decrease:
+                    self.window = max(_MIN_WINDOW, self.window * self.decrease)
+                    self.rps = max(_MIN_RPS, self.rps * self.decrease)
+                    self._tokens = min(self._tokens, 0.0)
+                    self._last_decrease = time.monotonic()
+                    print(f"⚠️ {self.name} 스로틀링: 창 {self.window:.1f}, 초당 {self.rps:.2f}회로 감소")
+            else:
+                self._stats["errors"] += 1
+            self._cond.notify_all()
+
+
+class LimiterRegistry:
+    """모델 ID별 limiter 모음"""
+
+    def __init__(self, enabled: bool = LLM_ADAPTIVE_LIMIT):
+        self.enabled = enabled
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[AdaptiveLimiter]:
+        if not self.enabled:
+            return None
+        with self._lock:
+            limiter = self._limiters.get(name)
+            if limiter is None:
+                limiter = self._limiters[name] = AdaptiveLimiter(name)
+            return limiter
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            limiters = list(self._limiters.values())
+        return {limiter.name: limiter.stats() for limiter in limiters}
+
+
+def is_throttle(error: BaseException) -> bool:
+    """제공자의 스로틀링(요청 한도 초과) 응답인지 확인합니다."""
+    response = getattr(error, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code') or ''
+        if code.lower() in _THROTTLE_CODES:
+            return True
+    if getattr(error, 'status_code', None) == 429:
+        return True
+    return type(error).__name__.lower() in _THROTTLE_CODES
+
+
+def throttle_backoff(attempt: int, max_backoff: float = LLM_THROTTLE_MAX_BACKOFF) -> float:
+    """스로틀링 후 재시도까지 기다릴 시간 (full jitter 지수 백오프)"""
+    return random.uniform(0, min(max_backoff, 0.5 * 2 ** attempt))
+
+
+# 프로세스 전체에서 공유하는 모델별 호출 제한
+llm_limiters = LimiterRegistry()
@@ -47,7 +47,7 @@ def run_workflow(args):
     print(f"\n📍 생성된 파일들:")
     print(f"   PRD: {result['prd_file']}")
     print(f"   HTML: {result['html_file']}")
-    print(f"   브라우저: http://localhost:8000/html/index.html")
+    print(f"   브라우저: http://localhost:8000/html/{os.path.basename(result['html_file'])}")
 
 def run_prd_direct(args):
     agent = PRDAgent()
@@ -0,0 +1,292 @@
+import hashlib
+import json
+import os
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+from dotenv import load_dotenv
+from llm_cache import normalize_prompt, LLM_CACHE_TTL
+
+# .env 파일 로드
+load_dotenv()
+
+LLM_SIMILARITY_CACHE = os.getenv('LLM_SIMILARITY_CACHE', 'false').lower() == 'true'
+# 캐시된 응답을 재사용할 최소 유사도 (추정 Jaccard, 0~1)
+# 숫자/검색어가 다른 프롬프트는 LLM_SIMILARITY_GUARD로 거르므로, 프로젝트 제목처럼 앞뒤 문구만 다른
+# 프롬프트(0.8~0.9)도 적중하도록 둠. 단, 따옴표 없이 바뀐 단어("재고 관리"/"주문 관리", 0.91)도 적중하므로
+# 이런 프롬프트가 많으면 LLM_SIMILARITY_GUARD=strict 또는 0.95 이상으로 조정
+LLM_SIMILARITY_THRESHOLD = float(os.getenv('LLM_SIMILARITY_THRESHOLD', '0.8'))
+# 문자 shingle 길이
+LLM_SIMILARITY_SHINGLE = int(os.getenv('LLM_SIMILARITY_SHINGLE', '4'))
+# MinHash 순열 수 / LSH 밴드 수 (순열 수는 밴드 수로 나누어 떨어져야 함)
+LLM_SIMILARITY_PERMUTATIONS = int(os.getenv('LLM_SIMILARITY_PERMUTATIONS', '64'))
+LLM_SIMILARITY_BANDS = int(os.getenv('LLM_SIMILARITY_BANDS', '16'))
+LLM_SIMILARITY_MAX_ENTRIES = int(os.getenv('LLM_SIMILARITY_MAX_ENTRIES', '5000'))
+# 유사도가 높아도 재사용하지 않을 차이
+# literals: 숫자나 따옴표로 감싼 값이 다르면 거부 (프로젝트 제목 등 나머지 문구 차이는 허용)
+# strict: 그 외에 공통 어간이 없는 단어로 바뀐 경우("재고"/"주문")도 거부
+LLM_SIMILARITY_GUARD = os.getenv('LLM_SIMILARITY_GUARD', 'literals').lower()
+# /llm 프롬프트 기록 파일 (임계값 조정용, 비어 있으면 기록하지 않음)
+LLM_TRAFFIC_LOG = os.getenv('LLM_TRAFFIC_LOG', '')
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_TOKEN = re.compile(r'\w+')
+_NUMBER = re.compile(r'\d+(?:[.,]\d+)*')
+_QUOTED = re.compile(r'"([^"\n]*)"|\'([^\'\n]*)\'|“([^”\n]*)”|‘([^’\n]*)’')
+_GUARDS = ('literals', 'strict')
+# 서로 다른 단어가 같은 말의 활용/조사 차이로 볼 최소 공통 접두어 길이
+_STEM_CHARS = 2
+_traffic_lock = threading.Lock()
+_traffic_queue: 'queue.SimpleQueue[str]' = queue.SimpleQueue()
+_traffic_writer: Optional[threading.Thread] = None
+
+
+def shingles(text: str, size: int = LLM_SIMILARITY_SHINGLE) -> Set[str]:
+    """공백을 제거한 텍스트를 길이 size의 문자 shingle 집합으로 나눕니다."""
+    text = "".join(text.lower().split())
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def tokens(text: str) -> Set[str]:
+    return set(_TOKEN.findall(text.lower()))
+
+
+def literals(text: str) -> Set[str]:
+    """프롬프트의 숫자와 따옴표로 감싼 값을 반환합니다. (따옴표 안의 공백/대소문자 차이는 무시)"""
+    found = {" ".join("".join(groups).lower().split()) for groups in _QUOTED.findall(text)}
+    found.update(_NUMBER.findall(text))
+    return found
+
+
+def same_key_terms(left: Set[str], right: Set[str]) -> bool:
+    """두 프롬프트의 다른 단어가 표현 차이뿐인지 확인합니다.
+
+    숫자가 들어간 단어는 정확히 같아야 하고, 나머지 다른 단어는 반대쪽의 다른 단어와
+    공통 어간(접두어)이 있어야 합니다. ("알려줘"/"알려주세요"는 허용, "재고"/"주문"은 거부)
+    한 글자 단어(조사, "좀" 등)는 한쪽에만 있어도 됩니다.
+    """
+    only_left, only_right = left - right, right - left
+    for differing, others in ((only_left, only_right), (only_right, only_left)):
+        for term in differing:
+            if any(c.isdigit() for c in term):
+                return False
+            if len(term) <= 1:
+                continue
+            if not any(len(os.path.commonprefix([term, other])) >= _STEM_CHARS for other in others):
+                return False
+    return True
+
+
+class MinHasher:
+    """문자 shingle 집합의 MinHash 서명을 계산합니다. (외부 서비스 없이 로컬 계산)"""
+
+    def __init__(self, permutations: int = LLM_SIMILARITY_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self.permutations = permutations
+        self._params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                        for _ in range(permutations)]
+
+    def signature(self, items: Set[str]) -> Tuple[int, ...]:
+        hashes = [int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+                  for item in items]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._params)
+
+    @staticmethod
+    def similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+        """두 서명으로 Jaccard 유사도를 추정합니다."""
+        return sum(1 for x, y in zip(left, right) if x == y) / len(left)
+
+
+class SimilarityCache:
+    """MinHash/LSH 기반 유사 프롬프트 응답 캐시
+
+    유사도가 임계값을 넘더라도 숫자나 따옴표로 감싼 값이 다른 프롬프트에는 응답을 재사용하지 않습니다.
+    guard='strict'이면 대상 단어가 바뀐 프롬프트도 거부합니다.
+    """
+
+    def __init__(self, threshold: float = LLM_SIMILARITY_THRESHOLD,
+                 permutations: int = LLM_SIMILARITY_PERMUTATIONS, bands: int = LLM_SIMILARITY_BANDS,
+                 max_entries: int = LLM_SIMILARITY_MAX_ENTRIES, ttl: int = LLM_CACHE_TTL,
+                 guard: str = LLM_SIMILARITY_GUARD):
+        if permutations % bands:
+            raise ValueError("LLM_SIMILARITY_PERMUTATIONS는 LLM_SIMILARITY_BANDS로 나누어 떨어져야 합니다.")
+        if guard not in _GUARDS:
+            raise ValueError(f"LLM_SIMILARITY_GUARD는 {', '.join(_GUARDS)} 중 하나여야 합니다.")
+        self.threshold = threshold
+        self.guard = guard
+        self.bands = bands
+        self.rows = permutations // bands
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._hasher = MinHasher(permutations)
+        self._entries: 'OrderedDict[int, tuple]' = OrderedDict()
+        self._buckets: Dict[tuple, Set[int]] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._stats = {"lookups": 0, "hits": 0, "candidates": 0, "rejected": 0, "evictions": 0}
+        self._hit_similarity_total = 0.0
+
+    def get(self, prompt: str, namespace: str = "") -> Optional[Tuple[str, float]]:
+        """임계값 이상으로 비슷한 프롬프트의 응답과 유사도를 반환합니다."""
+        signature = self._hasher.signature(shingles(prompt))
+        terms = tokens(prompt)
+        values = literals(prompt)
+        now = time.time()
+        with self._lock:
+            self._stats["lookups"] += 1
+            best = None
+            for entry_id in self._candidates(namespace, signature):
+                entry_signature, value, expires_at, _, entry_terms, entry_values = self._entries[entry_id]
+                if expires_at < now:
+                    continue
+                self._stats["candidates"] += 1
+                similarity = MinHasher.similarity(signature, entry_signature)
+                if similarity < self.threshold or (best is not None and similarity <= best[2]):
+                    continue
+                # 문자 유사도가 높아도 숫자/검색어가 다르면 다른 질문이므로 재사용하지 않음
+                if values != entry_values or (self.guard == 'strict' and not same_key_terms(terms, entry_terms)):
+                    self._stats["rejected"] += 1
+                    continue
+                best = (entry_id, value, similarity)
+
+            if best is None:
+                return None
+            entry_id, value, similarity = best
+            self._entries.move_to_end(entry_id)
+            self._stats["hits"] += 1
+            self._hit_similarity_total += similarity
+            return value, similarity
+
+    def set(self, prompt: str, value: str, namespace: str = ""):
+        signature = self._hasher.signature(shingles(prompt))
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            band_keys = self._band_keys(namespace, signature)
+            self._entries[entry_id] = (signature, value, time.time() + self.ttl, band_keys,
+                                       tokens(prompt), literals(prompt))
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["lookups"]
+            hits = self._stats["hits"]
+            return {
+                **self._stats,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "avg_hit_similarity": round(self._hit_similarity_total / hits, 4) if hits else None,
+                "threshold": self.threshold,
+                "guard": self.guard,
+                "entries": len(self._entries)
+            }
+
+    def _band_keys(self, namespace: str, signature: Tuple[int, ...]) -> List[tuple]:
+        return [(namespace, band, signature[band * self.rows:(band + 1) * self.rows])
+                for band in range(self.bands)]
+
+    def _candidates(self, namespace: str, signature: Tuple[int, ...]) -> Set[int]:
+        candidates = set()
+        for key in self._band_keys(namespace, signature):
+            candidates.update(self._buckets.get(key, ()))
+        return candidates
+
+    def _remove(self, entry_id: int):
+        _, _, _, band_keys, _, _ = self._entries.pop(entry_id)
+        for key in band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+
+def record_prompt(prompt: str):
+    """임계값 조정을 위해 /llm 프롬프트를 JSONL 파일에 기록합니다.
+
+    이벤트 루프에서 호출되므로 줄만 큐에 넣고, 파일 쓰기는 백그라운드 스레드가 모아서 처리합니다.
+    (조정용 기록이므로 종료 직전에 큐에 남은 줄은 버려질 수 있음)
+    """
+    global _traffic_writer
+    if not LLM_TRAFFIC_LOG:
+        return
+    _traffic_queue.put(json.dumps({"ts": time.time(), "prompt": prompt}, ensure_ascii=False))
+    if _traffic_writer is None:
+        with _traffic_lock:
+            if _traffic_writer is None:
+                _traffic_writer = threading.Thread(target=_write_traffic, name='llm-traffic-log', daemon=True)
+                _traffic_writer.start()
+
+
+def _write_traffic():
+    while True:
+        lines = [_traffic_queue.get()]
+        while True:
+            try:
+                lines.append(_traffic_queue.get_nowait())
+            except queue.Empty:
+                break
+        try:
+            with open(LLM_TRAFFIC_LOG, 'a', encoding='utf-8') as f:
+                f.write("".join(line + "\n" for line in lines))
+        except OSError as e:
+            print(f"프롬프트 기록 오류: {e}")
+
+
+def replay(traffic_path: str, thresholds: List[float]) -> List[Dict[str, Any]]:
+    """기록된 트래픽을 임계값별로 재생하여 정확 일치/유사 적중 비율을 계산합니다. (오프라인)"""
+    with open(traffic_path, 'r', encoding='utf-8') as f:
+        prompts = [json.loads(line)['prompt'] for line in f if line.strip()]
+
+    reports = []
+    for threshold in thresholds:
+        cache = SimilarityCache(threshold=threshold, ttl=10 ** 9)
+        seen = set()
+        exact_hits = 0
+        examples = []
+        for prompt in prompts:
+            normalized = normalize_prompt(prompt)
+            if normalized in seen:
+                exact_hits += 1
+                continue
+            hit = cache.get(prompt)
+            if hit is None:
+                seen.add(normalized)
+                cache.set(prompt, normalized)
+            elif len(examples) < 5:
+                examples.append({"prompt": normalized, "matched": hit[0], "similarity": round(hit[1], 3)})
+        stats = cache.stats()
+        reports.append({
+            "threshold": threshold,
+            "requests": len(prompts),
+            "exact_hits": exact_hits,
+            "similar_hits": stats["hits"],
+            "similar_hit_rate": round(stats["hits"] / len(prompts), 4) if prompts else 0.0,
+            "avg_hit_similarity": stats["avg_hit_similarity"],
+            "examples": examples
+        })
+    return reports
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("사용법:")
+        print("  python similarity_cache.py <traffic.jsonl> [threshold ...]")
+        sys.exit(1)
+
+    thresholds = [float(value) for value in sys.argv[2:]] or [0.85, 0.9, 0.95, 0.97]
+    print(json.dumps(replay(sys.argv[1], thresholds), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
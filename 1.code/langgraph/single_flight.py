@@ -0,0 +1,118 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 스레드에서 기다리는 호출(follower)이 leader를 기다리는 최대 시간 (초, 넘으면 직접 호출)
+LLM_SINGLE_FLIGHT_MAX_WAIT = float(os.getenv('LLM_SINGLE_FLIGHT_MAX_WAIT', '60'))
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """같은 키로 동시에 들어온 호출을 하나의 업스트림 호출로 합칩니다.
+
+    먼저 들어온 호출(leader)만 실제로 실행하고, 실행 중에 들어온 같은 키의 호출은
+    그 결과(또는 예외)를 그대로 공유합니다. 완료된 결과는 보관하지 않습니다.
+
+    이벤트 루프에서는 ado를 사용합니다. follower가 스레드를 점유하지 않고 asyncio future를 기다립니다.
+    스레드에서 호출하는 do의 follower는 최대 max_wait초까지만 기다리고, 넘으면 직접 호출합니다.
+    """
+
+    def __init__(self, max_wait: float = LLM_SINGLE_FLIGHT_MAX_WAIT):
+        self.max_wait = max_wait
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self._async_calls: Dict[str, asyncio.Future] = {}
+        self._stats = {"calls": 0, "shared": 0, "wait_timeouts": 0}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+                self._stats["calls"] += 1
+            else:
+                self._stats["shared"] += 1
+
+        if not leader:
+            if not call.event.wait(self.max_wait):
+                # leader가 너무 오래 걸리면 스레드를 계속 붙잡지 않고 직접 호출
+                with self._lock:
+                    self._stats["wait_timeouts"] += 1
+                return fn()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def ado(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """이벤트 루프에서 같은 키의 호출을 합칩니다. (루프 스레드에서만 호출)"""
+        while key in self._async_calls:
+            future = self._async_calls[key]
+            with self._lock:
+                self._stats["shared"] += 1
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # leader가 취소된 경우에만 다시 시도하고, 이 호출이 취소된 경우는 그대로 전달
+                if not future.cancelled():
+                    raise
+
+        future = asyncio.get_running_loop().create_future()
+        # 기다리는 follower가 없어도 예외를 꺼낸 것으로 처리 (경고 로그 방지)
+        future.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._async_calls[key] = future
+        with self._lock:
+            self._stats["calls"] += 1
+        try:
+            result = await fn()
+            future.set_result(result)
+            return result
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            del self._async_calls[key]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, "in_flight": len(self._calls) + len(self._async_calls)}
+
+
+def make_key(*parts: Any) -> str:
+    """호출을 구분하는 값들(제공자, 모델, 요청 본문 등)로 키를 만듭니다."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+# 프로세스 전체에서 공유하는 LLM 호출 합치기 계층
+llm_single_flight = SingleFlight()
+# /llm 엔드포인트 요청 합치기 (이벤트 루프에서 ado로 사용)
+llm_request_single_flight = SingleFlight()
@@ -0,0 +1,158 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+STYLE_GUIDE_CACHE_ENABLED = os.getenv('STYLE_GUIDE_CACHE_ENABLED', 'true').lower() == 'true'
+# 이미지 스타일 가이드 캐시 파일 (재시작 후에도 유지, :memory:면 프로세스 안에서만)
+STYLE_GUIDE_CACHE_PATH = os.getenv('STYLE_GUIDE_CACHE_PATH', 'style_guides.db')
+# 캐시 최대 크기 (바이트, 초과 시 가장 오래 사용하지 않은 항목부터 제거)
+STYLE_GUIDE_CACHE_MAX_BYTES = int(os.getenv('STYLE_GUIDE_CACHE_MAX_BYTES', str(32 * 1024 * 1024)))
+
+
+class StyleGuideCache:
+    """이미지 CSS 스타일 가이드 캐시 (SQLite, 크기 제한 LRU)
+
+    키는 이미지 원본 바이트의 해시 + 분석 프롬프트 버전 + 모델 ID이므로, 같은 참조 이미지를
+    여러 방/반복 작업에서 다시 써도 비전 모델을 한 번만 호출합니다.
+    이미지 URL별 ETag/Last-Modified도 함께 저장해 바뀌지 않은 이미지는 다운로드도 건너뛸 수 있게 합니다.
+    """
+
+    def __init__(self, db_path: str = STYLE_GUIDE_CACHE_PATH, max_bytes: int = STYLE_GUIDE_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "not_modified": 0}
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS style_guides (
+                    key TEXT PRIMARY KEY,
+                    image_hash TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_used REAL NOT NULL
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS image_urls (
+                    url TEXT PRIMARY KEY,
+                    image_hash TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            self._conn.execute("CREATE INDEX IF NOT EXISTS style_guides_last_used ON style_guides (last_used)")
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM style_guides").fetchone()[0]
+
+    @staticmethod
+    def make_key(image_hash: str, prompt: str, model: str) -> str:
+        """이미지 해시, 분석 프롬프트(버전), 모델 ID로 캐시 키를 만듭니다."""
+        prompt_version = hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:16]
+        raw = json.dumps([image_hash, prompt_version, model])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT value FROM style_guides WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self._stats["misses"] += 1
+                return None
+            self._conn.execute("UPDATE style_guides SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._stats["hits"] += 1
+            return row[0]
+
+    def contains(self, key: str) -> bool:
+        """통계나 사용 시각을 바꾸지 않고 항목이 있는지만 확인합니다."""
+        with self._lock:
+            return self._conn.execute("SELECT 1 FROM style_guides WHERE key = ?", (key,)).fetchone() is not None
+
+    def set(self, key: str, image_hash: str, value: str):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT size FROM style_guides WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._bytes -= row[0]
+            self._conn.execute(
+                "INSERT OR REPLACE INTO style_guides (key, image_hash, value, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, image_hash, value, size, time.time())
+            )
+            self._bytes += size
+            self._evict()
+
+    def validators(self, url: str) -> Optional[Tuple[str, Optional[str], Optional[str]]]:
+        """URL에서 마지막으로 받은 이미지의 (해시, ETag, Last-Modified)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT image_hash, etag, last_modified FROM image_urls WHERE url = ?", (url,)
+            ).fetchone()
+        if row is None or not (row[1] or row[2]):
+            return None
+        return row[0], row[1], row[2]
+
+    def remember_url(self, url: str, image_hash: str, etag: Optional[str], last_modified: Optional[str]):
+        """다음 조건부 요청을 위해 URL의 이미지 해시와 응답 헤더를 저장합니다."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO image_urls (url, image_hash, etag, last_modified, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (url, image_hash, etag, last_modified, time.time())
+            )
+
+    def record_not_modified(self):
+        with self._lock:
+            self._stats["not_modified"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            entries = self._conn.execute("SELECT COUNT(*) FROM style_guides").fetchone()[0]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 4) if lookups else 0.0,
+                "entries": entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes
+            }
+
+    def _evict(self):
+        evicted = False
+        while self._bytes > self.max_bytes:
+            row = self._conn.execute(
+                "SELECT key, size FROM style_guides ORDER BY last_used LIMIT 1"
+            ).fetchone()
+            if row is None:
+                break
+            self._conn.execute("DELETE FROM style_guides WHERE key = ?", (row[0],))
+            self._bytes -= row[1]
+            self._stats["evictions"] += 1
+            evicted = True
+        if evicted:
+            # 스타일 가이드가 모두 지워진 이미지의 URL 기록도 정리
+            self._conn.execute(
+                "DELETE FROM image_urls WHERE image_hash NOT IN (SELECT image_hash FROM style_guides)"
+            )
+
+
+_style_guide_cache: Optional[StyleGuideCache] = None
+_style_guide_cache_lock = threading.Lock()
+
+
+def get_style_guide_cache() -> Optional[StyleGuideCache]:
+    """프로세스 전체에서 공유하는 스타일 가이드 캐시 (꺼져 있으면 None)"""
+    global _style_guide_cache
+    if not STYLE_GUIDE_CACHE_ENABLED:
+        return None
+    with _style_guide_cache_lock:
+        if _style_guide_cache is None:
+            _style_guide_cache = StyleGuideCache()
+        return _style_guide_cache
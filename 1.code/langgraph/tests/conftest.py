@@ -0,0 +1,22 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# 모듈들이 가져올 때 환경 변수를 읽고 현재 디렉터리에 산출물 폴더를 만들므로,
+# 테스트 모듈을 가져오기 전에 임시 디렉터리와 외부 호출 없는 설정을 준비
+os.chdir(tempfile.mkdtemp(prefix='langgraph-tests-'))
+os.environ.setdefault('OPEN_AI_KEY', 'test-key')
+os.environ.setdefault('JOB_DB_PATH', ':memory:')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def client():
+    from fastapi.testclient import TestClient
+    import main
+
+    with TestClient(main.app) as test_client:
+        yield test_client
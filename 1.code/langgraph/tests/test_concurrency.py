@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from concurrency import StageGraph, iterate_blocking
+
+
+def test_iterate_blocking_yields_items():
+    async def collect():
+        return [item async for item in iterate_blocking(iter([1, 2, 3]))]
+
+    assert asyncio.run(collect()) == [1, 2, 3]
+
+
+def test_iterate_blocking_closes_upstream_after_pending_next():
+    closed = threading.Event()
+    in_next = threading.Event()
+
+    def upstream():
+        try:
+            yield "first"
+            in_next.set()
+            time.sleep(0.3)
+            yield "second"
+        finally:
+            closed.set()
+
+    # 가비지 컬렉션으로 닫히지 않도록 참조를 유지
+    stream = upstream()
+
+    async def scenario():
+        async def consume():
+            async for _ in iterate_blocking(stream):
+                pass
+
+        task = asyncio.create_task(consume())
+        while not in_next.is_set():
+            await asyncio.sleep(0.01)
+        # next()가 스레드에서 실행 중일 때 클라이언트 연결이 끊긴 상황
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+    assert closed.wait(2)
+
+
+def test_stage_graph_passes_dependency_results():
+    graph = StageGraph()
+    graph.add('image', lambda: 'png')
+    graph.add('style', lambda image: f'style({image})', 'image')
+    graph.add('prompt', lambda style, image: f'{style}+{image}', 'style', 'image')
+
+    assert graph.run() == {'image': 'png', 'style': 'style(png)', 'prompt': 'style(png)+png'}
+
+
+def test_stage_graph_runs_independent_stages_in_parallel():
+    barrier = threading.Barrier(2, timeout=2)
+    graph = StageGraph()
+    graph.add('left', lambda: barrier.wait())
+    graph.add('right', lambda: barrier.wait())
+
+    assert set(graph.run()) == {'left', 'right'}
+
+
+def test_stage_graph_propagates_failure():
+    def broken():
+        raise RuntimeError("image download failed")
+
+    graph = StageGraph()
+    graph.add('image', broken)
+    graph.add('style', lambda image: image, 'image')
+
+    with pytest.raises(RuntimeError, match="image download failed"):
+        graph.run()
+
+
+def test_stage_graph_rejects_missing_dependency_and_duplicates():
+    graph = StageGraph()
+    graph.add('style', lambda image: image, 'image')
+    with pytest.raises(ValueError):
+        graph.run()
+    with pytest.raises(ValueError):
+        graph.add('style', lambda: None)
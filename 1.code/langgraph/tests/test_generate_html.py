@@ -0,0 +1,18 @@
+def test_missing_prd_is_404(client):
+    response = client.post('/generate-html', json={'prd_file_path': 'prd_outputs/missing.md'})
+
+    assert response.status_code == 404
+    assert response.json()['detail'] == "PRD 파일을 찾을 수 없습니다."
+
+
+def test_missing_prd_ir_is_404(client):
+    import main
+
+    prd = main.artifact_store.put('prd', '# 테스트 PRD\n')
+    response = client.post('/generate-html', json={
+        'prd_file_path': prd.path,
+        'prd_ir_file_path': '../../etc/passwd',
+    })
+
+    assert response.status_code == 404
+    assert response.json()['detail'] == "구조화 PRD 파일을 찾을 수 없습니다."
@@ -0,0 +1,79 @@
+import pytest
+
+from html_patch import HTMLPatchError, apply_edits, parse_edits
+
+DOCUMENT = """<!DOCTYPE html>
+<html>
+<body>
+  <h1>주문 목록</h1>
+  <ul id="orders">
+    <li>첫 주문</li>
+  </ul>
+</body>
+</html>"""
+
+
+def test_parse_edits_reads_json_wrapped_in_text():
+    text = '설명입니다.\n```json\n{"edits": [{"op": "replace", "find": "<h1>", "content": "<h2>"}]}\n```'
+
+    assert parse_edits(text) == [{"op": "replace", "find": "<h1>", "content": "<h2>"}]
+
+
+@pytest.mark.parametrize('text', [
+    '수정할 것이 없습니다',
+    '{"edits": []}',
+    '{"regenerate": true, "reason": "구조가 많이 바뀜"}',
+    '{"edits": [{"op": "rewrite", "find": "<h1>", "content": "x"}]}',
+    '{"edits": [{"op": "replace", "find": " ", "content": "x"}]}',
+    '{"edits": [{"op": "insert_after", "find": "<h1>"}]}',
+    '{"edits": [',
+])
+def test_parse_edits_rejects_invalid_responses(text):
+    with pytest.raises(HTMLPatchError):
+        parse_edits(text)
+
+
+def test_parse_edits_allows_delete_without_content():
+    edits = parse_edits('{"edits": [{"op": "delete", "find": "<li>첫 주문</li>"}]}')
+
+    assert edits == [{"op": "delete", "find": "<li>첫 주문</li>", "content": ""}]
+
+
+def test_apply_edits_runs_every_op_in_order():
+    patched = apply_edits(DOCUMENT, [
+        {"op": "replace", "find": "<h1>주문 목록</h1>", "content": "<h1>최근 주문</h1>"},
+        {"op": "insert_after", "find": "<li>첫 주문</li>", "content": "\n    <li>두 번째 주문</li>"},
+        {"op": "insert_before", "find": '<ul id="orders">', "content": "<p>총 2건</p>\n  "},
+        {"op": "delete", "find": "<li>첫 주문</li>", "content": ""},
+    ])
+
+    assert "<h1>최근 주문</h1>" in patched
+    assert '<p>총 2건</p>\n  <ul id="orders">' in patched
+    assert "첫 주문" not in patched
+    assert "<li>두 번째 주문</li>" in patched
+
+
+def test_apply_edits_ignores_whitespace_differences_in_find():
+    patched = apply_edits(DOCUMENT, [
+        {"op": "replace", "find": '<ul id="orders"> <li>첫 주문</li>', "content": '<ul id="orders"><li>새 주문</li>'},
+    ])
+
+    assert '<ul id="orders"><li>새 주문</li>' in patched
+
+
+def test_apply_edits_rejects_ambiguous_or_missing_find():
+    with pytest.raises(HTMLPatchError, match="2곳"):
+        apply_edits(DOCUMENT + "<!-- <li>첫 주문</li> -->", [
+            {"op": "delete", "find": "<li>첫 주문</li>", "content": ""},
+        ])
+    with pytest.raises(HTMLPatchError, match="0곳"):
+        apply_edits(DOCUMENT, [{"op": "delete", "find": "<table>", "content": ""}])
+
+
+@pytest.mark.parametrize('edit', [
+    {"op": "delete", "find": "</ul>", "content": ""},
+    {"op": "delete", "find": "</body>\n</html>", "content": ""},
+])
+def test_apply_edits_rejects_broken_documents(edit):
+    with pytest.raises(HTMLPatchError):
+        apply_edits(DOCUMENT, [edit])
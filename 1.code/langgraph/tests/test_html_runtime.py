@@ -0,0 +1,79 @@
+import json
+
+from html_runtime import (RUNTIME_VERSION, RuntimeScanner, inject_runtime, render_runtime, runtime_config,
+                          runtime_version, strip_runtime)
+
+PAGE = "<!DOCTYPE html>\n<html>\n<body>\n<div id=\"dynamicContent\"></div>\n</body>\n</html>"
+CONFIG = runtime_config("쇼핑몰 </script> 관리자", "https://api.example.com/llm", "https://api.example.com/llm/stream")
+
+
+def test_inject_runtime_places_block_before_body_end():
+    html = inject_runtime(PAGE, CONFIG)
+
+    assert html.index("llm-runtime:end") < html.index("</body>")
+    assert runtime_version(html) == RUNTIME_VERSION
+    # 설정 값이 script 태그를 닫지 않도록 이스케이프됨
+    assert "쇼핑몰 </script>" not in html
+
+
+def test_inject_runtime_replaces_existing_block():
+    once = inject_runtime(PAGE, CONFIG)
+    twice = inject_runtime(once, {**CONFIG, "title": "재고 대시보드"})
+
+    assert twice.count("llm-runtime:start") == 1
+    assert strip_runtime(twice)[1]["title"] == "재고 대시보드"
+
+
+def test_inject_runtime_keeps_legacy_documents():
+    legacy = PAGE.replace("</body>", "<script>function callLLM(prompt) { return prompt; }</script></body>")
+
+    assert inject_runtime(legacy, CONFIG) == legacy
+
+
+def test_inject_runtime_without_body_appends():
+    html = inject_runtime("<div>조각</div>", CONFIG)
+
+    assert html.startswith("<div>조각</div><!-- llm-runtime:start")
+
+
+def test_strip_runtime_round_trip():
+    stripped, config = strip_runtime(inject_runtime(PAGE, CONFIG))
+
+    assert stripped == PAGE
+    assert config == json.loads(json.dumps(CONFIG))
+    assert strip_runtime(PAGE) == (PAGE, None)
+
+
+def test_scanner_finds_block_split_across_chunks():
+    html = inject_runtime(PAGE, CONFIG)
+    marker = html.index("llm-runtime:start")
+    scanner = RuntimeScanner()
+
+    for chunk in (html[:marker + 5], html[marker + 5:marker + 12], html[marker + 12:]):
+        assert scanner.feed(chunk) == chunk
+
+    assert scanner.found
+
+
+def test_scanner_finds_model_written_runtime_anywhere_in_stream():
+    scanner = RuntimeScanner()
+    scanner.feed("<html><body><script>async function call")
+    scanner.feed("LLM(prompt) {}</script>")
+    scanner.feed("x" * 500 + "</body></html>")
+
+    assert scanner.found
+
+
+def test_scanner_without_runtime():
+    scanner = RuntimeScanner()
+    for chunk in (PAGE[:10], PAGE[10:]):
+        scanner.feed(chunk)
+
+    assert not scanner.found
+
+
+def test_render_runtime_contains_config_script():
+    block = render_runtime(CONFIG)
+
+    assert 'id="llm-runtime-config"' in block
+    assert f'data-version="{RUNTIME_VERSION}"' in block
@@ -0,0 +1,57 @@
+import asyncio
+import threading
+
+from job_queue import FAILED, SUCCEEDED, JobError, JobQueue, JobStore
+
+
+def test_store_writes_run_off_the_loop():
+    store = JobStore(':memory:')
+    threads = []
+    create = store.create
+
+    def recording_create(request):
+        threads.append(threading.current_thread())
+        return create(request)
+
+    store.create = recording_create
+
+    async def scenario():
+        job_id = await store.acreate({'a': 1})
+        await store.arecord_stage(job_id, 'prd', 1.23456)
+        await store.aset_status(job_id, SUCCEEDED, result={'ok': True})
+        return job_id
+
+    job = store.get(asyncio.run(scenario()))
+    store.close()
+
+    assert threads and threads[0] is not threading.main_thread()
+    assert job['status'] == SUCCEEDED
+    assert job['result'] == {'ok': True}
+    assert job['stages']['prd']['seconds'] == 1.235
+
+
+def test_queue_records_job_error_result():
+    store = JobStore(':memory:')
+
+    async def runner(job_id, request):
+        if request['fail']:
+            raise JobError("upload failed", result={'prd_file': 'prd.md'})
+        return {'done': True}
+
+    async def scenario():
+        queue = JobQueue(store, runner, workers=2)
+        await queue.start()
+        ok = await queue.enqueue({'fail': False})
+        failed = await queue.enqueue({'fail': True})
+        await queue._queue.join()
+        await queue.stop()
+        return ok, failed
+
+    ok, failed = asyncio.run(scenario())
+
+    assert store.get(ok)['status'] == SUCCEEDED
+    failed_job = store.get(failed)
+    assert failed_job['status'] == FAILED
+    assert failed_job['error'] == "upload failed"
+    assert failed_job['result'] == {'prd_file': 'prd.md'}
+    store.close()
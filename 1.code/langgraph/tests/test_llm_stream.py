@@ -0,0 +1,16 @@
+def test_stream_error_sends_error_and_done(client, monkeypatch):
+    import main
+
+    def failing_stream(prompt):
+        yield "부분 "
+        raise RuntimeError("upstream closed")
+
+    monkeypatch.setattr(main.llm_client, 'generate_text_stream', failing_stream)
+    response = client.post('/llm/stream', json={'prompt': '스트림 오류 테스트 프롬프트'})
+
+    assert response.status_code == 200
+    body = response.text
+    assert 'event: error' in body
+    assert 'upstream closed' in body
+    assert body.rstrip().splitlines()[-2] == 'event: done'
+    assert '"error": true' in body
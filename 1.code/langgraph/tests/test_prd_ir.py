@@ -0,0 +1,54 @@
+import json
+
+import pytest
+
+from prd_ir import IR_EXAMPLE, PRD_IR_VERSION, PRDIRError, load_prd_ir, parse_prd_ir
+
+
+def _payload(**overrides):
+    payload = json.loads(IR_EXAMPLE)
+    payload.update(overrides)
+    return payload
+
+
+def test_parse_prd_ir_accepts_example_wrapped_in_text():
+    ir = parse_prd_ir(f"구조화 PRD입니다.\n```json\n{IR_EXAMPLE}\n```")
+
+    assert ir.version == PRD_IR_VERSION
+    assert ir.title == "프로젝트 이름"
+    assert ir.data_panels[0].id == "recentOrders"
+    assert ir.style.css_guide == ""
+
+
+def test_prioritized_features_keeps_order_within_priority():
+    ir = parse_prd_ir(json.dumps(_payload(features=[
+        {"name": "보고서", "priority": "could"},
+        {"name": "검색", "priority": "should"},
+        {"name": "주문 목록", "priority": "must"},
+        {"name": "필터", "priority": "should"},
+    ])))
+
+    assert [feature.name for feature in ir.prioritized_features()] == ["주문 목록", "검색", "필터", "보고서"]
+
+
+@pytest.mark.parametrize('text', [
+    "JSON이 없습니다",
+    '{"title": "제목"',
+    json.dumps(_payload(features=[])),
+    json.dumps(_payload(unknown=True)),
+    json.dumps(_payload(features=[{"name": "검색", "priority": "urgent"}])),
+    json.dumps(_payload(data_panels=[{"id": "1panel", "title": "패널", "prompt": "내용"}])),
+])
+def test_parse_prd_ir_rejects_invalid_responses(text):
+    with pytest.raises(PRDIRError):
+        parse_prd_ir(text)
+
+
+def test_load_prd_ir_round_trip_and_version_check():
+    ir = parse_prd_ir(IR_EXAMPLE)
+
+    assert load_prd_ir(ir.to_json()) == ir
+    stored = json.loads(ir.to_json())
+    stored["version"] = PRD_IR_VERSION + 1
+    with pytest.raises(PRDIRError):
+        load_prd_ir(json.dumps(stored))
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import pytest
+
+from rate_limiter import (AdaptiveLimiter, LimiterCancelled, LimiterRegistry, LimiterTimeout, is_throttle,
+                          throttle_backoff)
+
+
+class ThrottlingException(Exception):
+    pass
+
+
+def test_window_limits_concurrent_permits():
+    limiter = AdaptiveLimiter('test', window=2, rps=100)
+    first, second = limiter.acquire(), limiter.acquire()
+
+    with pytest.raises(LimiterTimeout):
+        limiter.acquire(timeout=0.05)
+
+    second.release()
+    limiter.acquire(timeout=1).release()
+    first.release()
+    assert limiter.stats()["timeouts"] == 1
+
+
+def test_successes_grow_window_and_throttle_halves_it():
+    limiter = AdaptiveLimiter('test', window=2, max_window=8, rps=100)
+    # 창이 가득 찬 상태에서 성공해야 늘어남
+    permits = [limiter.acquire(), limiter.acquire()]
+    for permit in permits:
+        permit.succeeded()
+        permit.release()
+    grown = limiter.window
+    assert grown > 2
+
+    with limiter.acquire() as permit:
+        permit.throttled()
+
+    assert limiter.window == pytest.approx(grown / 2)
+    assert limiter.stats()["throttles"] == 1
+
+
+def test_idle_successes_do_not_grow_window():
+    limiter = AdaptiveLimiter('test', window=4, rps=100)
+    for _ in range(10):
+        with limiter.acquire() as permit:
+            permit.succeeded()
+
+    assert limiter.window == 4
+
+
+def test_concurrent_throttles_decrease_once():
+    limiter = AdaptiveLimiter('test', window=8, rps=100)
+    permits = [limiter.acquire() for _ in range(3)]
+    for permit in permits:
+        permit.throttled()
+        permit.release()
+
+    assert limiter.window == 4
+
+
+def test_release_is_idempotent():
+    limiter = AdaptiveLimiter('test', window=1, rps=100)
+    permit = limiter.acquire()
+    permit.release()
+    permit.release()
+
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_cancelled_wait_stops_promptly():
+    limiter = AdaptiveLimiter('test', window=1, rps=100)
+    held = limiter.acquire()
+    cancelled = threading.Event()
+    threading.Timer(0.05, cancelled.set).start()
+
+    started = time.monotonic()
+    with pytest.raises(LimiterCancelled):
+        limiter.acquire(timeout=5, cancelled=cancelled)
+    assert time.monotonic() - started < 1
+    held.release()
+
+
+def test_registry_shares_limiters_and_can_be_disabled():
+    registry = LimiterRegistry(enabled=True)
+    assert registry.get('bedrock:model') is registry.get('bedrock:model')
+    assert LimiterRegistry(enabled=False).get('bedrock:model') is None
+
+
+def test_is_throttle():
+    class BotoError(Exception):
+        response = {'Error': {'Code': 'ThrottlingException'}}
+
+    class RateLimited(Exception):
+        status_code = 429
+
+    assert is_throttle(BotoError())
+    assert is_throttle(RateLimited())
+    assert is_throttle(ThrottlingException())
+    assert not is_throttle(ValueError("bad request"))
+
+
+def test_throttle_backoff_is_capped():
+    assert all(0 <= throttle_backoff(attempt, max_backoff=2) <= 2 for attempt in range(10))
@@ -0,0 +1,84 @@
+import pytest
+
+from similarity_cache import SimilarityCache, literals, same_key_terms, tokens
+
+BODY = ("아래 조건에 맞는 관리 화면의 검색 결과 목록을 HTML 조각으로 만들어 주세요. "
+        "각 행에는 이름, 상태, 최근 변경일을 보여 주고, 상태는 배지로 표시합니다. "
+        "결과가 없으면 안내 문구를 보여 주세요. 검색어: \"주문\"")
+
+
+def test_literals_collects_numbers_and_quoted_values():
+    assert literals('2024년 "주문 " 검색, ‘A  b’') == {'2024', '주문', 'a b'}
+
+
+def test_different_project_title_hits():
+    cache = SimilarityCache()
+    cache.set("프로젝트: 쇼핑몰 관리자\n" + BODY, "fragment")
+
+    hit = cache.get("프로젝트: 재고 대시보드\n" + BODY)
+
+    assert hit is not None and hit[0] == "fragment"
+
+
+def test_whitespace_inside_quotes_hits():
+    cache = SimilarityCache()
+    cache.set(BODY, "fragment")
+
+    assert cache.get(BODY.replace('"주문"', '"주문 "')) == ("fragment", 1.0)
+
+
+@pytest.mark.parametrize('changed', [
+    BODY.replace('"주문"', '"재고"'),
+    BODY + " 최근 3건만",
+])
+def test_different_literals_are_rejected(changed):
+    cache = SimilarityCache()
+    cache.set(BODY + (" 최근 5건만" if changed.endswith("건만") else ""), "fragment")
+
+    assert cache.get(changed) is None
+    assert cache.stats()["rejected"] == 1
+
+
+def test_strict_guard_rejects_changed_title():
+    cache = SimilarityCache(guard='strict')
+    cache.set("프로젝트: 쇼핑몰 관리자\n" + BODY, "fragment")
+
+    assert cache.get("프로젝트: 재고 대시보드\n" + BODY) is None
+    assert cache.stats()["rejected"] == 1
+
+
+def test_same_key_terms():
+    assert same_key_terms(tokens("주문 목록 알려줘"), tokens("주문 목록 알려주세요"))
+    assert not same_key_terms(tokens("재고 관리"), tokens("주문 관리"))
+    assert not same_key_terms(tokens("3월 매출"), tokens("4월 매출"))
+
+
+def test_namespaces_do_not_share_entries():
+    cache = SimilarityCache()
+    cache.set(BODY, "fragment", namespace="a")
+
+    assert cache.get(BODY, namespace="b") is None
+
+
+def test_unknown_guard_is_rejected():
+    with pytest.raises(ValueError):
+        SimilarityCache(guard='loose')
+
+
+def test_record_prompt_writes_in_background(tmp_path, monkeypatch):
+    import json
+    import time
+
+    import similarity_cache
+
+    log = tmp_path / 'traffic.jsonl'
+    monkeypatch.setattr(similarity_cache, 'LLM_TRAFFIC_LOG', str(log))
+    similarity_cache.record_prompt("첫 번째 프롬프트")
+    similarity_cache.record_prompt("두 번째 프롬프트")
+
+    deadline = time.monotonic() + 5
+    while time.monotonic() < deadline and (not log.exists() or len(log.read_text().splitlines()) < 2):
+        time.sleep(0.01)
+
+    prompts = [json.loads(line)['prompt'] for line in log.read_text(encoding='utf-8').splitlines()]
+    assert prompts == ["첫 번째 프롬프트", "두 번째 프롬프트"]
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from single_flight import SingleFlight
+
+
+def test_ado_shares_one_call_between_concurrent_requests():
+    flight = SingleFlight()
+    calls = []
+
+    async def generate():
+        calls.append(threading.current_thread())
+        await asyncio.sleep(0.05)
+        return "fragment"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.ado('key', generate) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == ["fragment"] * 5
+    assert len(calls) == 1
+    assert flight.stats() == {"calls": 1, "shared": 4, "wait_timeouts": 0, "in_flight": 0}
+
+
+def test_ado_shares_errors_with_followers():
+    flight = SingleFlight()
+
+    async def broken():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("throttled")
+
+    async def scenario():
+        return await asyncio.gather(flight.ado('key', broken), flight.ado('key', broken),
+                                    return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert [str(result) for result in results] == ["throttled", "throttled"]
+
+
+def test_ado_follower_takes_over_when_leader_is_cancelled():
+    flight = SingleFlight()
+
+    async def slow():
+        await asyncio.sleep(10)
+
+    async def fast():
+        return "fragment"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.ado('key', slow))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.ado('key', fast))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    assert asyncio.run(scenario()) == "fragment"
+
+
+def test_do_follower_wait_is_bounded():
+    flight = SingleFlight(max_wait=0.05)
+    release = threading.Event()
+    leader = threading.Thread(target=flight.do, args=('key', lambda: release.wait(2) and "leader"))
+    leader.start()
+    time.sleep(0.02)
+
+    started = time.monotonic()
+    assert flight.do('key', lambda: "own call") == "own call"
+    assert time.monotonic() - started < 1
+    assert flight.stats()["wait_timeouts"] == 1
+
+    release.set()
+    leader.join()
+
+
+def test_do_shares_result():
+    flight = SingleFlight()
+    release = threading.Event()
+    results = []
+    leader = threading.Thread(target=lambda: results.append(flight.do('key', lambda: release.wait(2) and "x")))
+    leader.start()
+    time.sleep(0.02)
+    follower = threading.Thread(target=lambda: results.append(flight.do('key', lambda: pytest.fail("called"))))
+    follower.start()
+    time.sleep(0.02)
+    release.set()
+    leader.join()
+    follower.join()
+
+    assert results == ["x", "x"]
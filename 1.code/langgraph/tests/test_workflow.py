@@ -0,0 +1,46 @@
+import types
+
+import html_agent
+import workflow
+from workflow import Workflow
+
+
+class _StubPRDAgent:
+    def __init__(self):
+        self.calls = []
+
+    def create_prd(self, **kwargs):
+        self.calls.append(kwargs)
+        return types.SimpleNamespace(path='prd_outputs/prd.md')
+
+
+class _StubHTMLAgent:
+    def __init__(self):
+        self.calls = []
+
+    def create_html(self, prd, **kwargs):
+        self.calls.append(kwargs)
+        return types.SimpleNamespace(path='html_outputs/index.html')
+
+
+def test_existing_html_is_fetched_once_and_shared(monkeypatch):
+    fetched = []
+    monkeypatch.setattr(workflow, 'fetch_html', lambda url: fetched.append(url) or "<html>기존</html>")
+    flow = Workflow('http://llm.invalid/llm')
+    flow.prd_agent, flow.html_agent = _StubPRDAgent(), _StubHTMLAgent()
+
+    flow.run_complete_workflow("요약", html_url='https://example.com/index.html')
+
+    assert fetched == ['https://example.com/index.html']
+    assert flow.prd_agent.calls[0]['existing_html'] == "<html>기존</html>"
+    assert flow.html_agent.calls[0]['existing_html'] == "<html>기존</html>"
+
+
+def test_failed_fetch_is_not_retried_by_the_agents(monkeypatch):
+    def unreachable(url):
+        raise AssertionError("기존 HTML을 다시 내려받으면 안 됩니다")
+
+    monkeypatch.setattr(html_agent, 'fetch_html', unreachable)
+    agent = html_agent.HTMLAgent('http://llm.invalid/llm')
+
+    assert agent._patch_existing_html("# PRD", 'https://example.com/index.html', existing_html="") is None
@@ -0,0 +1,319 @@
+import json
+import os
+import queue
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterator, List, Optional, Union
+import requests
+from dotenv import load_dotenv
+
+# .env 파일 로드
+load_dotenv()
+
+# 추적 결과를 내보낼 곳 (none: 끔, file: JSON Lines 파일, otlp: OTLP/HTTP JSON 수집기)
+TRACE_EXPORTER = os.getenv('TRACE_EXPORTER', 'none').lower()
+# file 내보내기 경로
+TRACE_FILE = os.getenv('TRACE_FILE', 'traces/spans.jsonl')
+# otlp 내보내기 주소 (OpenTelemetry Collector 등)
+TRACE_OTLP_ENDPOINT = os.getenv('TRACE_OTLP_ENDPOINT', 'http://localhost:4318/v1/traces')
+# 새로 시작하는 추적 중 기록할 비율
+TRACE_SAMPLE_RATE = float(os.getenv('TRACE_SAMPLE_RATE', '1.0'))
+# 내보낼 때 한 번에 묶는 span 수 / 최대 대기 시간 (초)
+TRACE_BATCH_SIZE = int(os.getenv('TRACE_BATCH_SIZE', '128'))
+TRACE_FLUSH_INTERVAL = float(os.getenv('TRACE_FLUSH_INTERVAL', '2'))
+TRACE_SERVICE_NAME = os.getenv('TRACE_SERVICE_NAME', 'langgraph-prd-html')
+
+_TRACEPARENT = re.compile(r'^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$')
+
+Attribute = Union[str, int, float, bool]
+
+
+class Span:
+    """추적 안의 작업 단위 하나 (이름, 부모, 시작/끝 시각, 속성)"""
+
+    def __init__(self, tracer: 'Tracer', name: str, trace_id: str, parent_id: Optional[str],
+                 attributes: Dict[str, Attribute]):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _random_hex(16)
+        self.parent_id = parent_id
+        self.attributes = {key: value for key, value in attributes.items() if value is not None}
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+
+    @property
+    def recording(self) -> bool:
+        return True
+
+    @property
+    def traceparent(self) -> str:
+        """W3C traceparent 헤더 값"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Attribute):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, **attributes: Attribute):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def add(self, key: str, amount: int = 1):
+        """숫자 속성을 누적합니다. (재시도 횟수 등)"""
+        self.attributes[key] = self.attributes.get(key, 0) + amount
+
+    def record_error(self, error: BaseException):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer._enqueue(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start_ns / 1e9,
+            "duration": round((self.end_ns - self.start_ns) / 1e9, 6),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    """추적을 끄거나 표본에서 빠진 경우 쓰는 빈 span"""
+
+    recording = False
+    traceparent = None
+    trace_id = None
+
+    def set_attribute(self, key: str, value: Attribute):
+        pass
+
+    def set_attributes(self, **attributes: Attribute):
+        pass
+
+    def add(self, key: str, amount: int = 1):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+_current_span: ContextVar[Optional[Union[Span, _NoopSpan]]] = ContextVar('current_span', default=None)
+
+
+class FileExporter:
+    """span을 JSON Lines 파일에 추가합니다."""
+
+    def __init__(self, path: str = TRACE_FILE):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: List[Span]):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), ensure_ascii=False) + '\n')
+
+
+class OTLPExporter:
+    """span을 OTLP/HTTP JSON 형식으로 수집기에 보냅니다."""
+
+    def __init__(self, endpoint: str = TRACE_OTLP_ENDPOINT, service_name: str = TRACE_SERVICE_NAME):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.session = requests.Session()
+
+    def export(self, spans: List[Span]):
+        payload = {
+            "resourceSpans": [{
+                "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+                "scopeSpans": [{
+                    "scope": {"name": "langgraph"},
+                    "spans": [self._span(span) for span in spans]
+                }]
+            }]
+        }
+        response = self.session.post(self.endpoint, json=payload, timeout=5)
+        response.raise_for_status()
+
+    def _span(self, span: Span) -> Dict[str, Any]:
+        data = {
+            "traceId": span.trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": [_otlp_attribute(key, value) for key, value in span.attributes.items()],
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            data["parentSpanId"] = span.parent_id
+        return data
+
+
+class Tracer:
+    """요청마다 추적 ID를 만들고 단계별 span을 중첩해 기록합니다.
+
+    현재 span은 contextvars로 전달되므로 같은 요청 안의 함수 호출, asyncio 작업,
+    run_blocking으로 넘긴 스레드 풀 작업에서도 부모-자식 관계가 유지됩니다.
+    끝난 span은 백그라운드 스레드가 묶어서 파일이나 OTLP 수집기로 내보냅니다.
+    """
+
+    def __init__(self, exporter: str = TRACE_EXPORTER, sample_rate: float = TRACE_SAMPLE_RATE):
+        self.exporter = None
+        if exporter == 'file':
+            self.exporter = FileExporter()
+        elif exporter == 'otlp':
+            self.exporter = OTLPExporter()
+        elif exporter != 'none':
+            raise ValueError(f"알 수 없는 TRACE_EXPORTER 값입니다: {exporter}")
+        self.sample_rate = sample_rate
+        self._queue: 'queue.Queue[Optional[Span]]' = queue.Queue()
+        self._stats = {"spans": 0, "exported": 0, "export_errors": 0}
+        self._thread: Optional[threading.Thread] = None
+        self._flush_requested = threading.Event()
+        if self.exporter is not None:
+            self._thread = threading.Thread(target=self._run, name='trace-exporter', daemon=True)
+            self._thread.start()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    def start_span(self, name: str, parent: Union[Span, _NoopSpan, str, None] = None,
+                   **attributes: Attribute) -> Union[Span, _NoopSpan]:
+        """span을 시작합니다. (현재 span으로 설정하지 않음, 제너레이터 안에서 사용)
+
+        parent가 없으면 현재 span을 부모로 쓰고, traceparent 문자열이면 그 추적을 이어갑니다.
+        """
+        if not self.enabled:
+            return NOOP_SPAN
+        if parent is None:
+            parent = _current_span.get()
+        if isinstance(parent, str):
+            parent = self._parse_traceparent(parent)
+        if parent is NOOP_SPAN:
+            return NOOP_SPAN
+        if parent is None:
+            if random.random() >= self.sample_rate:
+                return NOOP_SPAN
+            return Span(self, name, _random_hex(32), None, attributes)
+        if isinstance(parent, tuple):
+            trace_id, parent_id, sampled = parent
+            if not sampled:
+                return NOOP_SPAN
+            return Span(self, name, trace_id, parent_id, attributes)
+        return Span(self, name, parent.trace_id, parent.span_id, attributes)
+
+    @contextmanager
+    def span(self, name: str, parent: Union[Span, _NoopSpan, str, None] = None,
+             **attributes: Attribute) -> Iterator[Union[Span, _NoopSpan]]:
+        """span을 시작하고 블록 안에서 현재 span으로 설정합니다. 예외는 span에 기록됩니다."""
+        span = self.start_span(name, parent, **attributes)
+        previous = _current_span.get()
+        # reset 토큰은 다른 Context(스레드 풀 작업 등)에서 쓸 수 없으므로 이전 값을 직접 되돌림
+        _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            _current_span.set(previous)
+            span.end()
+
+    @contextmanager
+    def activate(self, span: Union[Span, _NoopSpan]) -> Iterator[Union[Span, _NoopSpan]]:
+        """이미 시작한 span을 블록 안에서만 현재 span으로 설정합니다. (끝내지는 않음)"""
+        previous = _current_span.get()
+        _current_span.set(span)
+        try:
+            yield span
+        finally:
+            _current_span.set(previous)
+
+    def current_span(self) -> Union[Span, _NoopSpan]:
+        return _current_span.get() or NOOP_SPAN
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "enabled": self.enabled, "pending": self._queue.qsize()}
+
+    def flush(self, timeout: float = 5):
+        """대기 중인 span을 내보냅니다. (종료 시)"""
+        if self._thread is None:
+            return
+        self._flush_requested.set()
+        deadline = time.monotonic() + timeout
+        while self._queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.05)
+        self._flush_requested.clear()
+
+    def _parse_traceparent(self, value: str):
+        match = _TRACEPARENT.match(value.strip().lower())
+        if not match:
+            return None
+        trace_id, parent_id, flags = match.groups()
+        return trace_id, parent_id, int(flags, 16) & 1 == 1
+
+    def _enqueue(self, span: Span):
+        self._stats["spans"] += 1
+        self._queue.put(span)
+
+    def _run(self):
+        batch: List[Span] = []
+        deadline = time.monotonic() + TRACE_FLUSH_INTERVAL
+        while True:
+            flushing = self._flush_requested.is_set()
+            try:
+                timeout = 0.05 if flushing else max(0.0, deadline - time.monotonic())
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+            if batch and (len(batch) >= TRACE_BATCH_SIZE or flushing or time.monotonic() >= deadline):
+                try:
+                    self.exporter.export(batch)
+                    self._stats["exported"] += len(batch)
+                except Exception as e:
+                    self._stats["export_errors"] += 1
+                    print(f"추적 내보내기 오류: {e}")
+                for _ in batch:
+                    self._queue.task_done()
+                batch = []
+            if time.monotonic() >= deadline:
+                deadline = time.monotonic() + TRACE_FLUSH_INTERVAL
+
+
+def _random_hex(length: int) -> str:
+    return f"{random.getrandbits(length * 4):0{length}x}"
+
+
+def _otlp_attribute(key: str, value: Attribute) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+# 프로세스 전체에서 공유하는 추적기
+tracer = Tracer()
@@ -1,7 +1,14 @@
 #!/usr/bin/env python3
-from prd_agent import PRDAgent
+from prd_agent import PRDAgent, PRD_HTML_CONTEXT_CHARS
 from html_agent import HTMLAgent
+from html_patch import HTML_PATCH_ENABLED, fetch_html
+from concurrency import run_blocking, workflow_slot
+from metrics import workflows_in_flight
+from tracing import tracer
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
 import os
+import time
+import uuid
 
 class Workflow:
     def __init__(self, llm_api_url: str = None):
@@ -9,32 +16,167 @@ class Workflow:
         llm_url = llm_api_url or os.getenv('LLM_API_URL', 'https://d2co7xon1r3p3l.cloudfront.net/llm')
         self.html_agent = HTMLAgent(llm_url)
     
+    def _fetch_existing_html(self, html_url: Optional[str]) -> Optional[str]:
+        """수정 시나리오의 기존 HTML을 한 번만 가져와 PRD/HTML 에이전트가 함께 사용합니다.
+
+        쓰는 쪽이 없으면 None, 가져오지 못하면 빈 문자열을 반환합니다. (에이전트가 다시 내려받지 않음)
+        """
+        if not html_url or not (HTML_PATCH_ENABLED or PRD_HTML_CONTEXT_CHARS > 0):
+            return None
+        try:
+            return fetch_html(html_url)
+        except Exception as e:
+            print(f"기존 HTML 가져오기 오류: {e}")
+            return ""
+    
     def run_complete_workflow(self, conversation_summary: str, prd_url: str = None, 
-                            image_url: str = None, html_url: str = None):
-        """PRD 생성 → HTML 생성 전체 워크플로우 실행"""
+                            image_url: str = None, html_url: str = None, owner: str = None):
+        """PRD 생성 → HTML 생성 전체 워크플로우 실행 (owner: 산출물을 참조할 작업 ID)"""
         
+        owner = owner or uuid.uuid4().hex
         print("🚀 워크플로우 시작...")
         
-        # 1. PRD 생성
-        print("📝 1단계: PRD 생성 중...")
-        prd_file = self.prd_agent.generate_prd(
-            conversation_summary=conversation_summary,
-            prd_url=prd_url,
-            image_url=image_url,
-            html_url=html_url
-        )
-        print(f"✅ PRD 생성 완료: {prd_file}")
+        with workflows_in_flight.track(), tracer.span('workflow', owner=owner):
+            existing_html = self._fetch_existing_html(html_url)
+            
+            # 1. PRD 생성
+            print("📝 1단계: PRD 생성 중...")
+            prd = self.prd_agent.create_prd(
+                conversation_summary=conversation_summary,
+                prd_url=prd_url,
+                image_url=image_url,
+                html_url=html_url,
+                owner=owner,
+                existing_html=existing_html
+            )
+            print(f"✅ PRD 생성 완료: {prd.path}")
+            
+            # 2. HTML 생성
+            print("🌐 2단계: HTML 생성 중...")
+            html = self.html_agent.create_html(prd, owner=owner, html_url=html_url,
+                                               existing_html=existing_html)
+            print(f"✅ HTML 생성 완료: {html.path}")
+        
+        print("🎉 워크플로우 완료!")
+        
+        return {
+            "owner": owner,
+            "prd_file": prd.path,
+            "html_file": html.path,
+            "prd_artifact": prd,
+            "html_artifact": html,
+            "success": True,
+            "message": "PRD와 HTML이 성공적으로 생성되었습니다."
+        }
+
+    def run_complete_workflow_stream(self, conversation_summary: str, prd_url: str = None,
+                                     image_url: str = None, html_url: str = None,
+                                     owner: str = None) -> Iterator[Dict[str, Any]]:
+        """PRD 생성 → HTML 스트리밍 생성 워크플로우를 실행하며 진행 이벤트를 순서대로 반환합니다."""
         
-        # 2. HTML 생성
-        print("🌐 2단계: HTML 생성 중...")
-        html_file = self.html_agent.generate_html(prd_file)
-        print(f"✅ HTML 생성 완료: {html_file}")
+        owner = owner or uuid.uuid4().hex
+        print("🚀 워크플로우 시작 (stream)...")
+        
+        # 제너레이터는 yield 사이에 다른 컨텍스트에서 재개되므로 span은 직접 끝냄
+        span = tracer.start_span('workflow', owner=owner, stream=True)
+        try:
+            with workflows_in_flight.track():
+                # 1. PRD 생성
+                print("📝 1단계: PRD 생성 중...")
+                with tracer.activate(span):
+                    existing_html = self._fetch_existing_html(html_url)
+                    prd = self.prd_agent.create_prd(
+                        conversation_summary=conversation_summary,
+                        prd_url=prd_url,
+                        image_url=image_url,
+                        html_url=html_url,
+                        owner=owner,
+                        existing_html=existing_html
+                    )
+                print(f"✅ PRD 생성 완료: {prd.path}")
+                yield {"event": "prd_ready", "prd_file": prd.path}
+            
+                # 2. HTML 스트리밍 생성 (파일 저장을 켠 경우 조각마다 임시 파일에 바로 기록된 뒤 해시 이름으로 확정, 패치 성공 시 한 조각)
+                print("🌐 2단계: HTML 스트리밍 생성 중...")
+                html_length = 0
+                with self.html_agent.artifact_store.open_stream('html', owner=owner) as writer:
+                    for chunk in self.html_agent.generate_html_stream(prd, writer, html_url=html_url,
+                                                                      existing_html=existing_html):
+                        html_length += len(chunk)
+                        yield {"event": "html_chunk", "delta": chunk}
+                    html = writer.commit()
+                print(f"✅ HTML 생성 완료: {html.path} ({html_length} 문자)")
+                span.set_attribute('html_chars', html_length)
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            span.end()
         
         print("🎉 워크플로우 완료!")
         
+        yield {
+            "event": "done",
+            "owner": owner,
+            "prd_file": prd.path,
+            "html_file": html.path,
+            "prd_artifact": prd,
+            "html_artifact": html,
+            "success": True,
+            "message": "PRD와 HTML이 성공적으로 생성되었습니다."
+        }
+
+    async def run_complete_workflow_async(self, conversation_summary: str, prd_url: str = None,
+                                          image_url: str = None, html_url: str = None,
+                                          owner: str = None,
+                                          on_stage: Optional[Callable[[str, float], Awaitable[None]]] = None):
+        """이벤트 루프를 막지 않고 PRD 생성 → HTML 생성 워크플로우를 실행합니다.
+
+        on_stage가 주어지면 각 단계가 끝날 때마다 (단계 이름, 소요 시간)으로 호출하고 완료를 기다립니다.
+        """
+        owner = owner or uuid.uuid4().hex
+        timings = {}
+
+        # 동시 실행 한도를 넘으면 슬롯이 빌 때까지 대기
+        async with workflow_slot():
+            with workflows_in_flight.track(), tracer.span('workflow', owner=owner):
+                print("🚀 워크플로우 시작 (async)...")
+
+                print("📝 1단계: PRD 생성 중...")
+                started = time.perf_counter()
+                existing_html = await run_blocking(self._fetch_existing_html, html_url)
+                prd = await run_blocking(
+                    self.prd_agent.create_prd,
+                    conversation_summary=conversation_summary,
+                    prd_url=prd_url,
+                    image_url=image_url,
+                    html_url=html_url,
+                    owner=owner,
+                    existing_html=existing_html
+                )
+                timings['prd'] = time.perf_counter() - started
+                if on_stage:
+                    await on_stage('prd', timings['prd'])
+                print(f"✅ PRD 생성 완료: {prd.path}")
+
+                print("🌐 2단계: HTML 생성 중...")
+                started = time.perf_counter()
+                html = await run_blocking(self.html_agent.create_html, prd, owner=owner,
+                                         html_url=html_url, existing_html=existing_html)
+                timings['html'] = time.perf_counter() - started
+                if on_stage:
+                    await on_stage('html', timings['html'])
+                print(f"✅ HTML 생성 완료: {html.path}")
+
+                print("🎉 워크플로우 완료!")
+
         return {
-            "prd_file": prd_file,
-            "html_file": html_file,
+            "owner": owner,
+            "prd_file": prd.path,
+            "html_file": html.path,
+            "prd_artifact": prd,
+            "html_artifact": html,
+            "timings": timings,
             "success": True,
             "message": "PRD와 HTML이 성공적으로 생성되었습니다."
         }
@@ -83,7 +225,7 @@ def main():
     print(f"\n📍 생성된 파일들:")
     print(f"   PRD: {result['prd_file']}")
     print(f"   HTML: {result['html_file']}")
-    print(f"   브라우저: http://localhost:8000/html/index.html")
+    print(f"   브라우저: http://localhost:8000/html/{os.path.basename(result['html_file'])}")
 
 if __name__ == "__main__":
     main()
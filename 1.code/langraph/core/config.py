@@ -23,15 +23,39 @@ class ModelConfig:
             max_tokens=int(os.getenv("MAX_TOKENS")) if os.getenv("MAX_TOKENS") else None
         )
 
+@dataclass
+class TransportConfig:
+    """LLM 전송 설정 클래스 (live: 실제 호출, record: 호출 후 카세트에 기록, replay: 카세트에서 재생)"""
+    mode: str = "live"
+    cassette_path: str = "cassettes/llm.jsonl"
+    latency: str = "recorded"
+    speed: float = 1.0
+    
+    @classmethod
+    def from_env(cls) -> 'TransportConfig':
+        """환경 변수에서 설정 로드"""
+        return cls(
+            mode=os.getenv("LLM_TRANSPORT", "live").lower(),
+            cassette_path=os.getenv("LLM_CASSETTE", "cassettes/llm.jsonl"),
+            latency=os.getenv("LLM_REPLAY_LATENCY", "recorded"),
+            speed=float(os.getenv("LLM_REPLAY_SPEED", "1.0"))
+        )
+
 class ConfigManager:
     """설정 관리자 클래스"""
     
     def __init__(self):
         self.model_config = ModelConfig.from_env()
+        self.transport_config = TransportConfig.from_env()
         self._validate_config()
     
     def _validate_config(self):
         """설정 유효성 검사"""
+        if self.transport_config.mode not in ("live", "record", "replay"):
+            raise ValueError(f"알 수 없는 LLM_TRANSPORT 값입니다: {self.transport_config.mode}")
+        # 카세트 재생은 네트워크를 쓰지 않으므로 AWS 자격 증명이 필요 없음
+        if self.transport_config.mode == "replay":
+            return
         required_env_vars = ["AWS_REGION", "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY"]
         missing_vars = [var for var in required_env_vars if not os.getenv(var)]
         
@@ -1,9 +1,11 @@
 """
 공통 모델 팩토리 - AWS Bedrock Claude 모델 중앙 관리
 """
+import boto3
 from langchain_aws import ChatBedrock
 from typing import Optional
 from .config import config_manager
+from .transport import RecordReplayBedrockClient
 
 class ModelFactory:
     """AWS Bedrock 모델 팩토리 클래스 (싱글톤 패턴)"""
@@ -20,10 +22,20 @@ class ModelFactory:
         """공통 AWS Bedrock 모델 인스턴스 반환"""
         if self._model is None:
             model_kwargs = config_manager.get_model_kwargs()
+            transport = config_manager.transport_config
+            if transport.mode != "live":
+                # invoke_model 호출을 카세트로 기록/재생하는 클라이언트로 교체
+                model_kwargs["client"] = RecordReplayBedrockClient(
+                    boto3.client("bedrock-runtime", region_name=model_kwargs["region_name"]),
+                    transport.mode,
+                    transport.cassette_path,
+                    latency=transport.latency,
+                    speed=transport.speed
+                )
             self._model = ChatBedrock(**model_kwargs)
             
             if config_manager.is_debug_mode():
-                print(f"🔧 모델 초기화: {model_kwargs['model_id']}")
+                print(f"🔧 모델 초기화: {model_kwargs['model_id']} (전송: {transport.mode})")
                 
         return self._model
     
@@ -0,0 +1,173 @@
+"""
+LLM 전송 계층 - Bedrock 호출 기록/재생 (오프라인 벤치마크용)
+"""
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, List
+
+
+class CassetteMiss(Exception):
+    """재생 모드에서 카세트에 기록되지 않은 요청"""
+
+
+class _ReplayBody:
+    """invoke_model 응답의 StreamingBody 대역"""
+
+    def __init__(self, data: bytes):
+        self._data = data
+
+    def read(self, *args) -> bytes:
+        data, self._data = self._data, b""
+        return data
+
+    def close(self):
+        pass
+
+
+class RecordReplayBedrockClient:
+    """bedrock-runtime 클라이언트를 감싸 invoke_model 호출을 기록하거나 재생합니다.
+
+    ChatBedrock(client=...)에 그대로 넘길 수 있으며, 나머지 메서드는 원래 클라이언트로 전달합니다.
+    - record: 실제 호출 결과와 지연 시간(첫 응답, 스트림 조각 간격)을 카세트(JSON Lines)에 추가
+    - replay: 네트워크 없이 카세트의 응답을 기록된(또는 설정한) 지연 시간으로 재생
+    """
+
+    def __init__(self, client: Any, mode: str, cassette_path: str,
+                 latency: str = "recorded", speed: float = 1.0):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"알 수 없는 전송 모드: {mode}")
+        self._client = client
+        self.mode = mode
+        self.cassette_path = cassette_path
+        self.latency = latency
+        self.speed = speed
+        self._entries: Dict[str, List[Dict[str, Any]]] = {}
+        self._cursor: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def __getattr__(self, name: str) -> Any:
+        if self._client is None:
+            raise AttributeError(name)
+        return getattr(self._client, name)
+
+    def invoke_model(self, **kwargs) -> Dict[str, Any]:
+        key = self._key(kwargs)
+        if self.mode == "replay":
+            entry = self._find(key)
+            time.sleep(self._first_delay(entry["latency"]))
+            return self._response(entry, _ReplayBody(entry["chunks"][0][1].encode("utf-8")))
+
+        started = time.monotonic()
+        response = self._client.invoke_model(**kwargs)
+        data = response["body"].read()
+        self._record(key, kwargs, False, time.monotonic() - started,
+                     [[0.0, data.decode("utf-8")]], response)
+        response["body"] = _ReplayBody(data)
+        return response
+
+    def invoke_model_with_response_stream(self, **kwargs) -> Dict[str, Any]:
+        key = self._key(kwargs)
+        if self.mode == "replay":
+            entry = self._find(key)
+            return self._response(entry, self._replay_events(entry))
+
+        started = time.monotonic()
+        response = self._client.invoke_model_with_response_stream(**kwargs)
+        response["body"] = self._record_events(key, kwargs, started, response, response["body"])
+        return response
+
+    def _replay_events(self, entry: Dict[str, Any]):
+        for index, (gap, payload) in enumerate(entry["chunks"]):
+            time.sleep(self._first_delay(entry["latency"]) if index == 0 else self._gap(gap))
+            yield {"chunk": {"bytes": payload.encode("utf-8")}}
+
+    def _record_events(self, key: str, kwargs: Dict[str, Any], started: float, response: Dict[str, Any],
+                       events: Any):
+        chunks = []
+        last = None
+        first = 0.0
+        for event in events:
+            chunk = event.get("chunk")
+            if chunk:
+                now = time.monotonic()
+                if last is None:
+                    first = now - started
+                chunks.append([0.0 if last is None else round(now - last, 4), chunk["bytes"].decode("utf-8")])
+                last = now
+            yield event
+        self._record(key, kwargs, True, first, chunks, response)
+
+    def _first_delay(self, recorded: float) -> float:
+        name, _, args = self.latency.partition(":")
+        values = [float(value) for value in args.split(",") if value.strip()]
+        if name == "none":
+            return 0.0
+        if name == "fixed":
+            return values[0] * self.speed
+        if name == "lognormal":
+            median, sigma = (values + [0.5])[:2]
+            return random.lognormvariate(math.log(max(median, 1e-6)), sigma) * self.speed
+        return recorded * self.speed
+
+    def _gap(self, recorded: float) -> float:
+        return 0.0 if self.latency == "none" else recorded * self.speed
+
+    def _key(self, kwargs: Dict[str, Any]) -> str:
+        body = kwargs.get("body")
+        if isinstance(body, (bytes, bytearray)):
+            body = body.decode("utf-8")
+        raw = json.dumps([kwargs.get("modelId"), body], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _load(self):
+        if not os.path.exists(self.cassette_path):
+            return
+        with open(self.cassette_path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry["key"], []).append(entry)
+
+    def _find(self, key: str) -> Dict[str, Any]:
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                raise CassetteMiss(f"카세트에 기록되지 않은 요청입니다 ({key[:12]}). "
+                                   f"LLM_TRANSPORT=record로 먼저 기록하세요.")
+            index = self._cursor.get(key, 0)
+            self._cursor[key] = index + 1
+            return entries[index % len(entries)]
+
+    def _record(self, key: str, kwargs: Dict[str, Any], stream: bool, latency: float,
+                chunks: List[List[Any]], response: Dict[str, Any]):
+        entry = {
+            "key": key,
+            "provider": "bedrock",
+            "model": kwargs.get("modelId"),
+            "stream": stream,
+            "latency": round(latency, 4),
+            "chunks": chunks,
+            "headers": response.get("ResponseMetadata", {}).get("HTTPHeaders", {}),
+            "content_type": response.get("contentType", "application/json"),
+            "recorded_at": time.time()
+        }
+        with self._lock:
+            self._entries.setdefault(key, []).append(entry)
+            directory = os.path.dirname(self.cassette_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.cassette_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _response(self, entry: Dict[str, Any], body: Any) -> Dict[str, Any]:
+        return {
+            "body": body,
+            "contentType": entry.get("content_type", "application/json"),
+            "ResponseMetadata": {"HTTPStatusCode": 200, "HTTPHeaders": entry.get("headers", {})}
+        }